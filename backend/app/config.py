@@ -5,12 +5,47 @@ class Settings(BaseSettings):
     mongodb_url: str = "mongodb://localhost:27017"
     database_name: str = "kairos"
     openrouter_api_key: str = ""
+    openrouter_base_url: str = "https://openrouter.ai/api/v1"  # Point at loadtest/mock_llm.py to run without a real provider
     google_client_id: str = ""
     jwt_secret_key: str = ""
     jwt_algorithm: str = "HS256"
     jwt_expire_minutes: int = 10080  # 7 days
     encryption_key: str = ""  # For encrypting user API keys
 
+    # Ask providers for schema-constrained JSON (response_format / forced tool)
+    structured_output_enabled: bool = True
+
+    # Task-aware model routing: light model per provider ("openrouter=openai/gpt-4o-mini,anthropic=claude-3-5-haiku-latest")
+    # for short structured tasks and SLO downgrades; MODEL_ROUTES overrides the route table as JSON
+    light_models: str = ""
+    model_routes: str = ""
+
+    # Coaching context strategy (eager | lazy | hybrid) and percentage rollout, e.g. "lazy:10,hybrid:20"
+    context_strategy_default: str = "eager"
+    context_strategy_rollout: str = ""
+
+    # Models that get the compact (table) data picture — comma-separated id prefixes, "*" for all
+    compact_prompt_models: str = ""
+
+    # Tracing — OTLP/JSON to a local file (one trace per line) and/or a collector's /v1/traces
+    trace_export_file: str = ""
+    trace_otlp_endpoint: str = ""
+
+    # Prometheus /metrics: disabled unless set; scrapers send "Authorization: Bearer <token>"
+    metrics_token: str = ""
+
+    # Request profiling (admin X-Kairos-Profile header or per-user flag; needs pyinstrument)
+    profile_interval_ms: float = 1.0  # Sampling interval
+    profile_retention_days: int = 7
+
+    # Shared settings/caches: how long a worker trusts its local copy, and whether to
+    # also invalidate on Mongo change streams (needs a replica set)
+    shared_state_ttl_seconds: int = 5
+    shared_state_change_stream: bool = False
+
+    # WebSocket event bus: "local" (single process) or "mongo" (change streams, needs a replica set)
+    event_bus_backend: str = "local"
+
     # Coaching session lock settings
     session_lock_enabled: bool = True  # Enable/disable session locking
     session_lock_hours: int = 6  # Hours to lock after resolving a session
@@ -1,6 +1,7 @@
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 
 from app.config import settings
+from app.utils import metrics, tracing
 
 client: AsyncIOMotorClient = None
 db: AsyncIOMotorDatabase = None
@@ -8,7 +9,10 @@ db: AsyncIOMotorDatabase = None
 
 async def connect_db():
     global client, db
-    client = AsyncIOMotorClient(settings.mongodb_url)
+    listeners = [metrics.MongoMetricsListener()]
+    if tracing.enabled():
+        listeners.append(tracing.MongoCommandListener())
+    client = AsyncIOMotorClient(settings.mongodb_url, event_listeners=listeners)
     db = client[settings.database_name]
     await create_indexes()
 
@@ -23,10 +27,35 @@ async def create_indexes():
     await db.daily_logs.create_index(
         [("user_id", 1), ("goal_id", 1), ("date", 1)], unique=True
     )
+    # Day and range lookups across goals (GET /daily/{date}, GET /daily/range)
+    await db.daily_logs.create_index([("user_id", 1), ("date", 1)])
+    await db.goals.create_index([("user_id", 1), ("status", 1)])
     await db.habits.create_index([("goal_id", 1), ("status", 1)])
+    await db.habit_histories.create_index([("habit_id", 1)], unique=True)
+    await db.habit_histories.create_index([("goal_id", 1)])
     await db.trackers.create_index([("goal_id", 1)])
+    await db.tracker_analytics.create_index([("tracker_id", 1), ("day", 1)], unique=True)
+    # One document per tracker per day; only today's is read
+    await db.tracker_analytics.create_index([("computed_at", 1)], expireAfterSeconds=2 * 86400)
     await db.coaching_sessions.create_index([("goal_id", 1), ("status", 1)])
     await db.users.create_index([("google_id", 1)], unique=True)
+    await db.coaching_turn_metrics.create_index([("created_at", 1), ("strategy", 1)])
+    await db.llm_usage.create_index(
+        [("day", 1), ("user_id", 1), ("session_id", 1), ("task", 1), ("provider", 1), ("model", 1)],
+        unique=True,
+    )
+    await db.settings.create_index([("key", 1)], unique=True)
+    await db.shared_cache.create_index([("key", 1)], unique=True)
+    await db.user_events.create_index([("created_at", 1)], expireAfterSeconds=3600)
+    await db.request_profiles.create_index([("request_id", 1)], unique=True)
+    await db.request_profiles.create_index(
+        [("created_at", 1)], expireAfterSeconds=settings.profile_retention_days * 86400
+    )
+    await db.trigger_jobs.create_index([("created_at", 1)], expireAfterSeconds=7 * 86400)
+    # At most one running trigger job
+    await db.trigger_jobs.create_index(
+        [("status", 1)], unique=True, partialFilterExpression={"status": "running"}
+    )
 
 
 def get_db() -> AsyncIOMotorDatabase:
@@ -1,16 +1,31 @@
-from contextlib import asynccontextmanager
+import asyncio
+import hmac
+from contextlib import asynccontextmanager, suppress
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 from app.database import connect_db, close_db
-from app.routers import auth, goals, goal_templates, habits, trackers, daily_logs, coaching, models, users, admin
+from app.utils import metrics, tracing
+from app.config import settings
+from app.routers import auth, goals, goal_templates, habits, trackers, daily_logs, coaching, models, users, admin, events
+from app.services import event_bus, shared_state
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await connect_db()
+    tasks = [asyncio.create_task(metrics.monitor_event_loop())]
+    if settings.event_bus_backend == "mongo":
+        tasks.append(asyncio.create_task(event_bus.run_change_stream()))
+    if settings.shared_state_change_stream:
+        tasks.append(asyncio.create_task(shared_state.run_change_stream()))
     yield
+    for task in tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
     await close_db()
 
 
@@ -24,6 +39,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.middleware("http")(tracing.trace_requests)
+app.middleware("http")(metrics.track_requests)
+
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(admin.router)
@@ -34,8 +52,20 @@ app.include_router(trackers.router)
 app.include_router(daily_logs.router)
 app.include_router(coaching.router)
 app.include_router(models.router)
+app.include_router(events.router)
 
 
 @app.get("/health")
 async def health():
     return {"status": "ok"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(authorization: str | None = Header(default=None)):
+    # Off unless METRICS_TOKEN is set; scrapers send it as a bearer token
+    if not settings.metrics_token:
+        raise HTTPException(404, "Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), settings.metrics_token.encode()):
+        raise HTTPException(401, "Invalid metrics token")
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
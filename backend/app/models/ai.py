@@ -8,3 +8,20 @@ class ProgressEvaluation(BaseModel):
 class CoachingReply(BaseModel):
     message: str
     tool_calls: list[dict] = []  # Tool calls made by AI (for UI display)
+
+
+class InitialSessionReply(BaseModel):
+    phase: str  # exploring | proposing | creating | complete
+    message: str
+
+
+class ReviewSessionReply(BaseModel):
+    review_type: str
+    message: str
+
+
+class ProactiveCheckinReply(BaseModel):
+    trigger_type: str
+    metric_case: str = "n/a"  # expected | unexpected | n/a
+    delivery: str = "message_waiting"  # push_notification | message_waiting
+    message: str
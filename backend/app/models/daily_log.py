@@ -23,6 +23,24 @@ class TrackerLogInput(BaseModel):
     notes: str = ""
 
 
+class HabitCheckIn(BaseModel):
+    habit_id: str
+    completed: bool
+    notes: str = ""
+
+
+class TrackerCheckIn(BaseModel):
+    tracker_id: str
+    value: float
+    notes: str = ""
+
+
+class CheckInInput(BaseModel):
+    """Several habit states and tracker values for one goal and date, applied together."""
+    habits: list[HabitCheckIn] = []
+    trackers: list[TrackerCheckIn] = []
+
+
 class DailyLog(BaseModel):
     id: str
     user_id: str = "default"
@@ -9,6 +9,7 @@ class AIContext(BaseModel):
     plan_philosophy: str = ""
     current_phase: str = "building_foundation"
     next_review_date: Optional[str] = None
+    last_review_date: Optional[str] = None  # Day the last review session started (trigger_engine's weekly rule)
     next_session_allowed_at: Optional[datetime] = None  # Lock chat until this time
 
 
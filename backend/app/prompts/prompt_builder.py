@@ -15,8 +15,21 @@ async def build_coaching_system_prompt(
     habits: List[dict],
     trackers: List[dict],
     today_logs: dict,
-    upcoming_checkins: List[dict]
+    upcoming_checkins: List[dict],
+    data_picture: str = "full",
+    encoding: str = "blocks",
 ) -> str:
+    """
+    Assemble the coaching system prompt.
+
+    data_picture controls how much data is preloaded:
+      "full"    — every tracker and habit with averages, trends and streaks
+      "summary" — one line per item from data already in hand (no extra queries);
+                  the model fetches history with tools
+      "none"    — nothing preloaded; the model fetches everything with tools
+
+    encoding ("blocks" | "compact") picks the layout of the full data picture.
+    """
 
     sections = []
 
@@ -40,13 +53,19 @@ async def build_coaching_system_prompt(
     sections.append(_build_goal_section(goal))
     sections.append("")
 
-    # Full data picture — habits + trackers + analysis
-    sections.append(
-        await _build_data_picture(
-            habits, trackers, today_logs,
-            goal["id"], user["id"]
+    # Data picture — full dashboard, compact summary, or tools only
+    if data_picture == "full":
+        sections.append(
+            await _build_data_picture(
+                habits, trackers, today_logs,
+                goal["id"], user["id"],
+                encoding=encoding,
+            )
         )
-    )
+    elif data_picture == "summary":
+        sections.append(_build_data_summary(habits, trackers, today_logs))
+    else:
+        sections.append(_build_data_on_demand())
     sections.append("")
 
     # Upcoming check-ins
@@ -54,7 +73,13 @@ async def build_coaching_system_prompt(
     sections.append("")
 
     # Behavioral rules — always last
-    sections.append(_build_behavioral_rules())
+    rules = _build_behavioral_rules()
+    if data_picture != "full":
+        rules = rules.replace(
+            "YOU HAVE THEIR FULL DATA ABOVE. Never say \"I'd need to know more\" — you already have it.",
+            "Anything not shown above is one tool call away. Fetch it — never guess or say \"I'd need to know more\".",
+        )
+    sections.append(rules)
 
     return "\n".join(sections)
 
@@ -209,112 +234,255 @@ async def _build_data_picture(
     trackers: List[dict],
     today_logs: dict,
     goal_id: str,
-    user_id: str
+    user_id: str,
+    encoding: str = "blocks",
 ) -> str:
+    """
+    Full data picture. encoding picks the layout, never the content:
+      "blocks"  — one labelled multi-line block per tracker / habit
+      "compact" — one table row per tracker / habit, labels stated once
+    """
+
+    tracker_rows = []
+    tracker_entries = today_logs.get("tracker_entries", []) if today_logs else []
+
+    for tracker in trackers:
+        # Today's logged value
+        today_entry = next(
+            (e for e in tracker_entries if e["tracker_id"] == tracker["id"]),
+            None
+        )
+
+        # Historical averages
+        avg_7  = await _tracker_average(tracker["id"], user_id, goal_id, 7)
+        avg_14 = await _tracker_average(tracker["id"], user_id, goal_id, 14)
+
+        tracker_rows.append({
+            "tracker": tracker,
+            "today":   today_entry["value"] if today_entry else None,
+            "avg_7":   avg_7,
+            "avg_14":  avg_14,
+            # Trend interpretation
+            "trend":   _interpret_trend(avg_7, avg_14, tracker.get("target_value"), tracker.get("direction", "increase")),
+        })
+
+    active_habits = [h for h in habits if h.get("status") == "active"]
+
+    if encoding == "compact":
+        sections = _render_data_compact(tracker_rows, active_habits)
+    else:
+        sections = _render_data_blocks(tracker_rows, active_habits)
+
+    # ── Coach's Eye View ──────────────────────────────────────────
+    sections.append("")
+    sections.append("### COACH'S EYE VIEW")
+    sections.append("")
+    sections.append(
+        _build_coaches_eye(active_habits, trackers)
+    )
+
+    return "\n".join(sections)
+
 
+def _completion_label(completion_7: Optional[int]) -> str:
+    if completion_7 is None:
+        return "NEW"
+    if completion_7 >= 6:
+        return "CONSISTENT"
+    if completion_7 >= 4:
+        return "MODERATE"
+    if completion_7 >= 2:
+        return "STRUGGLING"
+    return "MISSING"
+
+
+def _can_add_habit_line(active_habits: List[dict]) -> str:
+    all_formed = all(h.get("is_formed", False) for h in active_habits)
+    return f"Can add new habit: {'YES — all habits formed' if all_formed else 'NO — active habits need 8 completions each first'}"
+
+
+def _render_data_blocks(tracker_rows: List[dict], active_habits: List[dict]) -> List[str]:
     sections = ["## DATA PICTURE", ""]
 
     # ── Trackers ──────────────────────────────────────────────────
     sections.append("### TRACKERS")
     sections.append("")
 
-    if not trackers:
+    if not tracker_rows:
         sections.append("No trackers set up yet.")
-    else:
-        tracker_entries = today_logs.get("tracker_entries", []) if today_logs else []
 
-        for tracker in trackers:
-            # Today's logged value
-            today_entry = next(
-                (e for e in tracker_entries if e["tracker_id"] == tracker["id"]),
-                None
-            )
-            today_value = today_entry["value"] if today_entry else None
+    for row in tracker_rows:
+        tracker = row["tracker"]
+        today_value, avg_7, avg_14 = row["today"], row["avg_7"], row["avg_14"]
 
-            # Historical averages
-            avg_7  = await _tracker_average(tracker["id"], user_id, goal_id, 7)
-            avg_14 = await _tracker_average(tracker["id"], user_id, goal_id, 14)
+        # Format
+        logged_str  = f"{today_value} {tracker['unit']}" if today_value is not None else "NOT LOGGED TODAY"
+        avg7_str    = f"{avg_7:.1f} {tracker['unit']}"   if avg_7  is not None else "no data"
+        avg14_str   = f"{avg_14:.1f} {tracker['unit']}"  if avg_14 is not None else "no data"
+        target_str  = f"{tracker['target_value']} {tracker['unit']}" if tracker.get("target_value") else "none set"
 
-            # Trend interpretation
-            trend = _interpret_trend(avg_7, avg_14, tracker.get("target_value"), tracker.get("direction", "increase"))
-
-            # Format
-            logged_str  = f"{today_value} {tracker['unit']}" if today_value is not None else "NOT LOGGED TODAY"
-            avg7_str    = f"{avg_7:.1f} {tracker['unit']}"   if avg_7  is not None else "no data"
-            avg14_str   = f"{avg_14:.1f} {tracker['unit']}"  if avg_14 is not None else "no data"
-            target_str  = f"{tracker['target_value']} {tracker['unit']}" if tracker.get("target_value") else "none set"
-
-            sections.append(f"Tracker: {tracker['name']}")
-            sections.append(f"  Today:       {logged_str}")
-            sections.append(f"  7-day avg:   {avg7_str}")
-            sections.append(f"  14-day avg:  {avg14_str}")
-            sections.append(f"  Target:      {target_str}")
-            sections.append(f"  Trend:       {trend}")
-            sections.append("")
+        sections.append(f"Tracker: {tracker['name']}")
+        sections.append(f"  Today:       {logged_str}")
+        sections.append(f"  7-day avg:   {avg7_str}")
+        sections.append(f"  14-day avg:  {avg14_str}")
+        sections.append(f"  Target:      {target_str}")
+        sections.append(f"  Trend:       {row['trend']}")
+        sections.append("")
 
     # ── Habits ────────────────────────────────────────────────────
     sections.append("### HABITS")
     sections.append("")
 
-    active_habits = [h for h in habits if h.get("status") == "active"]
-
     if not active_habits:
         sections.append("No active habits.")
         sections.append("Can add habits: YES")
+        return sections
+
+    for habit in active_habits:
+        formation_count = habit.get("formation_count", 0)
+        is_formed       = habit.get("is_formed", False)
+        streak          = habit.get("current_streak", 0)
+        best_streak     = habit.get("best_streak", 0)
+        completion_7    = habit.get("completion_last_7_days", None)
+        completed_today = habit.get("completed_today", False)
+
+        # Formation status
+        formation_str = "FORMED ✓" if is_formed else f"Building — {formation_count}/8 completions"
+
+        # Completion rate
+        rate_str = f"{completion_7}/7 days this week" if completion_7 is not None else "no data yet"
+
+        # Today status
+        today_str_val = "DONE ✓" if completed_today else "NOT YET"
+
+        sections.append(f"Habit: {habit['title']} (ID: {habit['id']})")
+        sections.append(f"  Today:        {today_str_val}")
+        sections.append(f"  This week:    {rate_str} — {_completion_label(completion_7)}")
+        sections.append(f"  Streak:       {streak} days (best: {best_streak})")
+        sections.append(f"  Formation:    {formation_str}")
+
+        if habit.get("linked_tracker_id"):
+            sections.append(f"  Auto-tracks:  Yes — logs when tracker ≥ {habit.get('tracker_threshold')}")
+
+        sections.append("")
+
+    sections.append(_can_add_habit_line(active_habits))
+    return sections
+
+
+def _cell(value) -> str:
+    """Table cell text — a pipe inside a value would shift the columns."""
+    return str(value).replace(" | ", "; ").replace("|", "/")
+
+
+def _render_data_compact(tracker_rows: List[dict], active_habits: List[dict]) -> List[str]:
+    sections = ["## DATA PICTURE", "", "A dash (-) means not logged today / no data / none set.", ""]
+
+    # ── Trackers ──────────────────────────────────────────────────
+    sections.append("### TRACKERS")
+
+    if not tracker_rows:
+        sections.append("No trackers set up yet.")
     else:
-        all_formed = all(h.get("is_formed", False) for h in active_habits)
+        sections.append("name (unit) | today | 7-day avg | 14-day avg | target | trend")
 
-        for habit in active_habits:
-            formation_count = habit.get("formation_count", 0)
-            is_formed       = habit.get("is_formed", False)
-            streak          = habit.get("current_streak", 0)
-            best_streak     = habit.get("best_streak", 0)
-            completion_7    = habit.get("completion_last_7_days", None)
-            completed_today = habit.get("completed_today", False)
-
-            # Formation status
-            formation_str = "FORMED ✓" if is_formed else f"Building — {formation_count}/8 completions"
-
-            # Completion rate interpretation
-            if completion_7 is not None:
-                rate_str = f"{completion_7}/7 days this week"
-                if completion_7 >= 6:
-                    rate_label = "CONSISTENT"
-                elif completion_7 >= 4:
-                    rate_label = "MODERATE"
-                elif completion_7 >= 2:
-                    rate_label = "STRUGGLING"
-                else:
-                    rate_label = "MISSING"
-            else:
-                rate_str   = "no data yet"
-                rate_label = "NEW"
-
-            # Today status
-            today_str_val = "DONE ✓" if completed_today else "NOT YET"
-
-            sections.append(f"Habit: {habit['title']} (ID: {habit['id']})")
-            sections.append(f"  Today:        {today_str_val}")
-            sections.append(f"  This week:    {rate_str} — {rate_label}")
-            sections.append(f"  Streak:       {streak} days (best: {best_streak})")
-            sections.append(f"  Formation:    {formation_str}")
-
-            if habit.get("linked_tracker_id"):
-                sections.append(f"  Auto-tracks:  Yes — logs when tracker ≥ {habit.get('tracker_threshold')}")
-
-            sections.append("")
-
-        sections.append(f"Can add new habit: {'YES — all habits formed' if all_formed else 'NO — active habits need 8 completions each first'}")
+    for row in tracker_rows:
+        tracker = row["tracker"]
+        today_value, avg_7, avg_14 = row["today"], row["avg_7"], row["avg_14"]
 
-    # ── Coach's Eye View ──────────────────────────────────────────
+        sections.append(" | ".join([
+            _cell(f"{tracker['name']} ({tracker['unit']})"),
+            str(today_value) if today_value is not None else "-",
+            f"{avg_7:.1f}" if avg_7 is not None else "-",
+            f"{avg_14:.1f}" if avg_14 is not None else "-",
+            str(tracker["target_value"]) if tracker.get("target_value") else "-",
+            _cell(row["trend"]),
+        ]))
+
+    # ── Habits ────────────────────────────────────────────────────
     sections.append("")
-    sections.append("### COACH'S EYE VIEW")
+    sections.append("### HABITS")
+
+    if not active_habits:
+        sections.append("No active habits.")
+        sections.append("Can add habits: YES")
+        return sections
+
+    sections.append("id | habit | today | this week | streak (best) | formation (of 8) | auto-tracks when tracker ≥")
+
+    for habit in active_habits:
+        completion_7 = habit.get("completion_last_7_days", None)
+        week_str     = f"{completion_7}/7" if completion_7 is not None else "-"
+        threshold    = habit.get("tracker_threshold") if habit.get("linked_tracker_id") else None
+
+        sections.append(" | ".join([
+            habit["id"],
+            _cell(habit["title"]),
+            "DONE" if habit.get("completed_today", False) else "NOT YET",
+            f"{week_str} {_completion_label(completion_7)}",
+            f"{habit.get('current_streak', 0)} ({habit.get('best_streak', 0)})",
+            "FORMED" if habit.get("is_formed", False) else f"{habit.get('formation_count', 0)}/8",
+            str(threshold) if threshold is not None else "-",
+        ]))
+
     sections.append("")
-    sections.append(
-        _build_coaches_eye(active_habits, trackers)
-    )
+    sections.append(_can_add_habit_line(active_habits))
+    return sections
 
-    return "\n".join(sections)
+
+def _build_data_summary(
+    habits: List[dict],
+    trackers: List[dict],
+    today_logs: dict
+) -> str:
+    """
+    One line per tracker and habit, built only from data already loaded.
+    History, averages and trends are left to the data tools.
+    """
+    lines = ["## DATA SNAPSHOT", ""]
+
+    tracker_entries = today_logs.get("tracker_entries", []) if today_logs else []
+    logged = {e["tracker_id"]: e["value"] for e in tracker_entries}
+
+    if not trackers:
+        lines.append("Trackers: none set up yet.")
+    for tracker in trackers:
+        value = logged.get(tracker["id"])
+        today = f"{value} {tracker['unit']}" if value is not None else "NOT LOGGED TODAY"
+        target = tracker.get("target_value")
+        target_str = f", target {target} {tracker['unit']}" if target is not None else ""
+        lines.append(f"Tracker: {tracker['name']} — today {today}{target_str}")
+
+    active_habits = [h for h in habits if h.get("status") == "active"]
+    if not active_habits:
+        lines.append("Habits: none active. Can add habits: YES")
+    else:
+        for habit in active_habits:
+            today = "DONE" if habit.get("completed_today") else "NOT YET"
+            week = habit.get("completion_last_7_days")
+            week_str = f", {week}/7 this week" if week is not None else ""
+            formation = "FORMED" if habit.get("is_formed") else f"{habit.get('formation_count', 0)}/8 to form"
+            lines.append(
+                f"Habit: {habit['title']} (ID: {habit['id']}) — today {today}{week_str}, "
+                f"streak {habit.get('current_streak', 0)}, {formation}"
+            )
+        all_formed = all(h.get("is_formed", False) for h in active_habits)
+        lines.append(f"Can add new habit: {'YES' if all_formed else 'NO — active habits need 8 completions each first'}")
+
+    lines.append("")
+    lines.append("For history, averages and trends, call the data tools.")
+    lines.append("")
+    lines.append(_build_coaches_eye(active_habits, trackers))
+
+    return "\n".join(lines)
+
+
+def _build_data_on_demand() -> str:
+    return """## DATA
+
+Nothing is preloaded. Use the data tools to look up habits, trackers,
+daily logs, performance and trends whenever the conversation needs them.
+Check active habits before suggesting or creating a new one."""
 
 
 def _interpret_trend(
@@ -449,8 +449,13 @@ def build_habits_summary_for_review(
 def build_tracker_summary_for_review(
     trackers: list,
     period_averages: dict,
-    prior_period_averages: dict
+    prior_period_averages: dict,
+    trends: dict | None = None
 ) -> str:
+    """
+    trends — tracker_analytics results by tracker id; adds pace, projection,
+    plateau and level-shift lines where they apply.
+    """
     if not trackers:
         return "No trackers active this period."
 
@@ -495,11 +500,40 @@ def build_tracker_summary_for_review(
         lines.append(f"  Period avg:  {avg_str}")
         lines.append(f"  Trend:       {trend_str}")
         lines.append(f"  vs Target:   {gap_str}")
+        lines.extend(_trend_lines((trends or {}).get(tid), unit))
         lines.append("")
 
     return "\n".join(lines)
 
 
+def _trend_lines(trend: dict | None, unit: str) -> list[str]:
+    if not trend:
+        return []
+    lines = []
+    if trend.get("slope_14") is not None:
+        lines.append(f"  Pace:        {trend['slope_14'] * 7:+.2f} {unit}/week (last 14 days)")
+
+    status = trend.get("target_status")
+    if status == "reached":
+        lines.append("  Projection:  target reached")
+    elif status == "stalled":
+        lines.append(f"  Projection:  not moving toward target by {trend['target_date']}")
+    elif status in ("on_pace", "behind"):
+        when = "before" if status == "on_pace" else "AFTER"
+        lines.append(
+            f"  Projection:  reaches target around {trend['projected_date']} "
+            f"({when} the {trend['target_date']} target date)"
+        )
+
+    plateau = trend.get("plateau")
+    if plateau and plateau["days"] >= 7:
+        lines.append(f"  Plateau:     flat at {plateau['mean']:g} {unit} for {plateau['days']} days")
+    shift = trend.get("change_point")
+    if shift:
+        lines.append(f"  Shift:       moved from {shift['before']:g} to {shift['after']:g} {unit} around {shift['date']}")
+    return lines
+
+
 # ────────────────────────────────────────────────────────────────
 # TIMELINE HEALTH BUILDER
 # ────────────────────────────────────────────────────────────────
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 
 from app.auth.dependencies import get_current_admin
 from app.config import settings
 from app.database import get_db
+from app.services import (
+    coaching_service, context_strategy, model_routing, profile_service, shared_state, trigger_engine, usage_service,
+)
 from app.utils.object_id import doc_id
 
 router = APIRouter(prefix="/admin", tags=["admin"])
@@ -20,12 +24,19 @@ class UpdateSettingsRequest(BaseModel):
     session_lock_hours: int | None = None
 
 
+class ContextStrategyUpdate(BaseModel):
+    strategy: str | None = None  # None clears the override
+
+
+class ProfilingUpdate(BaseModel):
+    enabled: bool
+
+
 @router.get("/settings")
 async def get_settings(current_admin: dict = Depends(get_current_admin)):
     """Get current system settings (admin only)"""
     return {
-        "session_lock_enabled": settings.session_lock_enabled,
-        "session_lock_hours": settings.session_lock_hours,
+        **await coaching_service.get_session_lock_settings(),
         "admin_emails": settings.admin_emails,
     }
 
@@ -37,21 +48,20 @@ async def update_settings(
 ):
     """Update system settings (admin only)
 
-    Note: This updates the in-memory settings for the current session.
-    For permanent changes, update the .env file.
+    Stored in the database and picked up by every worker; the .env values
+    are only the defaults until an admin changes them here.
     """
-    if data.session_lock_enabled is not None:
-        settings.session_lock_enabled = data.session_lock_enabled
-
     if data.session_lock_hours is not None:
         if data.session_lock_hours < 1 or data.session_lock_hours > 168:
             raise HTTPException(400, "Lock hours must be between 1 and 168 (1 week)")
-        settings.session_lock_hours = data.session_lock_hours
+        await shared_state.set_setting("session_lock_hours", data.session_lock_hours)
+
+    if data.session_lock_enabled is not None:
+        await shared_state.set_setting("session_lock_enabled", data.session_lock_enabled)
 
     return {
-        "session_lock_enabled": settings.session_lock_enabled,
-        "session_lock_hours": settings.session_lock_hours,
-        "message": "Settings updated (in-memory only - update .env for persistence)"
+        **await coaching_service.get_session_lock_settings(),
+        "message": "Settings updated",
     }
 
 
@@ -101,3 +111,152 @@ async def get_stats(current_admin: dict = Depends(get_current_admin)):
         "total_sessions": total_sessions,
         "active_sessions": active_sessions,
     }
+
+
+@router.get("/context-strategies")
+async def get_context_strategy_report(
+    days: int = 7,
+    current_admin: dict = Depends(get_current_admin)
+):
+    """Compare coaching context strategies by tokens, tool iterations and latency (admin only)"""
+    return {
+        "default": settings.context_strategy_default,
+        "rollout": settings.context_strategy_rollout,
+        "days": days,
+        "strategies": await context_strategy.summarize(days),
+    }
+
+
+@router.get("/model-routes")
+async def get_model_routes(current_admin: dict = Depends(get_current_admin)):
+    """Per-task route table and this process's p95 latency against each SLO (admin only)"""
+    return {
+        "light_models": settings.light_models,
+        "routes": {task: model_routing.route_for(task) for task in model_routing.ROUTES},
+        "latency": model_routing.slo_report(),
+    }
+
+
+@router.put("/users/{user_id}/context-strategy")
+async def set_user_context_strategy(
+    user_id: str,
+    data: ContextStrategyUpdate,
+    current_admin: dict = Depends(get_current_admin)
+):
+    """Pin a user to a context strategy, or clear the pin (admin only)"""
+    try:
+        found = await context_strategy.set_user_strategy(user_id, data.strategy)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    if not found:
+        raise HTTPException(404, "User not found")
+    return {"user_id": user_id, "context_strategy": data.strategy}
+
+
+@router.get("/usage")
+async def get_llm_usage(
+    group_by: str = "user",
+    days: int = Query(default=7, ge=1, le=366),
+    limit: int = Query(default=50, ge=1, le=1000),
+    current_admin: dict = Depends(get_current_admin)
+):
+    """LLM tokens and cost grouped by user, session, model, task, provider or day (admin only)"""
+    try:
+        report = await usage_service.usage_report(group_by=group_by, days=days, limit=limit)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return {
+        "group_by": group_by,
+        "days": days,
+        "total_cost_usd": report["total_cost_usd"],
+        "rows": report["rows"],
+    }
+
+
+@router.put("/users/{user_id}/profiling")
+async def set_user_profiling(
+    user_id: str,
+    data: ProfilingUpdate,
+    current_admin: dict = Depends(get_current_admin)
+):
+    """Profile every coaching and active-goal request this user makes, or stop (admin only)"""
+    try:
+        found = await profile_service.set_user_profiling(user_id, data.enabled)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    if not found:
+        raise HTTPException(404, "User not found")
+    return {"user_id": user_id, "profile_requests": data.enabled}
+
+
+@router.get("/profiles")
+async def list_request_profiles(
+    user_id: str | None = None,
+    name: str | None = None,
+    limit: int = 50,
+    current_admin: dict = Depends(get_current_admin)
+):
+    """Recent request profiles, newest first (admin only)"""
+    return await profile_service.list_profiles(user_id=user_id, name=name, limit=limit)
+
+
+@router.get("/profiles/{request_id}")
+async def get_request_profile(
+    request_id: str,
+    format: str = "speedscope",
+    current_admin: dict = Depends(get_current_admin)
+):
+    """One profile — speedscope JSON (open in speedscope.app) or format=text for the call tree (admin only)"""
+    if format not in ("speedscope", "text"):
+        raise HTTPException(400, "Invalid format. Must be one of: speedscope, text")
+
+    profile = await profile_service.get_profile(request_id)
+    if not profile:
+        raise HTTPException(404, "Profile not found")
+
+    if format == "text":
+        return PlainTextResponse(profile["text"])
+    if not profile["speedscope"]:
+        raise HTTPException(413, "Profile too large to store as speedscope; use format=text")
+    return Response(
+        profile["speedscope"],
+        media_type="application/json",
+        headers={"Content-Disposition": f'attachment; filename="{request_id}.speedscope.json"'},
+    )
+
+
+@router.post("/triggers/evaluate")
+async def evaluate_triggers(
+    response: Response,
+    generate: bool = False,
+    kinds: str = "review,proactive",
+    current_admin: dict = Depends(get_current_admin)
+):
+    """
+    Evaluate review and proactive triggers for every active goal in one pass (admin only).
+    Returns the work list. With generate=true the evaluation and the session/check-in
+    generation run in the background instead: returns a job id for GET /admin/triggers/jobs/{job_id}.
+    """
+    selected = tuple(k.strip() for k in kinds.split(",") if k.strip())
+    if not selected or any(k not in ("review", "proactive") for k in selected):
+        raise HTTPException(400, "kinds must be review, proactive or both")
+
+    if generate:
+        response.status_code = 202
+        try:
+            job_id = await trigger_engine.start_job(selected)
+        except trigger_engine.JobRunningError as e:
+            raise HTTPException(409, f"Trigger job {e.args[0]} is still running")
+        return {"job_id": job_id, "status": "running"}
+
+    work = await trigger_engine.evaluate_all(kinds=selected)
+    return {"count": len(work), "work": work}
+
+
+@router.get("/triggers/jobs/{job_id}")
+async def get_trigger_job(job_id: str, current_admin: dict = Depends(get_current_admin)):
+    """Status of a background trigger job: running, done (with counts and failures) or failed (admin only)."""
+    job = await trigger_engine.get_job(job_id)
+    if not job:
+        raise HTTPException(404, "Job not found")
+    return job
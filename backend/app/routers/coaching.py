@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from pydantic import BaseModel
 
 from app.auth.dependencies import get_current_user
 from app.services import coaching_service
+from app.utils import etag, profiling
 
 router = APIRouter(tags=["coaching"])
 
@@ -12,20 +13,38 @@ class MessageInput(BaseModel):
 
 
 @router.get("/goals/{goal_id}/coaching")
-async def get_active_coaching(goal_id: str, current_user: dict = Depends(get_current_user)):
+async def get_active_coaching(goal_id: str, request: Request, response: Response, current_user: dict = Depends(get_current_user)):
+    version = await coaching_service.get_active_session_version(goal_id)
+    cached = etag.not_modified(request, response, etag.weak_etag("coaching", goal_id, version))
+    if cached is not None:
+        return cached
     session = await coaching_service.get_active_session(goal_id)
     return session
 
 
 @router.post("/goals/{goal_id}/coaching/start")
-async def start_coaching(goal_id: str, trigger: str = "scheduled_review", current_user: dict = Depends(get_current_user)):
-    return await coaching_service.start_coaching_session(goal_id, trigger, user_id=current_user["id"])
+async def start_coaching(
+    goal_id: str,
+    request: Request,
+    response: Response,
+    trigger: str = "scheduled_review",
+    current_user: dict = Depends(get_current_user),
+):
+    async with profiling.profile_request(request, response, current_user, "start_coaching_session"):
+        return await coaching_service.start_coaching_session(goal_id, trigger, user_id=current_user["id"])
 
 
 @router.post("/coaching/{session_id}/message")
-async def send_message(session_id: str, data: MessageInput, current_user: dict = Depends(get_current_user)):
+async def send_message(
+    session_id: str,
+    data: MessageInput,
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user),
+):
     try:
-        return await coaching_service.send_message(session_id, data.message)
+        async with profiling.profile_request(request, response, current_user, "send_message"):
+            return await coaching_service.send_message(session_id, data.message)
     except ValueError as e:
         raise HTTPException(404, str(e))
     except RuntimeError as e:
@@ -1,14 +1,37 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 
 from app.auth.dependencies import get_current_user
-from app.models.daily_log import TrackerLogInput
+from app.models.daily_log import CheckInInput, TrackerLogInput
 from app.services import daily_log_service
+from app.utils import etag
 
 router = APIRouter(prefix="/daily", tags=["daily"])
 
 
+@router.get("/range")
+async def get_log_range(
+    start: str,
+    end: str,
+    goal_id: str | None = None,
+    include: str = Query(default="habits,trackers", description="Columns: habits, trackers"),
+    current_user: dict = Depends(get_current_user),
+):
+    """Logs for a date range (max 366 days) as columns: habit completion strings and tracker value lists."""
+    try:
+        return await daily_log_service.get_log_range(
+            current_user["id"], start, end, goal_id,
+            include=tuple(c.strip() for c in include.split(",") if c.strip()),
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+
 @router.get("/{date}")
-async def get_daily_logs(date: str, current_user: dict = Depends(get_current_user)):
+async def get_daily_logs(date: str, request: Request, response: Response, current_user: dict = Depends(get_current_user)):
+    version = await daily_log_service.get_daily_logs_version(current_user["id"], date)
+    cached = etag.not_modified(request, response, etag.weak_etag("daily", date, version))
+    if cached is not None:
+        return cached
     return await daily_log_service.get_daily_logs(current_user["id"], date)
 
 
@@ -22,3 +45,12 @@ async def log_tracker(date: str, goal_id: str, tracker_id: str, data: TrackerLog
     return await daily_log_service.log_tracker(
         current_user["id"], goal_id, date, tracker_id, data
     )
+
+
+@router.post("/{date}/goals/{goal_id}/check-in")
+async def check_in(date: str, goal_id: str, data: CheckInInput, current_user: dict = Depends(get_current_user)):
+    """Set several habits and trackers for the day in one request; returns the final log."""
+    try:
+        return await daily_log_service.check_in(current_user["id"], goal_id, date, data)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
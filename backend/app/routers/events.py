@@ -0,0 +1,71 @@
+"""Real-time updates for the signed-in user over WebSocket."""
+import asyncio
+import logging
+
+from bson import ObjectId
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
+
+from app.auth.jwt import decode_access_token
+from app.database import get_db
+from app.services import event_bus
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["events"])
+
+PING_SECONDS = 30
+
+
+async def _authenticate(token: str) -> str | None:
+    """User id for a valid token, else None. Browsers can't set headers on a WebSocket, so it comes as ?token=."""
+    payload = decode_access_token(token)
+    user_id = payload.get("sub") if payload else None
+    if not user_id or not ObjectId.is_valid(user_id):
+        return None
+    user = await get_db().users.find_one({"_id": ObjectId(user_id)}, {"_id": 1})
+    return user_id if user else None
+
+
+@router.websocket("/ws")
+async def user_events(websocket: WebSocket, token: str = ""):
+    """
+    Push channel for the signed-in user. Each message is
+    {"type": ..., "data": {...}, "at": iso-timestamp}:
+
+      session.started / session.updated / session.resolved — coaching sessions
+      daily_log.updated — habit toggled or tracker logged
+      action.executed   — a coach tag created/updated a habit, tracker, log or memory
+      proactive.pending — a proactive check-in is waiting
+      ping              — keepalive every 30s
+    """
+    user_id = await _authenticate(token)
+    if not user_id:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    async with event_bus.subscribe(user_id) as queue:
+        # Clients only listen; a receive completing means they closed (or sent noise)
+        receiver = asyncio.create_task(websocket.receive_text())
+        try:
+            while True:
+                getter = asyncio.create_task(queue.get())
+                done, _ = await asyncio.wait({getter, receiver}, timeout=PING_SECONDS, return_when=asyncio.FIRST_COMPLETED)
+
+                # A dequeued event goes out first, even if the receive finished in the same wait
+                if getter in done:
+                    await websocket.send_json(getter.result())
+                else:
+                    getter.cancel()
+
+                if receiver in done:
+                    receiver.result()  # Raises WebSocketDisconnect on close
+                    receiver = asyncio.create_task(websocket.receive_text())
+                elif getter not in done:
+                    await websocket.send_json({"type": "ping"})
+        except WebSocketDisconnect:
+            pass
+        except Exception as e:
+            logger.debug(f"Event socket for user {user_id} closed: {e}")
+        finally:
+            receiver.cancel()
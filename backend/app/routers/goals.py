@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 
 from app.auth.dependencies import get_current_user
 from app.models.goal import GoalCreate, GoalUpdate
 from app.services import goal_service, habit_service, tracker_service, coaching_service
+from app.utils import etag, profiling
 
 router = APIRouter(prefix="/goals", tags=["goals"])
 
@@ -23,14 +24,38 @@ async def create_goal(data: GoalCreate, current_user: dict = Depends(get_current
 
 
 @router.get("")
-async def get_active_goal(current_user: dict = Depends(get_current_user)):
+async def get_active_goal(request: Request, response: Response, current_user: dict = Depends(get_current_user)):
     """Return the single active goal (with habits + trackers), or null."""
-    goal = await goal_service.get_active_goal(user_id=current_user["id"])
-    if not goal:
-        return None
-    goal["habits"] = await habit_service.list_habits(goal["id"], status="active")
-    goal["trackers"] = await tracker_service.list_trackers(goal["id"])
-    return goal
+    version = await goal_service.get_active_goal_version(current_user["id"])
+    cached = etag.not_modified(request, response, etag.weak_etag("goal", version))
+    if cached is not None:
+        return cached
+
+    async with profiling.profile_request(request, response, current_user, "get_active_goal"):
+        goal = await goal_service.get_active_goal(user_id=current_user["id"])
+        if not goal:
+            return None
+        goal["habits"] = await habit_service.list_habits(goal["id"], status="active")
+        goal["trackers"] = await tracker_service.list_trackers(goal["id"])
+        return goal
+
+
+@router.get("/dashboard")
+async def get_dashboard(
+    goal_id: str | None = None,
+    date: str | None = None,
+    days: int = Query(default=14, ge=1, le=366),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Landing page in one request: goal with active habits and trackers, the day's
+    log (date defaults to today), tracker values for the last `days` days and
+    the active coaching session. Null when there is no active goal.
+    """
+    try:
+        return await goal_service.get_dashboard(current_user["id"], goal_id=goal_id, day=date, days=days)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
 
 
 @router.get("/{goal_id}")
@@ -3,7 +3,8 @@ from typing import Optional
 
 from app.auth.dependencies import get_current_user
 from app.models.habit import HabitUpdate
-from app.services import habit_service
+from app.services import habit_history, habit_service
+from app.utils.dates import today_str
 
 router = APIRouter(tags=["habits"])
 
@@ -19,3 +20,28 @@ async def update_habit(habit_id: str, data: HabitUpdate, current_user: dict = De
     if not habit:
         raise HTTPException(404, "Habit not found")
     return habit
+
+
+@router.get("/habits/{habit_id}/history")
+async def get_habit_history(
+    habit_id: str,
+    start: Optional[str] = Query(None, description="Defaults to the activation date (or first completion)"),
+    end: Optional[str] = Query(None, description="Defaults to today"),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Completion history as a base64 bitmap: bit i (little-endian) is start + i days.
+    Also returns streaks, formation count and 7/14/30-day completions.
+    """
+    habit = await habit_service.get_habit(habit_id)
+    if not habit or habit.get("user_id") != current_user["id"]:
+        raise HTTPException(404, "Habit not found")
+
+    bits = (await habit_history.load([habit], current_user["id"]))[habit_id]
+    end = end or today_str()
+    start = start or habit_history.activated_day(habit) or habit_history.first_day(bits) or end
+    try:
+        encoded = habit_history.encode(bits, start, end)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return {**encoded, "stats": habit_history.stats(bits, end, habit_history.activated_day(habit))}
@@ -1,77 +1,113 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends, Request, Response
 from pydantic import BaseModel
 
-from app.services import ai_service
+from app.services import ai_service, model_catalog
 from app.auth.dependencies import get_current_user
+from app.utils import etag
 
 router = APIRouter(prefix="/models", tags=["models"])
 
 
 class ModelSelect(BaseModel):
     model_id: str
+    task: str | None = None  # chat | summary | proactive | goal_analysis; None sets the user's default
+    scope: str = "user"  # "global" (admin only) sets the fallback for users without a pick
 
 
-@router.get("")
-async def list_models(
-    search: str = Query(default=""),
-    current_user: dict = Depends(get_current_user)
-):
-    """Fetch available models based on user's AI provider configuration."""
-    user_id = current_user["id"]
-
-    # Get user's AI configuration
+async def _user_catalog(user_id: str):
+    """Model catalog for the user's provider and key; 502 if it can't be fetched."""
     ai_config = await ai_service.get_user_ai_config(user_id)
     provider = ai_config.get("provider", "openrouter")
-    api_key = ai_config.get("api_key")
-
     try:
-        models = await ai_service.fetch_models(provider=provider, api_key=api_key)
+        return await ai_service.get_model_catalog(
+            provider=provider, api_key=ai_config.get("api_key"), base_url=ai_config.get("base_url")
+        )
     except Exception as e:
         raise HTTPException(502, f"Failed to fetch models from {provider}: {e}")
 
-    # Return a simplified list with key fields
-    result = []
-    for m in models:
-        entry = {
-            "id": m.get("id", ""),
-            "name": m.get("name", ""),
-            "context_length": m.get("context_length"),
-            "pricing": m.get("pricing", {}),
-        }
-        result.append(entry)
 
-    if search:
-        search_lower = search.lower()
-        result = [
-            m for m in result
-            if search_lower in m["id"].lower() or search_lower in m["name"].lower()
-        ]
+@router.get("")
+async def list_models(
+    request: Request,
+    response: Response,
+    search: str = Query(default=""),
+    min_context: int | None = Query(default=None, ge=0),
+    max_price: float | None = Query(default=None, ge=0, description="USD per million prompt tokens"),
+    modality: str | None = Query(default=None, description="Input modality, e.g. image"),
+    sort: str | None = Query(default=None, description="price | -price | context_length | -context_length | name"),
+    fields: str | None = Query(default=None, description="Comma-separated, e.g. id,name,pricing"),
+    cursor: str | None = None,
+    limit: int | None = Query(default=None, ge=1, le=500),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Fetch available models based on user's AI provider configuration.
+
+    Without limit, returns every match as a list. With limit, returns a page:
+    {items, next_cursor, total, version}.
+    """
+    catalog = await _user_catalog(current_user["id"])
+
+    cached = etag.not_modified(request, response, etag.weak_etag("models", catalog.version, request.url.query))
+    if cached is not None:
+        return cached
 
-    return result
+    try:
+        body = model_catalog.render_page(
+            catalog,
+            search=search,
+            min_context=min_context,
+            max_price=max_price,
+            modality=modality,
+            sort=sort,
+            fields=[f.strip() for f in fields.split(",") if f.strip()] if fields else None,
+            cursor=cursor,
+            limit=limit,
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return Response(content=body, media_type="application/json", headers=dict(response.headers))
 
 
 @router.get("/selected")
-async def get_selected():
-    """Get the currently selected model."""
-    model_id = await ai_service.get_selected_model()
-    return {"model_id": model_id}
+async def get_selected(current_user: dict = Depends(get_current_user)):
+    """The model used for this user's chat, plus their per-task picks and the global fallback."""
+    user_id = current_user["id"]
+    return {
+        "model_id": await ai_service.get_selected_model(user_id, "chat"),
+        "selection": await ai_service.get_model_selection(user_id),
+    }
 
 
 @router.post("/select")
 async def select_model(data: ModelSelect, current_user: dict = Depends(get_current_user)):
-    """Select a model to use for all AI calls."""
+    """Select a model for this user's AI calls — all of them, or one task type."""
     user_id = current_user["id"]
 
-    # Get user's AI configuration
-    ai_config = await ai_service.get_user_ai_config(user_id)
-    provider = ai_config.get("provider", "openrouter")
-    api_key = ai_config.get("api_key")
+    if data.scope not in ("user", "global"):
+        raise HTTPException(400, "Invalid scope. Must be one of: user, global")
+    if data.scope == "global" and not current_user.get("is_admin", False):
+        raise HTTPException(403, "Admin access required")
+    if data.task is not None and data.task not in ai_service.MODEL_TASKS:
+        raise HTTPException(400, f"Invalid task. Must be one of: {', '.join(ai_service.MODEL_TASKS)}")
+
+    # Validate the model exists (usually answered from the cached catalog)
+    catalog = await _user_catalog(user_id)
+    if data.model_id not in catalog.ids:
+        raise HTTPException(400, f"Model '{data.model_id}' not found for provider '{catalog.provider}'")
 
-    # Validate the model exists
-    models = await ai_service.fetch_models(provider=provider, api_key=api_key)
-    valid_ids = {m.get("id") for m in models}
-    if data.model_id not in valid_ids:
-        raise HTTPException(400, f"Model '{data.model_id}' not found for provider '{provider}'")
+    if data.scope == "global":
+        await ai_service.set_selected_model(data.model_id)
+    else:
+        await ai_service.set_selected_model(data.model_id, user_id=user_id, task=data.task)
+    return {"model_id": data.model_id, "task": data.task, "scope": data.scope, "status": "selected"}
 
-    await ai_service.set_selected_model(data.model_id)
-    return {"model_id": data.model_id, "status": "selected"}
+
+@router.delete("/select")
+async def clear_model_selection(task: str | None = None, current_user: dict = Depends(get_current_user)):
+    """Clear this user's pick for one task type (or their default), falling back to the next level."""
+    try:
+        await ai_service.set_selected_model(None, user_id=current_user["id"], task=task)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return await ai_service.get_model_selection(current_user["id"])
@@ -1,10 +1,11 @@
 """User profile and preferences API endpoints."""
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from pydantic import BaseModel
 
 from app.auth.dependencies import get_current_user
 from app.services import user_service
 from app.prompts.personalities import list_personalities
+from app.utils import etag
 
 
 router = APIRouter(prefix="/users", tags=["users"])
@@ -37,13 +38,19 @@ class AIConfigTest(BaseModel):
 
 
 @router.get("/me")
-async def get_current_user_profile(current_user: dict = Depends(get_current_user)):
+async def get_current_user_profile(request: Request, response: Response, current_user: dict = Depends(get_current_user)):
     """
     Get current user's profile including coaching style and memories.
 
     Returns:
         User profile with id, email, name, coaching_style, memories, etc.
     """
+    # Auth already loaded the user document — the version check costs no extra read
+    version = current_user.get("updated_at") or current_user.get("created_at")
+    cached = etag.not_modified(request, response, etag.weak_etag("user", current_user["id"], version))
+    if cached is not None:
+        return cached
+
     user = await user_service.get_user(current_user["id"])
     if not user:
         raise HTTPException(404, "User not found")
@@ -1,19 +1,204 @@
+import asyncio
 import json
-import re
 import logging
-from datetime import datetime, timedelta
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 
 import httpx
+from pydantic import BaseModel, ValidationError
 
 from app.config import settings
-from app.models.ai import ProgressEvaluation, CoachingReply
+from app.models.ai import (
+    ProgressEvaluation,
+    CoachingReply,
+    InitialSessionReply,
+    ReviewSessionReply,
+    ProactiveCheckinReply,
+)
+from app.models.coaching import SessionSummary
 from app.prompts import session_summary, goal_analysis, progress_evaluation, review_session, proactive_checkin
+from app.services import model_catalog, model_routing, shared_state
 from app.utils.encryption import decrypt_api_key
+from app.utils.json_extract import extract_json, JSONExtractionError
+from app.utils import metrics, tracing
 from app.models.goal_template import get_template_by_id
 
 logger = logging.getLogger(__name__)
 
-OPENROUTER_BASE = "https://openrouter.ai/api/v1"
+OPENROUTER_BASE = settings.openrouter_base_url
+
+# Per-turn LLM stats for whoever opened a track_llm_usage() block (None = nobody is listening)
+_usage_tracker: ContextVar[dict | None] = ContextVar("llm_usage_tracker", default=None)
+
+
+@contextmanager
+def track_llm_usage():
+    """
+    Collect token usage and call counts for every provider call made inside the block.
+
+    Usage:
+        with ai_service.track_llm_usage() as usage:
+            reply = await ai_service.coaching_reply_ai(...)
+        usage["prompt_tokens"], usage["tool_iterations"], ...
+    """
+    stats = {
+        "llm_calls": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "tool_iterations": 0,
+        "system_prompt_chars": 0,
+    }
+    token = _usage_tracker.set(stats)
+    try:
+        yield stats
+    finally:
+        _usage_tracker.reset(token)
+
+
+# Who an LLM call is billed to: user_id, session_id, task, provider, model
+_usage_attribution: ContextVar[dict] = ContextVar("llm_usage_attribution", default={})
+
+
+@contextmanager
+def attribute_llm_usage(**fields):
+    """
+    Attribute every provider call inside the block (nested blocks add to the outer one).
+
+    Usage:
+        with ai_service.attribute_llm_usage(session_id=session_id):
+            reply = await ai_service.coaching_reply_ai(...)
+    """
+    token = _usage_attribution.set({**_usage_attribution.get(), **fields})
+    try:
+        yield
+    finally:
+        _usage_attribution.reset(token)
+
+
+def _call_attribution(user_id: str | None, provider: str, model: str, task: str | None) -> dict:
+    fields = {"provider": provider, "model": model}
+    if user_id:
+        fields["user_id"] = user_id
+    if task:
+        fields["task"] = task
+    return fields
+
+
+@contextmanager
+def _timed(task: str | None, model: str):
+    """Feed the call's wall time (failures and timeouts included) into the task's latency SLO."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        model_routing.record_latency(task, model, time.perf_counter() - started)
+
+
+def _normalize_usage(usage: dict) -> dict:
+    """
+    Provider usage block → prompt/completion/cached/cache-write token counts.
+    prompt_tokens always includes cached input, whichever provider reported it.
+    """
+    if "input_tokens" in usage:
+        # Anthropic: input_tokens excludes cache reads and writes
+        cached = usage.get("cache_read_input_tokens") or 0
+        cache_write = usage.get("cache_creation_input_tokens") or 0
+        prompt = (usage.get("input_tokens") or 0) + cached + cache_write
+        completion = usage.get("output_tokens") or 0
+    else:
+        # OpenAI-compatible: prompt_tokens includes cached_tokens
+        details = usage.get("prompt_tokens_details") or {}
+        cached = details.get("cached_tokens") or 0
+        cache_write = details.get("cache_write_tokens") or 0
+        prompt = usage.get("prompt_tokens") or 0
+        completion = usage.get("completion_tokens") or 0
+
+    return {
+        "prompt_tokens": prompt,
+        "completion_tokens": completion,
+        "cached_tokens": cached,
+        "cache_write_tokens": cache_write,
+    }
+
+
+def _model_pricing(model: str | None) -> dict | None:
+    """Per-token pricing from CLAUDE_MODELS or the provider catalogs this process holds."""
+    if not model:
+        return None
+    found = model_catalog.find(model)
+    return found.get("pricing") if found else None
+
+
+def _usage_cost(usage: dict, tokens: dict, model: str | None) -> float | None:
+    """Cost in USD, or None when the model's price is unknown."""
+    if isinstance(usage.get("cost"), (int, float)):
+        return float(usage["cost"])  # OpenRouter reports it directly when it can
+
+    pricing = _model_pricing(model)
+    if not pricing:
+        return None
+
+    try:
+        prompt_price = float(pricing.get("prompt") or 0)
+        completion_price = float(pricing.get("completion") or 0)
+        # Cache prices are missing for many models — charge them as regular input
+        cache_read_price = float(pricing.get("input_cache_read") or prompt_price)
+        cache_write_price = float(pricing.get("input_cache_write") or prompt_price)
+    except (TypeError, ValueError):
+        return None
+
+    uncached = tokens["prompt_tokens"] - tokens["cached_tokens"] - tokens["cache_write_tokens"]
+    return (
+        uncached * prompt_price
+        + tokens["cached_tokens"] * cache_read_price
+        + tokens["cache_write_tokens"] * cache_write_price
+        + tokens["completion_tokens"] * completion_price
+    )
+
+
+def _record_usage(data: dict) -> None:
+    """
+    Add a provider response's usage to the active tracker, and schedule the
+    rollup write in the background so it adds no Mongo round trip to the reply.
+    """
+    from app.services import usage_service
+
+    usage = data.get("usage") or {}
+    tokens = _normalize_usage(usage)
+
+    stats = _usage_tracker.get()
+    if stats is not None:
+        stats["llm_calls"] += 1
+        stats["prompt_tokens"] += tokens["prompt_tokens"]
+        stats["completion_tokens"] += tokens["completion_tokens"]
+
+    attribution = _usage_attribution.get()
+    model = attribution.get("model") or data.get("model")
+    cost = _usage_cost(usage, tokens, model)
+    if cost is None and data.get("model") != model:
+        # Requested an alias ("-latest"), price by the id the provider resolved it to
+        cost = _usage_cost(usage, tokens, data.get("model"))
+
+    task = asyncio.create_task(usage_service.record_llm_usage(attribution, model, tokens, cost))
+    _usage_writes.add(task)
+    task.add_done_callback(_usage_write_done)
+
+
+# Strong references to pending rollup writes, so they aren't garbage collected
+_usage_writes: set[asyncio.Task] = set()
+
+
+def _usage_write_done(task: asyncio.Task) -> None:
+    _usage_writes.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Failed to record LLM usage: {task.exception()}")
+
+
+def _record_tool_iteration() -> None:
+    stats = _usage_tracker.get()
+    if stats is not None:
+        stats["tool_iterations"] += 1
 
 
 def _format_questionnaire_responses(responses: dict[str, str], template_id: str) -> str:
@@ -42,50 +227,28 @@ def _format_questionnaire_responses(responses: dict[str, str], template_id: str)
 
     return "\n".join(lines) if lines else "No questionnaire responses provided."
 
-# Cached model list
-_models_cache: list[dict] | None = None
-_models_cache_time: datetime | None = None
-_CACHE_TTL = timedelta(minutes=30)
-
-# Selected model (persisted in DB, falls back to this)
-_selected_model_id: str | None = None
-
-# Claude models (Anthropic doesn't have a public models API)
-CLAUDE_MODELS = [
-    {
-        "id": "claude-3-5-sonnet-20241022",
-        "name": "Claude 3.5 Sonnet",
-        "context_length": 200000,
-        "pricing": {"prompt": "0.003", "completion": "0.015"},
-    },
-    {
-        "id": "claude-3-5-haiku-20241022",
-        "name": "Claude 3.5 Haiku",
-        "context_length": 200000,
-        "pricing": {"prompt": "0.0008", "completion": "0.004"},
-    },
-    {
-        "id": "claude-3-opus-20240229",
-        "name": "Claude 3 Opus",
-        "context_length": 200000,
-        "pricing": {"prompt": "0.015", "completion": "0.075"},
-    },
-    {
-        "id": "claude-3-sonnet-20240229",
-        "name": "Claude 3 Sonnet",
-        "context_length": 200000,
-        "pricing": {"prompt": "0.003", "completion": "0.015"},
-    },
-    {
-        "id": "claude-3-haiku-20240307",
-        "name": "Claude 3 Haiku",
-        "context_length": 200000,
-        "pricing": {"prompt": "0.00025", "completion": "0.00125"},
-    },
-]
-
-
-async def fetch_models(provider: str = "openrouter", api_key: str = None, force: bool = False) -> list[dict]:
+async def get_model_catalog(
+    provider: str = "openrouter", api_key: str = None, base_url: str = None, force: bool = False
+) -> model_catalog.Catalog:
+    """
+    The model catalog for a provider and key (global key and provider base URL if not given).
+    Served stale-while-revalidate; see model_catalog.
+    """
+    # Anthropic has no public models API
+    if provider == "anthropic":
+        return model_catalog.static_catalog("anthropic", model_catalog.CLAUDE_MODELS)
+
+    return await model_catalog.get_catalog(
+        provider,
+        base_url or _get_default_base_url(provider),
+        api_key or settings.openrouter_api_key,
+        force=force,
+    )
+
+
+async def fetch_models(
+    provider: str = "openrouter", api_key: str = None, force: bool = False, base_url: str = None
+) -> list[dict]:
     """
     Fetch available models based on provider.
 
@@ -93,98 +256,106 @@ async def fetch_models(provider: str = "openrouter", api_key: str = None, force:
         provider: AI provider (openrouter, openai, anthropic, custom)
         api_key: API key for the provider (optional, uses global if not provided)
         force: Force refresh cache
+        base_url: Provider base URL (optional, provider default if not provided)
 
     Returns:
         List of model dictionaries
     """
-    global _models_cache, _models_cache_time
+    return (await get_model_catalog(provider, api_key, base_url, force)).models
 
-    # For Anthropic, return hardcoded list (no public models API)
-    if provider == "anthropic":
-        return CLAUDE_MODELS
 
-    # For OpenRouter and OpenAI, use cache
-    if (
-        not force
-        and _models_cache is not None
-        and _models_cache_time is not None
-        and datetime.utcnow() - _models_cache_time < _CACHE_TTL
-    ):
-        return _models_cache
+# Task types a user can pick a model for, and the call sites (usage "task") each covers
+MODEL_TASKS = {
+    "chat": ("chat", "initial_session", "review", "reask"),
+    "summary": ("summary",),
+    "proactive": ("proactive",),
+    "goal_analysis": ("goal_analysis", "progress_evaluation"),
+}
+_TASK_TO_MODEL_TASK = {site: task for task, sites in MODEL_TASKS.items() for site in sites}
 
-    # Determine API key to use
-    if not api_key:
-        if provider == "openai":
-            api_key = settings.openrouter_api_key  # Will need separate OPENAI_API_KEY in future
-        else:
-            api_key = settings.openrouter_api_key
 
-    headers = {}
-    if api_key:
-        headers["Authorization"] = f"Bearer {api_key}"
+def _model_selection_key(user_id: str) -> str:
+    return f"model_selection:{user_id}"
+
+
+async def get_selected_model(user_id: str | None = None, task: str | None = None) -> str | None:
+    """
+    Model for a call: the user's pick for this task type, else the user's
+    default, else the global model. Per-user picks are shared settings, so
+    they're served from memory and invalidated like the rest.
+    """
+    model, _ = await _selected_model_for(user_id, task)
+    return model
+
+
+async def _selected_model_for(user_id: str | None, task: str | None) -> tuple[str | None, bool]:
+    """(model, pinned) — pinned when the user picked this model for the task type itself."""
+    if user_id:
+        selection = await shared_state.get_setting(_model_selection_key(user_id), {})
+        model_task = _TASK_TO_MODEL_TASK.get(task or _usage_attribution.get().get("task"), "chat")
+        if selection.get(model_task):
+            return selection[model_task], True
+        if selection.get("default"):
+            return selection["default"], False
+    return await shared_state.get_setting("selected_model"), False
+
+
+async def get_model_selection(user_id: str) -> dict:
+    """The user's picks per task type ("default" applies to unpicked tasks) and the global fallback."""
+    selection = await shared_state.get_setting(_model_selection_key(user_id), {})
+    return {
+        "default": selection.get("default"),
+        **{task: selection.get(task) for task in MODEL_TASKS},
+        "global": await shared_state.get_setting("selected_model"),
+    }
 
-    # Determine endpoint
-    if provider == "openai":
-        base_url = "https://api.openai.com/v1"
+
+async def set_selected_model(model_id: str | None, user_id: str | None = None, task: str | None = None) -> None:
+    """
+    Pick a model. Without user_id this sets the global fallback. With user_id it
+    sets that user's default, or their model for one task type; None clears it.
+    """
+    if not user_id:
+        await shared_state.set_setting("selected_model", model_id)
+        return
+
+    if task is not None and task not in MODEL_TASKS:
+        raise ValueError(f"Invalid task. Must be one of: {', '.join(MODEL_TASKS)}")
+
+    key = _model_selection_key(user_id)
+    selection = dict(await shared_state.get_setting(key, {}))
+    if model_id:
+        selection[task or "default"] = model_id
     else:
-        base_url = OPENROUTER_BASE
+        selection.pop(task or "default", None)
+    await shared_state.set_setting(key, selection)
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        response = await client.get(
-            f"{base_url}/models",
-            headers=headers,
-        )
-        logger.info(f"{provider} /models response: {response.status_code}")
-        response.raise_for_status()
-        data = response.json()
 
-    models = data.get("data", [])
-    _models_cache = models
-    _models_cache_time = datetime.utcnow()
-    return models
-
-
-async def get_selected_model() -> str | None:
-    """Get the currently selected model ID."""
-    global _selected_model_id
-    if _selected_model_id:
-        return _selected_model_id
-
-    # Try loading from DB
-    from app.database import get_db
-    db = get_db()
-    if db is not None:
-        doc = await db.settings.find_one({"key": "selected_model"})
-        if doc:
-            _selected_model_id = doc["value"]
-            return _selected_model_id
-
-    return None
-
-
-async def set_selected_model(model_id: str) -> None:
-    """Set the model to use for AI calls. Persisted in DB."""
-    global _selected_model_id
-    _selected_model_id = model_id
-
-    from app.database import get_db
-    db = get_db()
-    if db is not None:
-        await db.settings.update_one(
-            {"key": "selected_model"},
-            {"$set": {"key": "selected_model", "value": model_id}},
-            upsert=True,
-        )
+def prompt_encoding_for(model: str | None) -> str:
+    """
+    Data picture encoding for a model: "compact" if its id matches
+    COMPACT_PROMPT_MODELS (prefixes, with or without the "vendor/" part), else "blocks".
+    """
+    patterns = [p.strip() for p in settings.compact_prompt_models.split(",") if p.strip()]
+    if not model or not patterns:
+        return "blocks"
+    if "*" in patterns:
+        return "compact"
+
+    bare = model.split("/", 1)[-1]
+    if any(model.startswith(p) or bare.startswith(p) for p in patterns):
+        return "compact"
+    return "blocks"
 
 
 def _get_default_base_url(provider: str) -> str:
     """Get default base URL for a provider."""
     urls = {
-        "openrouter": "https://openrouter.ai/api/v1",
+        "openrouter": OPENROUTER_BASE,
         "openai": "https://api.openai.com/v1",
         "anthropic": "https://api.anthropic.com/v1",
     }
-    return urls.get(provider, "https://openrouter.ai/api/v1")
+    return urls.get(provider, OPENROUTER_BASE)
 
 
 async def get_user_ai_config(user_id: str) -> dict:
@@ -217,27 +388,85 @@ async def get_user_ai_config(user_id: str) -> dict:
     }
 
 
-async def _call_anthropic(system_prompt: str, user_prompt: str, model: str, api_key: str) -> str:
-    """Call Anthropic's Messages API (Claude)."""
+# (base_url, model) pairs whose endpoint rejected response_format — don't send it again
+_structured_output_unsupported: set[tuple[str, str]] = set()
+
+# Fields we fill in server-side, never asked of the model
+_SERVER_SIDE_FIELDS = {"tool_calls"}
+
+
+def _response_schema(model_cls: type[BaseModel]) -> dict:
+    """
+    JSON schema for a reply model, in the strict subset providers accept:
+    every property required, no extra properties, no defaults or titles.
+    """
+    schema = model_cls.model_json_schema()
+    properties = {
+        name: {k: v for k, v in prop.items() if k not in ("default", "title")}
+        for name, prop in schema.get("properties", {}).items()
+        if name not in _SERVER_SIDE_FIELDS
+    }
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+def _anthropic_reply_tool(response_model: type[BaseModel]) -> dict:
+    """Tool definition Anthropic is forced to call to return a structured reply."""
+    return {
+        "name": response_model.__name__,
+        "description": "Return your reply. Always call this tool exactly once with your full response.",
+        "input_schema": _response_schema(response_model),
+    }
+
+
+async def _call_anthropic(
+    system_prompt: str,
+    user_prompt: str,
+    model: str,
+    api_key: str,
+    response_model: type[BaseModel] = None,
+    base_url: str = "https://api.anthropic.com/v1",
+    max_tokens: int = 4096,
+    temperature: float = 0.7,
+    timeout: float = 60.0,
+) -> str:
+    """
+    Call Anthropic's Messages API (Claude).
+
+    With response_model set, the reply is forced through a single tool whose
+    input_schema is the model's schema, and the tool input is returned as JSON.
+    """
     headers = {
         "x-api-key": api_key,
         "anthropic-version": "2023-06-01",
         "Content-Type": "application/json",
     }
 
-    async with httpx.AsyncClient(timeout=60.0) as client:
+    payload = {
+        "model": model,
+        "max_tokens": max_tokens,
+        "system": system_prompt,
+        "messages": [
+            {"role": "user", "content": user_prompt},
+        ],
+        "temperature": temperature,
+    }
+    if response_model and settings.structured_output_enabled:
+        reply_tool = _anthropic_reply_tool(response_model)
+        payload["tools"] = [reply_tool]
+        payload["tool_choice"] = {"type": "tool", "name": reply_tool["name"]}
+
+    async with httpx.AsyncClient(
+        timeout=timeout, event_hooks=tracing.httpx_event_hooks(), transport=metrics.LLMMetricsTransport()
+    ) as client:
         response = await client.post(
-            "https://api.anthropic.com/v1/messages",
+            f"{base_url}/messages",
             headers=headers,
-            json={
-                "model": model,
-                "max_tokens": 4096,
-                "system": system_prompt,
-                "messages": [
-                    {"role": "user", "content": user_prompt},
-                ],
-                "temperature": 0.7,
-            },
+            json=payload,
         )
         try:
             response.raise_for_status()
@@ -251,8 +480,13 @@ async def _call_anthropic(system_prompt: str, user_prompt: str, model: str, api_
                 raise RuntimeError(f"Anthropic API error: {e.response.status_code}")
 
         data = response.json()
+        _record_usage(data)
 
-    content = data["content"][0]["text"]
+    tool_use = next((b for b in data["content"] if b.get("type") == "tool_use"), None)
+    if tool_use:
+        content = json.dumps(tool_use["input"])
+    else:
+        content = "".join(b.get("text", "") for b in data["content"] if b.get("type") == "text")
     logger.info(f"Anthropic Raw Response: {content!r}")
     return content
 
@@ -263,9 +497,18 @@ async def _call_openai_compatible(
     model: str,
     api_key: str,
     base_url: str,
-    organization_id: str = None
+    organization_id: str = None,
+    response_model: type[BaseModel] = None,
+    max_tokens: int = 4096,
+    temperature: float = 0.7,
+    timeout: float = 60.0,
 ) -> str:
-    """Call OpenAI-compatible API (OpenAI, OpenRouter, or custom)."""
+    """
+    Call OpenAI-compatible API (OpenAI, OpenRouter, or custom).
+
+    With response_model set, asks for json_schema structured output. Endpoints
+    that reject response_format are remembered and called without it.
+    """
     headers = {
         "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json",
@@ -275,19 +518,23 @@ async def _call_openai_compatible(
     if organization_id:
         headers["OpenAI-Organization"] = organization_id
 
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        response = await client.post(
-            f"{base_url}/chat/completions",
-            headers=headers,
-            json={
-                "model": model,
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
-                "temperature": 0.7,
-            },
-        )
+    payload = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ],
+        "temperature": temperature,
+        _max_tokens_field(base_url): max_tokens,
+    }
+    response_format = _openai_response_format(response_model, base_url, model)
+    if response_format:
+        payload["response_format"] = response_format
+
+    async with httpx.AsyncClient(
+        timeout=timeout, event_hooks=tracing.httpx_event_hooks(), transport=metrics.LLMMetricsTransport()
+    ) as client:
+        response = await _post_chat_completion(client, base_url, headers, payload, model)
         try:
             response.raise_for_status()
         except httpx.HTTPStatusError as e:
@@ -300,12 +547,59 @@ async def _call_openai_compatible(
                 raise RuntimeError(f"AI Provider error: {e.response.status_code}")
 
         data = response.json()
+        _record_usage(data)
 
     content = data["choices"][0]["message"]["content"]
     logger.info(f"AI Raw Response: {content!r}")
     return content
 
 
+def _max_tokens_field(base_url: str) -> str:
+    # OpenAI's own API wants max_completion_tokens (reasoning models reject max_tokens)
+    return "max_completion_tokens" if base_url.startswith("https://api.openai.com") else "max_tokens"
+
+
+async def _post_chat_completion(
+    client: httpx.AsyncClient, base_url: str, headers: dict, payload: dict, model: str
+) -> httpx.Response:
+    """
+    POST /chat/completions. If the endpoint rejects the payload's response_format,
+    remember that for (base_url, model) and retry once without it (prompt-only JSON).
+    Other 400s (prompt too long, a bad parameter) are returned as they are.
+    """
+    response = await client.post(f"{base_url}/chat/completions", headers=headers, json=payload)
+    if response.status_code == 400 and "response_format" in payload and _rejects_response_format(response):
+        logger.warning(f"{base_url} rejected response_format for {model}, retrying without it")
+        _structured_output_unsupported.add((base_url, model))
+        payload.pop("response_format")
+        response = await client.post(f"{base_url}/chat/completions", headers=headers, json=payload)
+    return response
+
+
+def _rejects_response_format(response: httpx.Response) -> bool:
+    """Whether a 400 is about structured output rather than the rest of the request."""
+    body = response.text.lower()
+    return any(marker in body for marker in ("response_format", "json_schema", "structured output"))
+
+
+def _openai_response_format(response_model: type[BaseModel] | None, base_url: str, model: str) -> dict | None:
+    """response_format payload for an OpenAI-compatible call, or None if not applicable."""
+    if (
+        not response_model
+        or not settings.structured_output_enabled
+        or (base_url, model) in _structured_output_unsupported
+    ):
+        return None
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": response_model.__name__,
+            "strict": True,
+            "schema": _response_schema(response_model),
+        },
+    }
+
+
 async def _call_with_tools(
     system_prompt: str,
     user_prompt: str,
@@ -313,23 +607,29 @@ async def _call_with_tools(
     goal_id: str = None,
     tools: list[dict] = None,
     max_tool_iterations: int = 5,
-    skip_personality_injection: bool = False
+    skip_personality_injection: bool = False,
+    response_model: type[BaseModel] = None,
+    task: str = None,
 ) -> tuple[str, list[dict]]:
     """
     Call AI with tool/function calling support.
     The AI can request data on-demand instead of receiving everything upfront.
 
+    Tools are defined once in OpenAI function format (ai_tools.AVAILABLE_TOOLS)
+    and translated for Anthropic, which runs its own tool_use/tool_result loop.
+
     Args:
         skip_personality_injection: Set True if system_prompt already includes personality
             (e.g., from prompt_builder). Prevents double-injection.
+        response_model: Reply model to request as structured output for the final answer
+        task: Call site name for usage accounting
 
     Returns:
         tuple[str, list[dict]]: (final_response, tool_calls_made)
             tool_calls_made is a list of {name, description} dicts for UI display
     """
-    from app.services import ai_tools
-
-    model = await get_selected_model()
+    task = task or _usage_attribution.get().get("task")
+    model, pinned = await _selected_model_for(user_id, task)
     if not model:
         raise RuntimeError("No model selected")
 
@@ -356,6 +656,88 @@ async def _call_with_tools(
         personality_prompt = personalities.get_personality_prompt(coaching_style)
         system_prompt = f"{personality_prompt}\n\n{system_prompt}"
 
+    if ai_config.get("provider") == "anthropic":
+        loop = _anthropic_tool_loop
+    else:
+        loop = _openai_tool_loop
+
+    provider = ai_config.get("provider", "openrouter")
+    plan = model_routing.resolve(task, model, provider, pinned)
+    model = plan["model"]
+
+    with attribute_llm_usage(**_call_attribution(user_id, provider, model, task)), \
+            tracing.span("llm.tool_loop", **{"llm.provider": provider, "llm.model": model,
+                                             "llm.route": plan["route"]}) as loop_span, \
+            _timed(task, model):
+        content, tool_calls_made = await loop(
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            model=model,
+            ai_config=ai_config,
+            user_id=user_id,
+            goal_id=goal_id,
+            tools=tools or [],
+            max_tool_iterations=max_tool_iterations,
+            response_model=response_model,
+            max_tokens=plan["max_tokens"],
+            temperature=plan["temperature"],
+            timeout=plan["timeout_s"],
+        )
+        loop_span.set_attribute("llm.tool_calls", len(tool_calls_made))
+
+    return content, tool_calls_made
+
+
+async def _execute_tool_call(
+    function_name: str,
+    arguments: dict,
+    tools: list[dict],
+    user_id: str,
+    goal_id: str,
+    tool_calls_made: list[dict],
+) -> str:
+    """Run one tool the AI asked for and record it for UI display. Provider-agnostic."""
+    from app.services import ai_tools
+
+    logger.info(f"Executing tool: {function_name} with args: {arguments}")
+
+    # Get human-readable description for UI
+    tool_def = next((t for t in tools if t["function"]["name"] == function_name), None)
+    description = tool_def["function"]["description"] if tool_def else f"Requesting {function_name}"
+
+    # Track tool call for UI display
+    tool_calls_made.append({
+        "name": function_name,
+        "description": description,
+        "arguments": arguments,
+    })
+
+    # Inject user_id and goal_id if needed and not provided
+    if "user_id" in arguments and not arguments["user_id"]:
+        arguments["user_id"] = user_id
+    if "goal_id" in arguments and not arguments["goal_id"]:
+        arguments["goal_id"] = goal_id
+
+    metrics.TOOL_CALLS.labels(function_name).inc()
+    with tracing.span(f"tool {function_name}", **{"tool.name": function_name}):
+        return await ai_tools.execute_tool(function_name, arguments)
+
+
+async def _openai_tool_loop(
+    system_prompt: str,
+    user_prompt: str,
+    model: str,
+    ai_config: dict,
+    user_id: str,
+    goal_id: str,
+    tools: list[dict],
+    max_tool_iterations: int,
+    response_model: type[BaseModel] = None,
+    max_tokens: int = 4096,
+    temperature: float = 0.7,
+    timeout: float = 60.0,
+) -> tuple[str, list[dict]]:
+    """Chat Completions tool loop (OpenAI, OpenRouter, custom)."""
     # Build messages list
     messages = [
         {"role": "system", "content": system_prompt},
@@ -365,32 +747,33 @@ async def _call_with_tools(
     # Track tool calls for UI display
     tool_calls_made = []
 
+    headers = {
+        "Authorization": f"Bearer {ai_config['api_key']}",
+        "Content-Type": "application/json",
+    }
+    if ai_config.get("organization_id"):
+        headers["OpenAI-Organization"] = ai_config["organization_id"]
+
     # Tool calling loop
     for iteration in range(max_tool_iterations):
-        headers = {
-            "Authorization": f"Bearer {ai_config['api_key']}",
-            "Content-Type": "application/json",
-        }
-
-        if ai_config.get("organization_id"):
-            headers["OpenAI-Organization"] = ai_config["organization_id"]
-
         payload = {
             "model": model,
             "messages": messages,
-            "temperature": 0.7,
+            "temperature": temperature,
+            _max_tokens_field(ai_config["base_url"]): max_tokens,
         }
 
-        # Add tools if provided (only for OpenAI-compatible APIs)
-        if tools and ai_config.get("provider") != "anthropic":
+        if tools:
             payload["tools"] = tools
 
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                f"{ai_config['base_url']}/chat/completions",
-                headers=headers,
-                json=payload,
-            )
+        response_format = _openai_response_format(response_model, ai_config["base_url"], model)
+        if response_format:
+            payload["response_format"] = response_format
+
+        async with httpx.AsyncClient(
+            timeout=timeout, event_hooks=tracing.httpx_event_hooks(), transport=metrics.LLMMetricsTransport()
+        ) as client:
+            response = await _post_chat_completion(client, ai_config["base_url"], headers, payload, model)
 
             try:
                 response.raise_for_status()
@@ -399,75 +782,180 @@ async def _call_with_tools(
                 raise RuntimeError(f"AI Provider error: {e.response.status_code}")
 
             data = response.json()
+            _record_usage(data)
 
         message = data["choices"][0]["message"]
 
-        # Check if AI wants to call tools
-        if message.get("tool_calls"):
-            logger.info(f"AI requested {len(message['tool_calls'])} tool calls")
-
-            # Add assistant message to history
-            messages.append(message)
-
-            # Execute each tool call
-            for tool_call in message["tool_calls"]:
-                function_name = tool_call["function"]["name"]
-                arguments = json.loads(tool_call["function"]["arguments"])
-
-                logger.info(f"Executing tool: {function_name} with args: {arguments}")
-
-                # Get human-readable description for UI
-                tool_def = next((t for t in (tools or []) if t["function"]["name"] == function_name), None)
-                description = tool_def["function"]["description"] if tool_def else f"Requesting {function_name}"
-
-                # Track tool call for UI display
-                tool_calls_made.append({
-                    "name": function_name,
-                    "description": description,
-                    "arguments": arguments,
-                })
-
-                # Inject user_id and goal_id if needed and not provided
-                if "user_id" in arguments and not arguments["user_id"]:
-                    arguments["user_id"] = user_id
-                if "goal_id" in arguments and not arguments["goal_id"]:
-                    arguments["goal_id"] = goal_id
-
-                # Execute the tool
-                result = await ai_tools.execute_tool(function_name, arguments)
-
-                # Add tool result to messages
-                messages.append({
-                    "role": "tool",
-                    "tool_call_id": tool_call["id"],
-                    "name": function_name,
-                    "content": result,
-                })
-
-            # Continue loop to get AI's next response
-            continue
-
-        else:
-            # AI didn't call any tools, return the content
-            content = message.get("content", "")
+        # AI didn't call any tools, return the content
+        if not message.get("tool_calls"):
+            content = message.get("content") or ""
             logger.info(f"AI Final Response: {content!r}")
+            return content, tool_calls_made
 
-            # Strip markdown code fences if present
-            content = content.strip()
-            match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', content)
-            if match:
-                content = match.group(1).strip()
+        logger.info(f"AI requested {len(message['tool_calls'])} tool calls")
+        _record_tool_iteration()
 
-            return content, tool_calls_made
+        # Add assistant message to history
+        messages.append(message)
+
+        # Execute each tool call
+        for tool_call in message["tool_calls"]:
+            function_name = tool_call["function"]["name"]
+            arguments = json.loads(tool_call["function"]["arguments"] or "{}")
+            result = await _execute_tool_call(
+                function_name, arguments, tools, user_id, goal_id, tool_calls_made
+            )
+
+            # Add tool result to messages
+            messages.append({
+                "role": "tool",
+                "tool_call_id": tool_call["id"],
+                "name": function_name,
+                "content": result,
+            })
 
     # If we hit max iterations, return the last message
     logger.warning(f"Hit max tool iterations ({max_tool_iterations})")
     return messages[-1].get("content", ""), tool_calls_made
 
 
-async def _call_openrouter(system_prompt: str, user_prompt: str, user_id: str = None) -> str:
-    """Call AI provider with user-specific or global configuration."""
-    model = await get_selected_model()
+def _to_anthropic_tools(tools: list[dict]) -> list[dict]:
+    """Translate OpenAI function definitions into Anthropic tool definitions."""
+    return [
+        {
+            "name": t["function"]["name"],
+            "description": t["function"].get("description", ""),
+            "input_schema": t["function"].get("parameters", {"type": "object", "properties": {}}),
+        }
+        for t in tools
+    ]
+
+
+async def _anthropic_tool_loop(
+    system_prompt: str,
+    user_prompt: str,
+    model: str,
+    ai_config: dict,
+    user_id: str,
+    goal_id: str,
+    tools: list[dict],
+    max_tool_iterations: int,
+    response_model: type[BaseModel] = None,
+    max_tokens: int = 4096,
+    temperature: float = 0.7,
+    timeout: float = 60.0,
+) -> tuple[str, list[dict]]:
+    """
+    Messages API tool loop (Anthropic).
+
+    tool_use blocks are executed and answered with tool_result blocks in the
+    next user turn. With response_model set, a reply tool is added and the
+    model must call some tool every turn, so the loop ends exactly when it
+    calls the reply tool.
+    """
+    messages = [{"role": "user", "content": user_prompt}]
+    tool_calls_made = []
+
+    anthropic_tools = _to_anthropic_tools(tools)
+    reply_tool_name = None
+    if response_model and settings.structured_output_enabled:
+        reply_tool = _anthropic_reply_tool(response_model)
+        reply_tool_name = reply_tool["name"]
+        anthropic_tools.append(reply_tool)
+
+    headers = {
+        "x-api-key": ai_config["api_key"],
+        "anthropic-version": "2023-06-01",
+        "Content-Type": "application/json",
+    }
+    base_url = ai_config.get("base_url") or _get_default_base_url("anthropic")
+
+    last_text = ""
+    for iteration in range(max_tool_iterations):
+        payload = {
+            "model": model,
+            "max_tokens": max_tokens,
+            "system": system_prompt,
+            "messages": messages,
+            "temperature": temperature,
+        }
+        if anthropic_tools:
+            payload["tools"] = anthropic_tools
+            payload["tool_choice"] = {"type": "any"} if reply_tool_name else {"type": "auto"}
+
+        async with httpx.AsyncClient(
+            timeout=timeout, event_hooks=tracing.httpx_event_hooks(), transport=metrics.LLMMetricsTransport()
+        ) as client:
+            response = await client.post(
+                f"{base_url}/messages",
+                headers=headers,
+                json=payload,
+            )
+            try:
+                response.raise_for_status()
+            except httpx.HTTPStatusError as e:
+                logger.error(f"Anthropic API error: {e.response.text}")
+                if e.response.status_code == 401:
+                    raise RuntimeError("Invalid Anthropic API key. Please check your settings.")
+                elif e.response.status_code == 429:
+                    raise RuntimeError("Anthropic rate limit exceeded. Please try again later.")
+                else:
+                    raise RuntimeError(f"Anthropic API error: {e.response.status_code}")
+
+            data = response.json()
+            _record_usage(data)
+
+        blocks = data.get("content", [])
+        last_text = "".join(b.get("text", "") for b in blocks if b.get("type") == "text") or last_text
+        tool_uses = [b for b in blocks if b.get("type") == "tool_use"]
+
+        reply = next((b for b in tool_uses if b["name"] == reply_tool_name), None)
+        if reply:
+            content = json.dumps(reply["input"])
+            logger.info(f"Anthropic Final Response: {content!r}")
+            return content, tool_calls_made
+
+        if not tool_uses:
+            logger.info(f"Anthropic Final Response: {last_text!r}")
+            return last_text, tool_calls_made
+
+        logger.info(f"Anthropic requested {len(tool_uses)} tool calls")
+        _record_tool_iteration()
+        messages.append({"role": "assistant", "content": blocks})
+
+        tool_results = []
+        for tool_use in tool_uses:
+            result = await _execute_tool_call(
+                tool_use["name"], dict(tool_use.get("input") or {}), tools, user_id, goal_id, tool_calls_made
+            )
+            tool_results.append({
+                "type": "tool_result",
+                "tool_use_id": tool_use["id"],
+                "content": result,
+            })
+        messages.append({"role": "user", "content": tool_results})
+
+    logger.warning(f"Hit max tool iterations ({max_tool_iterations})")
+    return last_text, tool_calls_made
+
+
+async def _call_openrouter(
+    system_prompt: str,
+    user_prompt: str,
+    user_id: str = None,
+    skip_personality_injection: bool = False,
+    response_model: type[BaseModel] = None,
+    task: str = None,
+) -> str:
+    """
+    Call AI provider with user-specific or global configuration.
+
+    response_model requests native structured output where the provider
+    supports it; the prompt's own JSON instructions remain the fallback.
+    task names the call site in usage accounting (inherited from the caller if None).
+    """
+    task = task or _usage_attribution.get().get("task")
+    model, pinned = await _selected_model_for(user_id, task)
     if not model:
         raise RuntimeError(
             "No model selected. Use GET /models to list available models "
@@ -490,7 +978,7 @@ async def _call_openrouter(system_prompt: str, user_prompt: str, user_id: str =
         )
 
     # Add coaching personality to system prompt
-    if user_id:
+    if user_id and not skip_personality_injection:
         from app.services import user_service
         from app.prompts import personalities
 
@@ -503,33 +991,134 @@ async def _call_openrouter(system_prompt: str, user_prompt: str, user_id: str =
 
     # Route to appropriate API based on provider
     provider = ai_config.get("provider", "openrouter")
+    plan = model_routing.resolve(task, model, provider, pinned)
+    model = plan["model"]
+    limits = {"max_tokens": plan["max_tokens"], "temperature": plan["temperature"], "timeout": plan["timeout_s"]}
+
+    with attribute_llm_usage(**_call_attribution(user_id, provider, model, task)), \
+            tracing.span("llm.call", **{"llm.provider": provider, "llm.model": model, "llm.route": plan["route"]}), \
+            _timed(task, model):
+        if provider == "anthropic":
+            content = await _call_anthropic(
+                system_prompt=system_prompt,
+                user_prompt=user_prompt,
+                model=model,
+                api_key=ai_config["api_key"],
+                response_model=response_model,
+                base_url=ai_config.get("base_url") or _get_default_base_url("anthropic"),
+                **limits,
+            )
+        else:
+            # OpenAI, OpenRouter, or custom provider (all use OpenAI-compatible format)
+            content = await _call_openai_compatible(
+                system_prompt=system_prompt,
+                user_prompt=user_prompt,
+                model=model,
+                api_key=ai_config["api_key"],
+                base_url=ai_config["base_url"],
+                organization_id=ai_config.get("organization_id"),
+                response_model=response_model,
+                **limits,
+            )
 
-    if provider == "anthropic":
-        content = await _call_anthropic(
-            system_prompt=system_prompt,
-            user_prompt=user_prompt,
-            model=model,
-            api_key=ai_config["api_key"]
-        )
-    else:
-        # OpenAI, OpenRouter, or custom provider (all use OpenAI-compatible format)
-        content = await _call_openai_compatible(
-            system_prompt=system_prompt,
-            user_prompt=user_prompt,
-            model=model,
-            api_key=ai_config["api_key"],
-            base_url=ai_config["base_url"],
-            organization_id=ai_config.get("organization_id")
-        )
+    return content
 
-    # Strip markdown code fences if present
-    content = content.strip()
-    # Remove ```json ... ``` or just ``` ... ```
-    match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', content)
-    if match:
-        content = match.group(1).strip()
 
-    return content
+# Keys models use instead of the one the prompt asked for
+_FIELD_ALIASES = {
+    "message": ("response", "reply", "text", "content", "coaching_message"),
+    "coaching_message": ("message", "response", "reply", "text", "content"),
+}
+
+
+def _repair_reply_fields(data: dict, model_cls: type[BaseModel], raw: str, defaults: dict | None) -> dict:
+    """Cheap local fixes before we consider asking the model again."""
+    data = dict(data)
+    fields = model_cls.model_fields
+
+    for name, aliases in _FIELD_ALIASES.items():
+        if name not in fields or isinstance(data.get(name), str):
+            continue
+        alias = next((a for a in aliases if isinstance(data.get(a), str)), None)
+        if alias:
+            data[name] = data[alias]
+        elif not data and raw.strip() and raw.lstrip()[0] not in "{[`":
+            # Plain prose reply — the model skipped the JSON wrapper, the text *is* the message
+            data[name] = raw.strip()
+
+    for name, value in (defaults or {}).items():
+        if data.get(name) is None:
+            data[name] = value
+
+    return data
+
+
+async def _reask_missing_fields(
+    raw: str, model_cls: type[BaseModel], missing: list[str], user_id: str = None
+) -> dict:
+    """Ask the model for only the fields that didn't survive parsing."""
+    properties = model_cls.model_json_schema().get("properties", {})
+    wanted = {name: properties[name] for name in missing if name in properties}
+
+    system_prompt = "You repair malformed JSON replies. Respond with ONLY a JSON object. No prose."
+    user_prompt = f"""This reply should have been a JSON object, but these fields are missing or invalid: {", ".join(wanted)}
+
+Reply:
+{raw[:4000]}
+
+Respond with ONLY a JSON object containing exactly these fields, taken from the reply above wherever possible:
+{json.dumps(wanted, indent=2)}"""
+
+    patch_raw = await _call_openrouter(
+        system_prompt, user_prompt, user_id=user_id, skip_personality_injection=True, task="reask"
+    )
+    patch = extract_json(patch_raw)
+    if not isinstance(patch, dict):
+        return {}
+    return {k: v for k, v in patch.items() if k in wanted}
+
+
+async def _parse_ai_reply(
+    raw: str,
+    model_cls: type[BaseModel],
+    user_id: str = None,
+    defaults: dict | None = None,
+    reask: bool = True,
+) -> BaseModel:
+    """
+    Parse a raw model response into model_cls.
+
+    Extraction tolerates code fences, surrounding prose and truncated output.
+    If fields are still missing after a local repair pass, the model is asked
+    for only those fields — never a full regeneration of the reply.
+
+    Raises:
+        ValueError: If the response can't be turned into a valid model_cls
+    """
+    try:
+        data = extract_json(raw)
+    except JSONExtractionError:
+        data = {}
+    if not isinstance(data, dict):
+        data = {}
+
+    data = _repair_reply_fields(data, model_cls, raw or "", defaults)
+    if not data:
+        # Nothing recovered — don't let an all-defaults model pass as a real reply
+        if not reask:
+            raise ValueError("No JSON object found in AI response")
+        missing = list(model_cls.model_fields)
+    else:
+        try:
+            return model_cls(**data)
+        except ValidationError as e:
+            if not reask:
+                raise
+            missing = sorted({str(err["loc"][0]) for err in e.errors() if err["loc"]})
+    logger.warning(f"{model_cls.__name__} response missing {missing}, re-asking for those fields")
+
+    patch = await _reask_missing_fields(raw, model_cls, missing, user_id=user_id)
+    return model_cls(**{**data, **patch})
 
 
 async def goal_setup_opening(
@@ -558,11 +1147,13 @@ async def goal_setup_opening(
         target_date=target_date if target_date else "Not set",
         questionnaire_context=questionnaire_context,
     )
-    raw = await _call_openrouter(goal_analysis.SYSTEM_PROMPT, user_prompt, user_id=user_id)
+    raw = await _call_openrouter(
+        goal_analysis.SYSTEM_PROMPT, user_prompt, user_id=user_id, response_model=CoachingReply,
+        task="goal_analysis",
+    )
     try:
-        data = json.loads(raw)
-        return CoachingReply(**data)
-    except (json.JSONDecodeError, ValueError) as e:
+        return await _parse_ai_reply(raw, CoachingReply, user_id=user_id)
+    except ValueError as e:
         logger.error(f"Failed to parse AI response: {e}")
         raise RuntimeError("Failed to process AI response. Please try again.")
 
@@ -586,11 +1177,13 @@ async def evaluate_progress(
         habits_summary=habits_summary,
         tracker_summary=tracker_summary,
     )
-    raw = await _call_openrouter(progress_evaluation.SYSTEM_PROMPT, user_prompt, user_id=user_id)
+    raw = await _call_openrouter(
+        progress_evaluation.SYSTEM_PROMPT, user_prompt, user_id=user_id, response_model=ProgressEvaluation,
+        task="progress_evaluation",
+    )
     try:
-        data = json.loads(raw)
-        return ProgressEvaluation(**data)
-    except (json.JSONDecodeError, ValueError) as e:
+        return await _parse_ai_reply(raw, ProgressEvaluation, user_id=user_id)
+    except ValueError as e:
         logger.error(f"Failed to parse AI response: {e}")
         raise RuntimeError("Failed to process AI evaluation. Please try again.")
 
@@ -605,6 +1198,7 @@ async def coaching_reply_ai(
     user_message: str,
     upcoming_checkins: list[dict] = None,
     use_tools: bool = True,
+    strategy: str = "eager",
 ) -> CoachingReply:
     """
     Generate AI coaching reply using Prompt #2 (Coaching System Prompt Builder).
@@ -620,19 +1214,32 @@ async def coaching_reply_ai(
         user_message: User's latest message
         upcoming_checkins: Optional list of upcoming check-ins
         use_tools: If True, AI can request data on-demand
+        strategy: Context strategy (eager | lazy | hybrid) — how much data is preloaded
     """
-    from app.services import ai_tools
+    from app.services import ai_tools, context_strategy
     from app.prompts import prompt_builder
 
-    # Build dynamic system prompt with full context (per integration guide)
-    system_prompt = await prompt_builder.build_coaching_system_prompt(
-        user=user,
-        goal=goal,
-        habits=habits,
-        trackers=trackers,
-        today_logs=today_logs,
-        upcoming_checkins=upcoming_checkins or []
-    )
+    plan = context_strategy.STRATEGIES.get(strategy, context_strategy.STRATEGIES["eager"])
+    use_tools = use_tools and plan["use_tools"]
+    encoding = prompt_encoding_for(await get_selected_model(user["id"], "chat"))
+
+    # Build dynamic system prompt (per integration guide) with the strategy's data picture
+    with tracing.span("coaching.build_prompt", data_picture=plan["data_picture"], encoding=encoding) as prompt_span:
+        system_prompt = await prompt_builder.build_coaching_system_prompt(
+            user=user,
+            goal=goal,
+            habits=habits,
+            trackers=trackers,
+            today_logs=today_logs,
+            upcoming_checkins=upcoming_checkins or [],
+            data_picture=plan["data_picture"],
+            encoding=encoding,
+        )
+        prompt_span.set_attribute("prompt.chars", len(system_prompt))
+
+    stats = _usage_tracker.get()
+    if stats is not None:
+        stats["system_prompt_chars"] += len(system_prompt)
 
     # Simple user prompt with just history and current message
     user_prompt = f"""Chat History:
@@ -657,22 +1264,27 @@ Respond with ONLY valid JSON:
             user_id=user_id,
             goal_id=goal_id,
             tools=ai_tools.AVAILABLE_TOOLS,
-            skip_personality_injection=True  # Prompt builder already includes personality
+            skip_personality_injection=True,  # Prompt builder already includes personality
+            response_model=CoachingReply,
+            task="chat",
         )
     else:
         # Fall back to simple call without tools
         # Note: _call_openrouter will add personality, but that's okay for non-builder prompts
-        raw = await _call_openrouter(system_prompt, user_prompt, user_id=user_id)
+        raw = await _call_openrouter(
+            system_prompt, user_prompt, user_id=user_id, response_model=CoachingReply, task="chat"
+        )
 
     try:
-        data = json.loads(raw)
-        # Add tool calls to the response
-        data["tool_calls"] = tool_calls_made
-        return CoachingReply(**data)
-    except (json.JSONDecodeError, ValueError) as e:
+        reply = await _parse_ai_reply(raw, CoachingReply, user_id=user_id)
+    except ValueError as e:
         logger.error(f"Failed to parse AI response: {e}")
         raise RuntimeError("Failed to process AI response. Please try again.")
 
+    # Add tool calls to the response
+    reply.tool_calls = tool_calls_made
+    return reply
+
 
 async def initial_session_reply(
     user: dict,
@@ -734,13 +1346,19 @@ async def initial_session_reply(
     raw = await _call_openrouter(
         initial_session.INITIAL_SESSION_SYSTEM_PROMPT,
         user_prompt,
-        user_id=user["id"]
+        user_id=user["id"],
+        response_model=InitialSessionReply,
+        task="initial_session",
     )
 
     try:
-        data = json.loads(raw)
-        return data  # {phase: str, message: str}
-    except (json.JSONDecodeError, ValueError) as e:
+        # A missing phase means Priya didn't move on — keep the current one
+        reply = await _parse_ai_reply(
+            raw, InitialSessionReply, user_id=user["id"],
+            defaults={"phase": current_phase or "exploring"},
+        )
+        return reply.model_dump()  # {phase: str, message: str}
+    except ValueError as e:
         logger.error(f"Failed to parse initial session response: {e}")
         raise RuntimeError("Failed to process AI response. Please try again.")
 
@@ -754,6 +1372,7 @@ async def review_session_reply(
     trigger_type: str,
     trigger_reason: str,
     review_stage: str = "opening",
+    analytics: dict | None = None,
 ) -> dict:
     """
     Generate AI reply for Prompt #4 (Review Session).
@@ -769,6 +1388,8 @@ async def review_session_reply(
         trigger_type: scheduled | streak_broken | consistently_missing | etc.
         trigger_reason: Human-readable explanation of why review triggered
         review_stage: opening | mid_conversation | proposing_change | closing
+        analytics: tracker_analytics results by tracker id (current values,
+            period averages, pace and projection)
 
     Returns:
         dict with keys: review_type (str), message (str)
@@ -798,8 +1419,13 @@ async def review_session_reply(
         except:
             pass
 
-    # Get current value from most recent tracker log (simplified)
-    current_value = goal.get("initial_value", 0)
+    # Current value: the primary tracker's latest log, until there is one the starting value
+    from app.services import tracker_analytics
+    analytics = analytics or {}
+    primary = tracker_analytics.primary_tracker(trackers)
+    current_value = (analytics.get(primary["id"]) or {}).get("current_value") if primary else None
+    if current_value is None:
+        current_value = goal.get("initial_value", 0)
 
     # Calculate timeline health
     initial_value = goal.get("initial_value", 0)
@@ -825,13 +1451,16 @@ async def review_session_reply(
     # Build habits summary
     habits_summary = review_session.build_habits_summary_for_review(habits, period_days=7)
 
-    # Build tracker summary (simplified - would need actual data)
-    period_averages = {}
-    prior_period_averages = {}
+    # Build tracker summary (last 7 days vs the 7 before)
+    period_averages = {tid: a["period_average"] for tid, a in analytics.items() if a.get("period_average") is not None}
+    prior_period_averages = {
+        tid: a["prior_period_average"] for tid, a in analytics.items() if a.get("prior_period_average") is not None
+    }
     tracker_summary = review_session.build_tracker_summary_for_review(
         trackers,
         period_averages,
-        prior_period_averages
+        prior_period_averages,
+        trends=analytics,
     )
 
     # Get task instruction based on stage
@@ -864,13 +1493,18 @@ async def review_session_reply(
     raw = await _call_openrouter(
         review_session.REVIEW_SESSION_SYSTEM_PROMPT,
         user_prompt,
-        user_id=user["id"]
+        user_id=user["id"],
+        response_model=ReviewSessionReply,
+        task="review",
     )
 
     try:
-        data = json.loads(raw)
-        return data  # {review_type: str, message: str}
-    except (json.JSONDecodeError, ValueError) as e:
+        reply = await _parse_ai_reply(
+            raw, ReviewSessionReply, user_id=user["id"],
+            defaults={"review_type": trigger_type},
+        )
+        return reply.model_dump()  # {review_type: str, message: str}
+    except ValueError as e:
         logger.error(f"Failed to parse review session response: {e}")
         raise RuntimeError("Failed to process AI response. Please try again.")
 
@@ -952,13 +1586,18 @@ async def proactive_checkin_reply(
     raw = await _call_openrouter(
         proactive_checkin.PROACTIVE_CHECKIN_SYSTEM_PROMPT,
         user_prompt,
-        user_id=user["id"]
+        user_id=user["id"],
+        response_model=ProactiveCheckinReply,
+        task="proactive",
     )
 
     try:
-        data = json.loads(raw)
-        return data  # {trigger_type, metric_case, delivery, message}
-    except (json.JSONDecodeError, ValueError) as e:
+        reply = await _parse_ai_reply(
+            raw, ProactiveCheckinReply, user_id=user["id"],
+            defaults={"trigger_type": trigger_type},
+        )
+        return reply.model_dump()  # {trigger_type, metric_case, delivery, message}
+    except ValueError as e:
         logger.error(f"Failed to parse proactive checkin response: {e}")
         raise RuntimeError("Failed to process AI response. Please try again.")
 
@@ -973,11 +1612,15 @@ async def generate_session_summary(
         goal_title=goal_title,
         chat_history=chat_history,
     )
-    raw = await _call_openrouter(session_summary.SYSTEM_PROMPT, user_prompt, user_id=user_id)
+    raw = await _call_openrouter(
+        session_summary.SYSTEM_PROMPT, user_prompt, user_id=user_id, response_model=SessionSummary,
+        task="summary",
+    )
     try:
-        data = json.loads(raw)
-        return data
-    except (json.JSONDecodeError, ValueError) as e:
+        # Every summary field has a default, so a partial summary is still usable — no re-ask
+        summary = await _parse_ai_reply(raw, SessionSummary, user_id=user_id, reask=False)
+        return summary.model_dump()
+    except ValueError as e:
         logger.error(f"Failed to parse session summary: {e}")
         # Return a basic fallback summary
         return {
@@ -6,11 +6,14 @@ using these tools. This saves tokens and makes the system more efficient.
 """
 
 import json
+import logging
 from typing import Any
 
 from app.services import habit_service, tracker_service, daily_log_service, goal_service
 from app.utils.dates import days_ago, date_range
 
+logger = logging.getLogger(__name__)
+
 
 # Tool definitions in OpenAI function calling format
 AVAILABLE_TOOLS = [
@@ -161,8 +164,7 @@ async def execute_tool(tool_name: str, arguments: dict[str, Any]) -> str:
             habits = await habit_service.list_habits(
                 arguments["goal_id"], status="active"
             )
-            print(f"[TOOL DEBUG] get_active_habits called for goal {arguments['goal_id']}")
-            print(f"[TOOL DEBUG] Found {len(habits)} habits: {[h.get('title') for h in habits]}")
+            logger.debug(f"get_active_habits found {len(habits)} habits for goal {arguments['goal_id']}")
             return json.dumps({
                 "habits": [
                     {
@@ -1,3 +1,5 @@
+import logging
+import time
 from datetime import timedelta
 
 from bson import ObjectId
@@ -5,17 +7,26 @@ from bson import ObjectId
 from app.database import get_db
 from app.models.coaching import PerformanceSnapshot, HabitPerformance, TrackerTrend
 from app.services import (
+    habit_history,
     habit_service,
     tracker_service,
     daily_log_service,
     goal_service,
     ai_service,
+    context_strategy,
+    event_bus,
+    shared_state,
     tag_parser,
+    tracker_analytics,
+    trigger_engine,
 )
 from app.models.habit import HabitCreate, HabitUpdate
 from app.models.tracker import TrackerCreate
 from app.utils.object_id import doc_id
 from app.utils.dates import now, today_str, days_ago, date_range
+from app.utils import tracing
+
+logger = logging.getLogger(__name__)
 
 
 async def build_performance_snapshot(
@@ -94,82 +105,47 @@ async def build_performance_snapshot(
 async def enrich_habits_with_stats(habits: list[dict], goal_id: str, user_id: str) -> list[dict]:
     """
     Enrich habit documents with computed statistics expected by prompt_builder.
-    Adds: is_formed, formation_count, current_streak, best_streak, completion_last_7_days, completed_today
+    Adds: is_formed, formation_count, current_streak, best_streak, consecutive_missed,
+    streak_before_last_miss, completion_last_7_days, completed_today
     """
     if not habits:
         return []
 
-    # Fetch last 14 days of logs for statistics
-    end_date = days_ago(0).isoformat()
-    start_date = days_ago(13).isoformat()
-    logs = await daily_log_service.get_logs_for_period(user_id, goal_id, start_date, end_date)
-
-    # Get today's date string
-    today = days_ago(0).isoformat()
+    # Full history from the compact per-habit bitsets (one query for all habits)
+    history = await habit_history.load(habits, user_id)
+    today = today_str()
 
     enriched_habits = []
     for habit in habits:
-        habit_id = habit["id"]
-
-        # Get all completions for this habit
-        all_completions = []
-        for log in logs:
-            for completion in log.get("habit_completions", []):
-                if completion["habit_id"] == habit_id and completion.get("completed"):
-                    all_completions.append({
-                        "date": log["date"],
-                        "completed": True
-                    })
-
-        # Calculate formation count (total completions ever)
-        formation_count = len(all_completions)
-        is_formed = formation_count >= 8
-
-        # Calculate current streak (consecutive days from today backwards)
-        current_streak = 0
-        dates_last_14 = [days_ago(i).isoformat() for i in range(14)]
-        dates_last_14.reverse()  # Start from oldest to newest
-
-        for i in range(len(dates_last_14) - 1, -1, -1):  # Go backwards from today
-            date = dates_last_14[i]
-            completed = any(c["date"] == date for c in all_completions)
-            if completed:
-                current_streak += 1
-            else:
-                if i == len(dates_last_14) - 1:  # Today not done
-                    break
-                else:  # Streak broken
-                    break
-
-        # Calculate best streak (not implemented - would need full history)
-        best_streak = current_streak  # Simplified for now
+        stats = habit_history.stats(history.get(habit["id"], 0), today, habit_history.activated_day(habit))
+        enriched_habits.append({
+            **habit,
+            "is_formed": stats["formation_count"] >= 8,
+            "formation_count": stats["formation_count"],
+            "current_streak": stats["current_streak"],
+            "best_streak": stats["best_streak"],
+            "consecutive_missed": stats["consecutive_missed"],
+            "streak_before_last_miss": stats["streak_before_last_miss"],
+            "completion_last_7_days": stats["completion_last_7_days"],
+            "completed_today": stats["completed_today"],
+        })
 
-        # Count completions in last 7 days
-        last_7_dates = [days_ago(i).isoformat() for i in range(7)]
-        completion_last_7_days = sum(1 for c in all_completions if c["date"] in last_7_dates)
+    return enriched_habits
 
-        # Check if completed today
-        completed_today = any(c["date"] == today for c in all_completions)
 
-        # Add computed fields to habit
-        enriched_habit = {
-            **habit,
-            "is_formed": is_formed,
-            "formation_count": formation_count,
-            "current_streak": current_streak,
-            "best_streak": best_streak,
-            "completion_last_7_days": completion_last_7_days,
-            "completed_today": completed_today,
-        }
-        enriched_habits.append(enriched_habit)
+async def get_session_lock_settings() -> dict:
+    """Session lock settings — admin overrides shared by all workers, else the .env values."""
+    from app.config import settings
 
-    return enriched_habits
+    return {
+        "session_lock_enabled": await shared_state.get_setting("session_lock_enabled", settings.session_lock_enabled),
+        "session_lock_hours": await shared_state.get_setting("session_lock_hours", settings.session_lock_hours),
+    }
 
 
 async def start_coaching_session(
-    goal_id: str, trigger: str = "scheduled_review", user_id: str = ""
+    goal_id: str, trigger: str = "scheduled_review", user_id: str = "", trigger_reason: str | None = None
 ) -> dict:
-    from app.config import settings
     from datetime import datetime
 
     db = get_db()
@@ -184,7 +160,8 @@ async def start_coaching_session(
     goal = await goal_service.get_goal(goal_id)
 
     # Check if session is locked
-    if settings.session_lock_enabled:
+    lock = await get_session_lock_settings()
+    if lock["session_lock_enabled"]:
         ai_context = goal.get("ai_context") or {}
         next_allowed = ai_context.get("next_session_allowed_at")
         if next_allowed:
@@ -240,6 +217,9 @@ async def start_coaching_session(
 
         summaries_text += "---\n\n"
 
+    # Allocate the session id up front so the opening turn's LLM usage is attributed to it
+    session_oid = ObjectId()
+
     if trigger == "goal_setup":
         # Use Prompt #1 (Initial Session) - Per integration guide section 3
         from app.services import user_service
@@ -247,14 +227,15 @@ async def start_coaching_session(
         user = await user_service.get_user(user_id)
 
         # Initial session starts in exploring phase
-        response = await ai_service.initial_session_reply(
-            user=user,
-            goal=goal,
-            conversation_history="",  # First turn, Priya speaks first
-            current_phase="exploring",
-            questionnaire_responses=goal.get("questionnaire_responses", {}),
-            template_id=goal.get("template_id"),
-        )
+        with ai_service.attribute_llm_usage(session_id=str(session_oid)):
+            response = await ai_service.initial_session_reply(
+                user=user,
+                goal=goal,
+                conversation_history="",  # First turn, Priya speaks first
+                current_phase="exploring",
+                questionnaire_responses=goal.get("questionnaire_responses", {}),
+                template_id=goal.get("template_id"),
+            )
 
         # Prepend summaries to the message (if any from previous goals)
         message_content = summaries_text + response["message"]
@@ -282,28 +263,32 @@ async def start_coaching_session(
 
         user = await user_service.get_user(user_id)
         habits = await habit_service.list_habits(goal_id, status="active")
+        habits = await enrich_habits_with_stats(habits, goal_id, user_id)
         trackers = await tracker_service.list_trackers(goal_id)
+        analytics = await tracker_analytics.for_goal(user_id, goal, trackers, days_ago(0))
 
         # Determine trigger type and reason
         if trigger == "scheduled_review":
             trigger_type = "scheduled"
-            trigger_reason = "Regular weekly check-in"
+            trigger_reason = trigger_reason or "Regular weekly check-in"
         else:
             # Could be other types: streak_broken, consistently_missing, etc.
             trigger_type = trigger
-            trigger_reason = f"{trigger.replace('_', ' ').title()} detected"
+            trigger_reason = trigger_reason or f"{trigger.replace('_', ' ').title()} detected"
 
         # Use Prompt #4 (Review Session)
-        response = await ai_service.review_session_reply(
-            user=user,
-            goal=goal,
-            habits=habits,
-            trackers=trackers,
-            conversation_history="",  # First turn, Priya speaks first
-            trigger_type=trigger_type,
-            trigger_reason=trigger_reason,
-            review_stage="opening",
-        )
+        with ai_service.attribute_llm_usage(session_id=str(session_oid)):
+            response = await ai_service.review_session_reply(
+                user=user,
+                goal=goal,
+                habits=habits,
+                trackers=trackers,
+                conversation_history="",  # First turn, Priya speaks first
+                trigger_type=trigger_type,
+                trigger_reason=trigger_reason,
+                review_stage="opening",
+                analytics=analytics,
+            )
 
         # Prepend summaries to the message
         message_content = summaries_text + response["message"]
@@ -329,16 +314,23 @@ async def start_coaching_session(
             "resolved_at": None,
         }
 
-    result = await db.coaching_sessions.insert_one(session_doc)
-    session_doc["_id"] = result.inserted_id
+    session_doc["_id"] = session_oid
+    await db.coaching_sessions.insert_one(session_doc)
 
     # Update next review date
     next_review = (days_ago(0) + timedelta(days=3)).isoformat()
     ai_context = goal.get("ai_context") or {}
     ai_context["next_review_date"] = next_review
+    if trigger != "goal_setup":
+        # The weekly "scheduled" trigger counts from here
+        ai_context["last_review_date"] = days_ago(0).isoformat()
     await goal_service.update_goal_ai_context(goal_id, ai_context)
 
-    return doc_id(session_doc)
+    session = doc_id(session_doc)
+    await event_bus.publish(user_id, "session.started", {
+        "session_id": session["id"], "goal_id": goal_id, "trigger": trigger,
+    })
+    return session
 
 
 async def get_active_session(goal_id: str) -> dict | None:
@@ -349,6 +341,15 @@ async def get_active_session(goal_id: str) -> dict | None:
     return doc_id(doc) if doc else None
 
 
+async def get_active_session_version(goal_id: str) -> tuple | None:
+    """(id, updated_at) of the active session — the ETag for GET /goals/{goal_id}/coaching."""
+    db = get_db()
+    doc = await db.coaching_sessions.find_one(
+        {"goal_id": goal_id, "status": "active"}, {"updated_at": 1, "created_at": 1}
+    )
+    return (str(doc["_id"]), doc.get("updated_at") or doc.get("created_at")) if doc else None
+
+
 async def detect_review_trigger(user_id: str, goal_id: str) -> tuple[str, str] | None:
     """
     Detect if a review session should be triggered.
@@ -357,56 +358,18 @@ async def detect_review_trigger(user_id: str, goal_id: str) -> tuple[str, str] |
     Returns:
         tuple[trigger_type, trigger_reason] if review needed, None otherwise
     """
-    from datetime import date as dt_date
-
     goal = await goal_service.get_goal(goal_id)
-    habits = await habit_service.list_habits(goal_id, status="active")
+    habits, trackers, analytics = await _trigger_inputs(user_id, goal)
+    return trigger_engine.review_trigger(goal, habits, trackers, analytics, days_ago(0))
 
-    # Check 1: Scheduled review (7 days since last review)
-    last_review_str = goal.get("ai_context", {}).get("last_review_date")
-    if last_review_str:
-        try:
-            last_review = dt_date.fromisoformat(last_review_str)
-            days_since = (dt_date.today() - last_review).days
-            if days_since >= 7:
-                return ("scheduled", "Regular weekly check-in")
-        except:
-            pass
-    else:
-        # Never had a review - check if goal is at least 7 days old
-        created_at = goal.get("created_at", "")
-        try:
-            created_date = dt_date.fromisoformat(created_at.split("T")[0])
-            days_since_created = (dt_date.today() - created_date).days
-            if days_since_created >= 7:
-                return ("scheduled", "First weekly check-in")
-        except:
-            pass
-
-    # Check 2: Streak broken (5+ day streak missed)
-    for habit in habits:
-        streak_before = habit.get("streak_before_last_miss", 0)
-        consecutive_missed = habit.get("consecutive_missed", 0)
-        if consecutive_missed >= 1 and streak_before >= 5:
-            return ("streak_broken", f"You had a {streak_before}-day streak on '{habit['title']}' that just broke")
 
-    # Check 3: Consistently missing (3+ days)
-    for habit in habits:
-        consecutive_missed = habit.get("consecutive_missed", 0)
-        if consecutive_missed >= 3:
-            return ("consistently_missing", f"Missed '{habit['title']}' for {consecutive_missed} days in a row")
-
-    # Check 4: Breakthrough (habit just formed)
-    for habit in habits:
-        formation_count = habit.get("formation_count", 0)
-        if formation_count == 8 and not habit.get("formation_celebrated", False):
-            return ("breakthrough", f"You just formed '{habit['title']}' - 8 completions reached!")
-
-    # TODO: Add more trigger types:
-    # - target_at_risk (pace slipping)
-    # - plateau (metric flat 10+ days)
-
-    return None
+async def _trigger_inputs(user_id: str, goal: dict) -> tuple[list[dict], list[dict], dict]:
+    """Enriched active habits, trackers and tracker analytics for the trigger rules."""
+    habits = await habit_service.list_habits(goal["id"], status="active")
+    habits = await enrich_habits_with_stats(habits, goal["id"], user_id)
+    trackers = await tracker_service.list_trackers(goal["id"])
+    analytics = await tracker_analytics.for_goal(user_id, goal, trackers, days_ago(0))
+    return habits, trackers, analytics
 
 
 async def send_message(session_id: str, user_message: str) -> dict:
@@ -417,12 +380,13 @@ async def send_message(session_id: str, user_message: str) -> dict:
     from app.services import user_service
 
     db = get_db()
-    session = await db.coaching_sessions.find_one({"_id": ObjectId(session_id)})
-    if not session:
-        raise ValueError("Session not found")
+    with tracing.span("coaching.load_session", **{"session.id": session_id}):
+        session = await db.coaching_sessions.find_one({"_id": ObjectId(session_id)})
+        if not session:
+            raise ValueError("Session not found")
 
-    goal = await goal_service.get_goal(session["goal_id"])
-    user = await user_service.get_user(session["user_id"])
+        goal = await goal_service.get_goal(session["goal_id"])
+        user = await user_service.get_user(session["user_id"])
 
     # Add user message to session
     session["messages"].append(
@@ -439,14 +403,15 @@ async def send_message(session_id: str, user_message: str) -> dict:
     # Check if this is an initial session (Prompt #1)
     if session.get("initial_session_phase") and session["initial_session_phase"] != "complete":
         # Use Prompt #1 (Initial Session)
-        response = await ai_service.initial_session_reply(
-            user=user,
-            goal=goal,
-            conversation_history=chat_history,
-            current_phase=session.get("initial_session_phase", "exploring"),
-            questionnaire_responses=goal.get("questionnaire_responses", {}),
-            template_id=goal.get("template_id"),
-        )
+        with ai_service.attribute_llm_usage(session_id=session_id):
+            response = await ai_service.initial_session_reply(
+                user=user,
+                goal=goal,
+                conversation_history=chat_history,
+                current_phase=session.get("initial_session_phase", "exploring"),
+                questionnaire_responses=goal.get("questionnaire_responses", {}),
+                template_id=goal.get("template_id"),
+            )
 
         # Update phase
         session["initial_session_phase"] = response["phase"]
@@ -460,11 +425,14 @@ async def send_message(session_id: str, user_message: str) -> dict:
     # Check if this is a review session (Prompt #4)
     elif session.get("review_active"):
         # Use Prompt #4 (Review Session)
-        habits = await habit_service.list_habits(session["goal_id"], status="active")
-        trackers = await tracker_service.list_trackers(session["goal_id"])
+        with tracing.span("coaching.fetch_data"):
+            habits = await habit_service.list_habits(session["goal_id"], status="active")
+            trackers = await tracker_service.list_trackers(session["goal_id"])
 
-        # Enrich habits with computed statistics
-        habits = await enrich_habits_with_stats(habits, session["goal_id"], session["user_id"])
+            # Enrich habits with computed statistics
+            with tracing.span("coaching.enrich_habits", habits=len(habits)):
+                habits = await enrich_habits_with_stats(habits, session["goal_id"], session["user_id"])
+            analytics = await tracker_analytics.for_goal(session["user_id"], goal, trackers, days_ago(0))
 
         # Advance review stage if needed
         review_stage = session.get("review_stage", "opening")
@@ -472,16 +440,18 @@ async def send_message(session_id: str, user_message: str) -> dict:
             review_stage = "mid_conversation"
             session["review_stage"] = review_stage
 
-        response = await ai_service.review_session_reply(
-            user=user,
-            goal=goal,
-            habits=habits,
-            trackers=trackers,
-            conversation_history=chat_history,
-            trigger_type=session.get("review_trigger_type", "scheduled"),
-            trigger_reason=session.get("review_trigger_reason", "Regular weekly check-in"),
-            review_stage=review_stage,
-        )
+        with ai_service.attribute_llm_usage(session_id=session_id):
+            response = await ai_service.review_session_reply(
+                user=user,
+                goal=goal,
+                habits=habits,
+                trackers=trackers,
+                conversation_history=chat_history,
+                trigger_type=session.get("review_trigger_type", "scheduled"),
+                trigger_reason=session.get("review_trigger_reason", "Regular weekly check-in"),
+                review_stage=review_stage,
+                analytics=analytics,
+            )
 
         reply_message = response["message"]
 
@@ -491,41 +461,57 @@ async def send_message(session_id: str, user_message: str) -> dict:
 
     else:
         # Use Prompt #2 (Regular Coaching System Prompt Builder)
-        habits = await habit_service.list_habits(session["goal_id"], status="active")
-        trackers = await tracker_service.list_trackers(session["goal_id"])
-
-        # Enrich habits with computed statistics
-        habits = await enrich_habits_with_stats(habits, session["goal_id"], session["user_id"])
-
-        # DEBUG: Log what we're fetching
-        print(f"[DEBUG] Fetched {len(habits)} habits and {len(trackers)} trackers for goal {session['goal_id']}")
-        if habits:
-            print(f"[DEBUG] Habits: {[h['title'] for h in habits]}")
-            print(f"[DEBUG] Habit stats: {[(h['title'], h.get('formation_count', 0), h.get('is_formed', False)) for h in habits]}")
-        if trackers:
-            print(f"[DEBUG] Trackers: {[t['name'] for t in trackers]}")
-
-        # Get today's logs
-        today_date = days_ago(0).isoformat()
-        today_logs = await daily_log_service.get_or_create_log(
-            session["user_id"],
-            session["goal_id"],
-            today_date
-        ) or {}
-
-        # TODO: Add upcoming_checkins from calendar/scheduling system
-        upcoming_checkins = []
-
-        reply = await ai_service.coaching_reply_ai(
-            user=user,
-            goal=goal,
-            habits=habits,
-            trackers=trackers,
-            today_logs=today_logs,
-            chat_history=chat_history,
-            user_message=user_message,
-            upcoming_checkins=upcoming_checkins,
-            use_tools=True,  # Enable AI function calling
+        strategy = context_strategy.resolve_strategy(user)
+        turn_started = time.perf_counter()
+
+        with ai_service.track_llm_usage() as usage, ai_service.attribute_llm_usage(session_id=session_id):
+            if context_strategy.STRATEGIES[strategy]["data_picture"] == "none":
+                # Lazy: the model fetches what it needs through tools
+                habits, trackers, today_logs = [], [], {}
+            else:
+                with tracing.span("coaching.fetch_data", strategy=strategy):
+                    habits = await habit_service.list_habits(session["goal_id"], status="active")
+                    trackers = await tracker_service.list_trackers(session["goal_id"])
+
+                    # Enrich habits with computed statistics
+                    with tracing.span("coaching.enrich_habits", habits=len(habits)):
+                        habits = await enrich_habits_with_stats(habits, session["goal_id"], session["user_id"])
+
+                    logger.debug(
+                        f"Fetched {len(habits)} habits and {len(trackers)} trackers for goal {session['goal_id']}"
+                    )
+
+                    # Get today's logs
+                    today_date = days_ago(0).isoformat()
+                    today_logs = await daily_log_service.get_or_create_log(
+                        session["user_id"],
+                        session["goal_id"],
+                        today_date
+                    ) or {}
+
+            # TODO: Add upcoming_checkins from calendar/scheduling system
+            upcoming_checkins = []
+
+            reply = await ai_service.coaching_reply_ai(
+                user=user,
+                goal=goal,
+                habits=habits,
+                trackers=trackers,
+                today_logs=today_logs,
+                chat_history=chat_history,
+                user_message=user_message,
+                upcoming_checkins=upcoming_checkins,
+                use_tools=True,  # Enable AI function calling
+                strategy=strategy,
+            )
+
+        context_strategy.record_turn(
+            strategy=strategy,
+            user_id=session["user_id"],
+            goal_id=session["goal_id"],
+            session_id=session_id,
+            usage=usage,
+            latency_ms=(time.perf_counter() - turn_started) * 1000,
         )
 
     # Check if AI decided not to reply
@@ -548,14 +534,19 @@ async def send_message(session_id: str, user_message: str) -> dict:
         result = doc_id(updated)
         # Add a flag to indicate no reply was needed
         result["no_reply_needed"] = True
+        await event_bus.publish(session["user_id"], "session.updated", {
+            "session_id": session_id, "goal_id": session["goal_id"], "message": None, "no_reply_needed": True,
+        })
         return result
 
     # Parse and execute tags from AI response
-    clean_message, executed_actions = await tag_parser.parse_and_execute_tags(
-        message=reply.message,
-        goal_id=session["goal_id"],
-        user_id=session["user_id"]
-    )
+    with tracing.span("coaching.parse_tags") as tags_span:
+        clean_message, executed_actions = await tag_parser.parse_and_execute_tags(
+            message=reply.message,
+            goal_id=session["goal_id"],
+            user_id=session["user_id"]
+        )
+        tags_span.set_attribute("actions", len(executed_actions))
 
     # Store clean message (with tags removed)
     session["messages"].append(
@@ -580,18 +571,21 @@ async def send_message(session_id: str, user_message: str) -> dict:
     if "review_stage" in session:
         update_data["review_stage"] = session["review_stage"]
 
-    await db.coaching_sessions.update_one(
-        {"_id": ObjectId(session_id)},
-        {"$set": update_data},
-    )
+    with tracing.span("coaching.save"):
+        await db.coaching_sessions.update_one(
+            {"_id": ObjectId(session_id)},
+            {"$set": update_data},
+        )
 
-    updated = await db.coaching_sessions.find_one({"_id": ObjectId(session_id)})
+        updated = await db.coaching_sessions.find_one({"_id": ObjectId(session_id)})
+    await event_bus.publish(session["user_id"], "session.updated", {
+        "session_id": session_id, "goal_id": session["goal_id"], "message": session["messages"][-1],
+    })
     return doc_id(updated)
 
 
 async def resolve_session(session_id: str) -> dict:
     """Resolve a coaching session and generate a summary."""
-    from app.config import settings
     from datetime import datetime
 
     db = get_db()
@@ -612,11 +606,12 @@ async def resolve_session(session_id: str) -> dict:
 
     # Generate summary using AI
     try:
-        summary_data = await ai_service.generate_session_summary(
-            goal_title=goal.get("title", "Your goal"),
-            chat_history=chat_history,
-            user_id=session.get("user_id"),
-        )
+        with ai_service.attribute_llm_usage(session_id=session_id):
+            summary_data = await ai_service.generate_session_summary(
+                goal_title=goal.get("title", "Your goal"),
+                chat_history=chat_history,
+                user_id=session.get("user_id"),
+            )
     except Exception as e:
         # If summary generation fails, use a basic fallback
         summary_data = {
@@ -639,13 +634,17 @@ async def resolve_session(session_id: str) -> dict:
     )
 
     # Set session lock on goal if enabled
-    if settings.session_lock_enabled:
-        lock_until = datetime.utcnow() + timedelta(hours=settings.session_lock_hours)
+    lock = await get_session_lock_settings()
+    if lock["session_lock_enabled"]:
+        lock_until = datetime.utcnow() + timedelta(hours=lock["session_lock_hours"])
         ai_context = goal.get("ai_context") or {}
         ai_context["next_session_allowed_at"] = lock_until
         await goal_service.update_goal_ai_context(session["goal_id"], ai_context)
 
     doc = await db.coaching_sessions.find_one({"_id": ObjectId(session_id)})
+    await event_bus.publish(session["user_id"], "session.resolved", {
+        "session_id": session_id, "goal_id": session["goal_id"], "summary": summary_data,
+    })
     return doc_id(doc)
 
 
@@ -657,62 +656,26 @@ async def detect_proactive_trigger(user_id: str, goal_id: str) -> dict | None:
     Returns:
         dict with trigger_type and trigger_details if needed, None otherwise
     """
-    habits = await habit_service.list_habits(goal_id, status="active")
-    trackers = await tracker_service.list_trackers(goal_id)
     goal = await goal_service.get_goal(goal_id)
+    habits, trackers, analytics = await _trigger_inputs(user_id, goal)
+    return trigger_engine.proactive_trigger(goal, habits, trackers, analytics, days_ago(0))
 
-    # Priority 1: Missed 3+ days (most urgent)
-    for habit in habits:
-        consecutive_missed = habit.get("consecutive_missed", 0)
-        if consecutive_missed >= 3:
-            return {
-                "type": "missed_3_plus_days",
-                "details": {
-                    "habit_id": habit["id"],
-                    "habit_title": habit["title"],
-                    "days_missed": consecutive_missed,
-                }
-            }
-
-    # Priority 2: Habit just formed (celebration)
-    for habit in habits:
-        formation_count = habit.get("formation_count", 0)
-        is_formed = habit.get("is_formed", False)
-        formation_celebrated = habit.get("formation_celebrated", False)
-
-        if is_formed and formation_count >= 8 and not formation_celebrated:
-            return {
-                "type": "habit_formed",
-                "details": {
-                    "habit_id": habit["id"],
-                    "habit_title": habit["title"],
-                    "formation_count": formation_count,
-                }
-            }
-
-    # Priority 3: Metric moving wrong direction
-    # TODO: Implement metric trend detection
-    # Would need to:
-    # 1. Get primary tracker from goal
-    # 2. Calculate 7-day trend
-    # 3. Check if moving opposite to desired direction
-    # 4. Detect context flags from memories
 
-    return None
-
-
-async def generate_proactive_message(user_id: str, goal_id: str) -> dict | None:
+async def generate_proactive_message(user_id: str, goal_id: str, trigger: dict | None = None) -> dict | None:
     """
     Generate and store a proactive check-in message.
     Per integration guide section 7.
 
+    trigger ({type, details}) skips detection when the caller already evaluated it
+    (trigger_engine's batch run).
+
     Returns:
         dict with message details if generated, None if no trigger
     """
     from app.services import user_service
 
     # Check if trigger exists
-    trigger = await detect_proactive_trigger(user_id, goal_id)
+    trigger = trigger or await detect_proactive_trigger(user_id, goal_id)
     if not trigger:
         return None
 
@@ -720,6 +683,7 @@ async def generate_proactive_message(user_id: str, goal_id: str) -> dict | None:
     user = await user_service.get_user(user_id)
     goal = await goal_service.get_goal(goal_id)
     habits = await habit_service.list_habits(goal_id, status="active")
+    habits = await enrich_habits_with_stats(habits, goal_id, user_id)
     trackers = await tracker_service.list_trackers(goal_id)
 
     # Generate proactive message
@@ -751,12 +715,14 @@ async def generate_proactive_message(user_id: str, goal_id: str) -> dict | None:
         habit_id = trigger["details"]["habit_id"]
         await habit_service.mark_formation_celebrated(habit_id)
 
-    return {
+    pending = {
         "id": str(result.inserted_id),
         "trigger_type": response["trigger_type"],
         "delivery": response["delivery"],
         "message": response["message"],
     }
+    await event_bus.publish(user_id, "proactive.pending", {"goal_id": goal_id, **pending})
+    return pending
 
 
 async def get_pending_proactive_messages(user_id: str, goal_id: str) -> list[dict]:
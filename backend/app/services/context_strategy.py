@@ -0,0 +1,161 @@
+"""
+Context strategies for regular coaching turns.
+
+How much data goes into the coaching prompt up front is a latency/cost
+tradeoff. Each turn runs one strategy and records what it cost, so the
+cheapest strategy that still coaches well can be chosen from real data:
+
+  eager  — full data picture in the prompt (tools still available)
+  lazy   — no data in the prompt, the model fetches with tools
+  hybrid — one-line-per-item snapshot in the prompt + tools for history
+
+Assignment: per-user override (user.context_strategy) → percentage rollout
+(CONTEXT_STRATEGY_ROLLOUT, e.g. "lazy:10,hybrid:20") → CONTEXT_STRATEGY_DEFAULT.
+"""
+import asyncio
+import hashlib
+import logging
+from datetime import timedelta
+
+from bson import ObjectId
+
+from app.config import settings
+from app.database import get_db
+from app.utils.dates import now
+
+logger = logging.getLogger(__name__)
+
+
+STRATEGIES = {
+    "eager": {"data_picture": "full", "use_tools": True},
+    "lazy": {"data_picture": "none", "use_tools": True},
+    "hybrid": {"data_picture": "summary", "use_tools": True},
+}
+
+
+def _rollout_bucket(user_id: str) -> int:
+    """Stable 0–99 bucket per user, so a user stays on one strategy across turns."""
+    digest = hashlib.sha1(user_id.encode()).hexdigest()
+    return int(digest[:8], 16) % 100
+
+
+def _parse_rollout(rollout: str) -> list[tuple[str, int]]:
+    """Parse "lazy:10,hybrid:20" into [("lazy", 10), ("hybrid", 20)], skipping junk."""
+    parsed = []
+    for part in rollout.split(","):
+        name, _, pct = part.strip().partition(":")
+        if name in STRATEGIES and pct.strip().isdigit():
+            parsed.append((name, int(pct)))
+    return parsed
+
+
+def resolve_strategy(user: dict) -> str:
+    """Pick the context strategy for this user's coaching turns."""
+    override = user.get("context_strategy")
+    if override in STRATEGIES:
+        return override
+
+    if settings.context_strategy_rollout:
+        bucket = _rollout_bucket(user["id"])
+        threshold = 0
+        for name, pct in _parse_rollout(settings.context_strategy_rollout):
+            threshold += pct
+            if bucket < threshold:
+                return name
+
+    default = settings.context_strategy_default
+    return default if default in STRATEGIES else "eager"
+
+
+def record_turn(
+    strategy: str,
+    user_id: str,
+    goal_id: str,
+    session_id: str,
+    usage: dict,
+    latency_ms: float,
+) -> None:
+    """Store what one coaching turn cost, in the background. Never fails or delays the turn."""
+    doc = {
+        "strategy": strategy,
+        "user_id": user_id,
+        "goal_id": goal_id,
+        "session_id": session_id,
+        "latency_ms": round(latency_ms, 1),
+        "prompt_tokens": usage.get("prompt_tokens", 0),
+        "completion_tokens": usage.get("completion_tokens", 0),
+        "llm_calls": usage.get("llm_calls", 0),
+        "tool_iterations": usage.get("tool_iterations", 0),
+        "system_prompt_chars": usage.get("system_prompt_chars", 0),
+        "created_at": now(),
+    }
+    task = asyncio.create_task(get_db().coaching_turn_metrics.insert_one(doc))
+    _turn_writes.add(task)
+    task.add_done_callback(_turn_write_done)
+
+
+# Strong references to pending turn writes, so they aren't garbage collected
+_turn_writes: set[asyncio.Task] = set()
+
+
+def _turn_write_done(task: asyncio.Task) -> None:
+    _turn_writes.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Failed to record coaching turn metrics: {task.exception()}")
+
+
+def _percentile(values: list[float], pct: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def summarize(days: int = 7) -> list[dict]:
+    """Per-strategy averages and latency percentiles over the last N days."""
+    db = get_db()
+    pipeline = [
+        {"$match": {"created_at": {"$gte": now() - timedelta(days=days)}}},
+        {"$group": {
+            "_id": "$strategy",
+            "turns": {"$sum": 1},
+            "users": {"$addToSet": "$user_id"},
+            "avg_prompt_tokens": {"$avg": "$prompt_tokens"},
+            "avg_completion_tokens": {"$avg": "$completion_tokens"},
+            "avg_llm_calls": {"$avg": "$llm_calls"},
+            "avg_tool_iterations": {"$avg": "$tool_iterations"},
+            "avg_system_prompt_chars": {"$avg": "$system_prompt_chars"},
+            "latencies": {"$push": "$latency_ms"},
+        }},
+        {"$sort": {"_id": 1}},
+    ]
+
+    results = []
+    async for row in db.coaching_turn_metrics.aggregate(pipeline):
+        latencies = row.pop("latencies")
+        results.append({
+            "strategy": row.pop("_id"),
+            "turns": row.pop("turns"),
+            "users": len(row.pop("users")),
+            **{k: round(v, 1) if v is not None else None for k, v in row.items()},
+            "latency_p50_ms": _percentile(latencies, 50),
+            "latency_p95_ms": _percentile(latencies, 95),
+        })
+    return results
+
+
+async def set_user_strategy(user_id: str, strategy: str | None) -> bool:
+    """Pin a user to a strategy, or clear the pin with None. False if there is no such user."""
+    if strategy is not None and strategy not in STRATEGIES:
+        raise ValueError(f"Invalid strategy. Must be one of: {', '.join(STRATEGIES)}")
+    if not ObjectId.is_valid(user_id):
+        raise ValueError("Invalid user_id")
+
+    db = get_db()
+    if strategy is None:
+        update = {"$unset": {"context_strategy": ""}, "$set": {"updated_at": now()}}
+    else:
+        update = {"$set": {"context_strategy": strategy, "updated_at": now()}}
+    result = await db.users.update_one({"_id": ObjectId(user_id)}, update)
+    return bool(result.matched_count)
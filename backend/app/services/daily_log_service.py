@@ -1,10 +1,14 @@
+import asyncio
+from datetime import date as date_cls, datetime
+
 from bson import ObjectId
-from datetime import datetime
+from pymongo import ReturnDocument
 
 from app.database import get_db
-from app.models.daily_log import TrackerLogInput
+from app.models.daily_log import CheckInInput, TrackerLogInput
+from app.services import event_bus, habit_history, tracker_analytics
 from app.utils.object_id import doc_id
-from app.utils.dates import now
+from app.utils.dates import date_range, now
 
 
 async def get_or_create_log(user_id: str, goal_id: str, date: str) -> dict:
@@ -35,6 +39,72 @@ async def get_daily_logs(user_id: str, date: str) -> list[dict]:
     return [doc_id(doc) async for doc in cursor]
 
 
+# Longest span GET /daily/range serves in one response
+MAX_RANGE_DAYS = 366
+RANGE_COLUMNS = ("habits", "trackers")
+
+
+async def get_log_range(
+    user_id: str, start: str, end: str, goal_id: str | None = None, include: tuple = RANGE_COLUMNS
+) -> dict:
+    """
+    Logs from start to end (inclusive) in columns rather than per-day documents.
+
+    Returns {"start", "end", "dates", "goals": {goal_id: {"habits", "trackers"}}}:
+    each habit maps to a string with one character per entry in dates ("1" done,
+    "0" not), each tracker to a list of values (None where nothing was logged).
+    include picks the columns. One query on the (user_id, date) index.
+    """
+    first, last = date_cls.fromisoformat(start), date_cls.fromisoformat(end)
+    if last < first:
+        raise ValueError("end is before start")
+    if (last - first).days >= MAX_RANGE_DAYS:
+        raise ValueError(f"Range is limited to {MAX_RANGE_DAYS} days")
+    unknown = [c for c in include if c not in RANGE_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)}. Must be among: {', '.join(RANGE_COLUMNS)}")
+
+    dates = date_range(first, last)
+    position = {d: i for i, d in enumerate(dates)}
+
+    query = {"user_id": user_id, "date": {"$gte": start, "$lte": end}}
+    if goal_id:
+        query["goal_id"] = goal_id
+    projection = {"_id": 0, "goal_id": 1, "date": 1}
+    if "habits" in include:
+        projection.update({"habit_completions.habit_id": 1, "habit_completions.completed": 1})
+    if "trackers" in include:
+        projection.update({"tracker_entries.tracker_id": 1, "tracker_entries.value": 1})
+
+    goals: dict[str, dict] = {}
+    habit_bits: dict[str, dict[str, bytearray]] = {}
+    async for log in get_db().daily_logs.find(query, projection):
+        i = position[log["date"]]
+        goal = goals.setdefault(log["goal_id"], {column: {} for column in include})
+        if "habits" in include:
+            bits = habit_bits.setdefault(log["goal_id"], {})
+            for c in log.get("habit_completions", ()):
+                row = bits.setdefault(c["habit_id"], bytearray(b"0" * len(dates)))
+                if c.get("completed"):
+                    row[i] = ord("1")
+        if "trackers" in include:
+            for e in log.get("tracker_entries", ()):
+                goal["trackers"].setdefault(e["tracker_id"], [None] * len(dates))[i] = e.get("value")
+
+    # Empty unless habits were requested
+    for gid, bits in habit_bits.items():
+        goals[gid]["habits"] = {habit_id: row.decode() for habit_id, row in bits.items()}
+
+    return {"start": start, "end": end, "dates": dates, "goals": goals}
+
+
+async def get_daily_logs_version(user_id: str, date: str) -> list[tuple]:
+    """(id, updated_at) of each log for the day — the ETag for GET /daily/{date}."""
+    db = get_db()
+    cursor = db.daily_logs.find({"user_id": user_id, "date": date}, {"updated_at": 1}).sort("_id", 1)
+    return [(str(doc["_id"]), doc.get("updated_at")) async for doc in cursor]
+
+
 async def toggle_habit(
     user_id: str, goal_id: str, date: str, habit_id: str
 ) -> dict:
@@ -93,8 +163,10 @@ async def toggle_habit(
         {"_id": log["_id"]},
         {"$set": {"habit_completions": completions, "updated_at": now()}},
     )
-    updated = await db.daily_logs.find_one({"_id": log["_id"]})
-    return doc_id(updated)
+    await habit_history.record(user_id, goal_id, date, [c for c in completions if c["habit_id"] == habit_id])
+    updated = doc_id(await db.daily_logs.find_one({"_id": log["_id"]}))
+    await event_bus.publish(user_id, "daily_log.updated", {"goal_id": goal_id, "date": date, "log": updated})
+    return updated
 
 
 async def log_tracker(
@@ -144,18 +216,8 @@ async def log_tracker(
 
     for habit in linked_habits:
         habit_id = str(habit["_id"])
-        threshold = habit.get("tracker_threshold")
         direction = await _get_tracker_direction(tracker_id)
-
-        met = False
-        if threshold is not None:
-            if direction == "decrease":
-                met = data.value <= threshold
-            else:
-                met = data.value >= threshold
-        else:
-            # No threshold — any log counts as completion
-            met = True
+        met = _linked_habit_met(habit, data.value, direction)
 
         existing_completion = next(
             (c for c in completions if c["habit_id"] == habit_id), None
@@ -183,8 +245,115 @@ async def log_tracker(
             }
         },
     )
-    updated = await db.daily_logs.find_one({"_id": log["_id"]})
-    return doc_id(updated)
+    linked_ids = {str(h["_id"]) for h in linked_habits}
+    await habit_history.record(user_id, goal_id, date, [c for c in completions if c["habit_id"] in linked_ids])
+    await tracker_analytics.invalidate([tracker_id])
+    updated = doc_id(await db.daily_logs.find_one({"_id": log["_id"]}))
+    await event_bus.publish(user_id, "daily_log.updated", {"goal_id": goal_id, "date": date, "log": updated})
+    return updated
+
+
+def _linked_habit_met(habit: dict, value: float, direction: str) -> bool:
+    threshold = habit.get("tracker_threshold")
+    if threshold is None:
+        # No threshold — any log counts as completion
+        return True
+    if direction == "decrease":
+        return value <= threshold
+    return value >= threshold
+
+
+async def check_in(user_id: str, goal_id: str, date: str, data: CheckInInput) -> dict:
+    """
+    Apply several habit states and tracker values to one day's log in a single write.
+
+    Habit states are set, not toggled, so resending a check-in is harmless.
+    Linked habits are auto-completed from the submitted tracker values, and an
+    explicit state for the same habit wins over that. Raises ValueError for
+    habits or trackers outside the goal, or habits logged before activation.
+    """
+    db = get_db()
+    habit_ids = {h.habit_id for h in data.habits}
+    tracker_ids = {t.tracker_id for t in data.trackers}
+    invalid = [i for i in habit_ids | tracker_ids if not ObjectId.is_valid(i)]
+    if invalid:
+        raise ValueError(f"Invalid id: {invalid[0]}")
+
+    log, habits, trackers = await asyncio.gather(
+        db.daily_logs.find_one({"user_id": user_id, "goal_id": goal_id, "date": date}),
+        db.habits.find({
+            "goal_id": goal_id,
+            "$or": [
+                {"_id": {"$in": [ObjectId(i) for i in habit_ids]}},
+                {"linked_tracker_id": {"$in": list(tracker_ids)}, "status": "active"},
+            ],
+        }).to_list(None),
+        db.trackers.find(
+            {"_id": {"$in": [ObjectId(i) for i in tracker_ids]}, "goal_id": goal_id}, {"direction": 1}
+        ).to_list(None),
+    )
+    habits_by_id = {str(h["_id"]): h for h in habits}
+    directions = {str(t["_id"]): t.get("direction", "increase") for t in trackers}
+
+    missing = [i for i in habit_ids if i not in habits_by_id] + [i for i in tracker_ids if i not in directions]
+    if missing:
+        raise ValueError(f"Not part of this goal: {', '.join(missing)}")
+    log_date = datetime.strptime(date, "%Y-%m-%d").date()
+    for habit_id in habit_ids:
+        activated = habits_by_id[habit_id].get("activated_at")
+        if activated and log_date < activated.date():
+            raise ValueError(
+                f"Habit {habit_id} starts on {activated.date().isoformat()}. You can't log it before that date."
+            )
+
+    logged_at = now()
+    entries = {e["tracker_id"]: e for e in (log or {}).get("tracker_entries", [])}
+    completions = {c["habit_id"]: c for c in (log or {}).get("habit_completions", [])}
+
+    for item in data.trackers:
+        entries[item.tracker_id] = {
+            "tracker_id": item.tracker_id, "value": item.value, "logged_at": logged_at, "notes": item.notes,
+        }
+
+    # Auto-complete linked habits once, from each tracker's final value in this check-in
+    for habit_id, habit in habits_by_id.items():
+        tracker_id = habit.get("linked_tracker_id")
+        if tracker_id not in directions or habit.get("status") != "active":
+            continue
+        met = _linked_habit_met(habit, entries[tracker_id]["value"], directions[tracker_id])
+        previous = completions.get(habit_id)
+        completions[habit_id] = {
+            "habit_id": habit_id,
+            "completed": met,
+            "completed_at": logged_at if met else None,
+            "notes": previous["notes"] if previous else "auto-completed from tracker",
+        }
+
+    for item in data.habits:
+        completions[item.habit_id] = {
+            "habit_id": item.habit_id,
+            "completed": item.completed,
+            "completed_at": logged_at if item.completed else None,
+            "notes": item.notes,
+        }
+
+    updated = doc_id(await db.daily_logs.find_one_and_update(
+        {"user_id": user_id, "goal_id": goal_id, "date": date},
+        {
+            "$set": {
+                "habit_completions": list(completions.values()),
+                "tracker_entries": list(entries.values()),
+                "updated_at": logged_at,
+            },
+            "$setOnInsert": {"created_at": logged_at},
+        },
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    ))
+    await habit_history.record(user_id, goal_id, date, list(completions.values()))
+    await tracker_analytics.invalidate(t.tracker_id for t in data.trackers)
+    await event_bus.publish(user_id, "daily_log.updated", {"goal_id": goal_id, "date": date, "log": updated})
+    return updated
 
 
 async def _get_tracker_direction(tracker_id: str) -> str:
@@ -0,0 +1,96 @@
+"""
+Per-user event bus feeding the /ws WebSocket.
+
+Services call `await publish(user_id, type, data)` after a write the client
+should see (new coaching message, habit toggled, tag action executed,
+proactive message queued). Each open WebSocket holds a subscription queue for
+its user.
+
+Two backends (EVENT_BUS_BACKEND):
+  local — in-process fan-out. Enough for a single API process.
+  mongo — publish inserts into `user_events`; every process tails it with a
+          change stream and fans out to its own subscribers, so an event
+          raised on one replica reaches sockets held by another. Needs Mongo
+          running as a replica set.
+
+Delivery is best effort: a slow client's queue drops its oldest events, and
+clients should refetch after reconnecting rather than expect a replay.
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+from app.config import settings
+from app.database import get_db
+from app.utils.dates import now
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = 100
+
+_subscribers: dict[str, set[asyncio.Queue]] = defaultdict(set)
+
+
+@asynccontextmanager
+async def subscribe(user_id: str):
+    """
+    Queue of events for one user, for as long as the block runs.
+
+    Usage:
+        async with event_bus.subscribe(user_id) as queue:
+            event = await queue.get()
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+    _subscribers[user_id].add(queue)
+    try:
+        yield queue
+    finally:
+        _subscribers[user_id].discard(queue)
+        if not _subscribers[user_id]:
+            del _subscribers[user_id]
+
+
+def _dispatch(user_id: str, event: dict) -> None:
+    for queue in _subscribers.get(user_id, ()):
+        if queue.full():
+            queue.get_nowait()  # Slow client — drop the oldest
+        queue.put_nowait(event)
+
+
+async def publish(user_id: str, event_type: str, data: dict) -> None:
+    """Send an event to the user's open sockets. Never fails the caller."""
+    event = {
+        "type": event_type,
+        "data": jsonable_encoder(data, custom_encoder={ObjectId: str}),
+        "at": now().isoformat(),
+    }
+
+    if settings.event_bus_backend != "mongo":
+        _dispatch(user_id, event)
+        return
+
+    try:
+        await get_db().user_events.insert_one({"user_id": user_id, **event, "created_at": now()})
+    except Exception as e:
+        logger.warning(f"Failed to publish {event_type} for user {user_id}: {e}")
+
+
+async def run_change_stream() -> None:
+    """Background task (mongo backend): fan out events inserted by any process."""
+    pipeline = [{"$match": {"operationType": "insert"}}]
+    while True:
+        try:
+            async with get_db().user_events.watch(pipeline) as stream:
+                async for change in stream:
+                    doc = change["fullDocument"]
+                    _dispatch(doc["user_id"], {"type": doc["type"], "data": doc["data"], "at": doc["at"]})
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Typically a standalone server (no change streams) or a dropped connection
+            logger.warning(f"Event change stream stopped: {e}; retrying in 5s")
+            await asyncio.sleep(5)
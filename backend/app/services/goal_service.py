@@ -1,10 +1,12 @@
+from datetime import date, timedelta
+
 from bson import ObjectId
 
 from app.database import get_db
 from app.models.goal import GoalCreate, GoalUpdate
 from app.models.goal_template import get_template_by_id
 from app.utils.object_id import doc_id
-from app.utils.dates import now
+from app.utils.dates import now, today_str
 
 
 async def get_active_goal(user_id: str = "default") -> dict | None:
@@ -14,6 +16,19 @@ async def get_active_goal(user_id: str = "default") -> dict | None:
     return doc_id(doc) if doc else None
 
 
+async def get_active_goal_version(user_id: str) -> tuple | None:
+    """(id, revision) of the active goal — the ETag for GET /goals, from one projected read."""
+    db = get_db()
+    doc = await db.goals.find_one({"user_id": user_id, "status": "active"}, {"revision": 1})
+    return (str(doc["_id"]), doc.get("revision", 0)) if doc else None
+
+
+async def bump_revision(goal_id: str) -> None:
+    """Mark the goal's GET /goals view (goal, active habits, trackers) as changed."""
+    db = get_db()
+    await db.goals.update_one({"_id": ObjectId(goal_id)}, {"$inc": {"revision": 1}})
+
+
 async def create_goal(data: GoalCreate, user_id: str) -> dict:
     db = get_db()
     existing = await get_active_goal(user_id)
@@ -51,6 +66,7 @@ async def create_goal(data: GoalCreate, user_id: str) -> dict:
             "next_review_date": None,
         },
         "questionnaire_responses": data.questionnaire_responses,
+        "revision": 0,  # Bumped on any change to the goal, its habits or trackers
         "created_at": now(),
         "updated_at": now(),
     }
@@ -103,7 +119,7 @@ async def update_goal(goal_id: str, data: GoalUpdate) -> dict | None:
     if not updates:
         return await get_goal(goal_id)
     updates["updated_at"] = now()
-    await db.goals.update_one({"_id": ObjectId(goal_id)}, {"$set": updates})
+    await db.goals.update_one({"_id": ObjectId(goal_id)}, {"$set": updates, "$inc": {"revision": 1}})
     return await get_goal(goal_id)
 
 
@@ -111,7 +127,7 @@ async def update_goal_ai_context(goal_id: str, ai_context: dict) -> dict | None:
     db = get_db()
     await db.goals.update_one(
         {"_id": ObjectId(goal_id)},
-        {"$set": {"ai_context": ai_context, "updated_at": now()}},
+        {"$set": {"ai_context": ai_context, "updated_at": now()}, "$inc": {"revision": 1}},
     )
     return await get_goal(goal_id)
 
@@ -126,3 +142,85 @@ async def delete_goal(goal_id: str) -> bool:
         await db.coaching_sessions.delete_many({"goal_id": goal_id})
         return True
     return False
+
+
+async def get_dashboard(user_id: str, goal_id: str | None = None, day: str | None = None, days: int = 14) -> dict | None:
+    """
+    Everything the landing page shows, in one aggregation round trip: the goal
+    (active one unless goal_id is given) with its active habits and trackers,
+    the day's log, each tracker's values over the last `days` days and the
+    active coaching session. Returns None when there is no such goal.
+    """
+    db = get_db()
+    day = day or today_str()
+    since = (date.fromisoformat(day) - timedelta(days=days - 1)).isoformat()
+
+    match = {"user_id": user_id}
+    if goal_id:
+        if not ObjectId.is_valid(goal_id):
+            raise ValueError("Invalid goal_id")
+        match["_id"] = ObjectId(goal_id)
+    else:
+        match["status"] = "active"
+
+    # Child collections store goal_id as a string
+    pipeline = [
+        {"$match": match},
+        {"$limit": 1},
+        {"$addFields": {"_goal_id": {"$toString": "$_id"}}},
+        {"$lookup": {
+            "from": "habits",
+            "localField": "_goal_id",
+            "foreignField": "goal_id",
+            "pipeline": [{"$match": {"status": "active"}}, {"$sort": {"order": 1}}],
+            "as": "habits",
+        }},
+        {"$lookup": {
+            "from": "trackers",
+            "localField": "_goal_id",
+            "foreignField": "goal_id",
+            "as": "trackers",
+        }},
+        {"$lookup": {
+            "from": "daily_logs",
+            "localField": "_goal_id",
+            "foreignField": "goal_id",
+            "pipeline": [
+                {"$match": {"user_id": user_id, "date": {"$gte": since, "$lte": day}}},
+                {"$sort": {"date": 1}},
+            ],
+            "as": "logs",
+        }},
+        {"$lookup": {
+            "from": "coaching_sessions",
+            "localField": "_goal_id",
+            "foreignField": "goal_id",
+            "pipeline": [{"$match": {"status": "active"}}, {"$limit": 1}],
+            "as": "sessions",
+        }},
+        {"$project": {"_goal_id": 0}},
+    ]
+
+    docs = await db.goals.aggregate(pipeline).to_list(1)
+    if not docs:
+        return None
+
+    goal = doc_id(docs[0])
+    logs = [doc_id(log) for log in goal.pop("logs")]
+    sessions = goal.pop("sessions")
+    goal["habits"] = [doc_id(h) for h in goal["habits"]]
+    goal["trackers"] = [doc_id(t) for t in goal["trackers"]]
+
+    tracker_series = {t["id"]: [] for t in goal["trackers"]}
+    for log in logs:
+        for entry in log.get("tracker_entries", []):
+            if entry["tracker_id"] in tracker_series:
+                tracker_series[entry["tracker_id"]].append({"date": log["date"], "value": entry["value"]})
+
+    return {
+        "goal": goal,
+        "date": day,
+        "today_log": next((log for log in logs if log["date"] == day), None),
+        "tracker_series": tracker_series,
+        "active_session": doc_id(sessions[0]) if sessions else None,
+    }
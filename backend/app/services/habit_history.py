@@ -0,0 +1,264 @@
+"""
+Compact per-habit completion history.
+
+`habit_histories` holds one document per habit:
+    {habit_id, user_id, goal_id, words: {"<k>": int}, updated_at}
+Bit b of word k is the day EPOCH + 32*k + b — set when the habit was
+completed that day. Daily log writes flip single bits with $bit, so updates
+are atomic and need no read. In memory the words become one Python int (bit i
+= day i since EPOCH), and streaks, rates and formation counts are a few
+shifts, masks and popcounts.
+
+Histories missing for a habit (created before this existed, or not yet
+backfilled — see migrations/backfill_habit_histories.py) are rebuilt from its
+daily logs on first read.
+"""
+import base64
+from datetime import date, datetime
+
+from bson.int64 import Int64
+from pymongo import UpdateOne
+
+from app.database import get_db
+from app.utils.dates import now
+
+EPOCH = date(2020, 1, 1)
+WORD_BITS = 32
+_WORD_MASK = (1 << WORD_BITS) - 1
+
+
+def day_index(day: str | date) -> int:
+    if isinstance(day, str):
+        day = date.fromisoformat(day)
+    return (day - EPOCH).days
+
+
+def _bit_update(day: str, completed: bool) -> dict:
+    index = day_index(day)
+    field = f"words.{index // WORD_BITS}"
+    bit = 1 << (index % WORD_BITS)
+    return {field: {"or": Int64(bit)} if completed else {"and": Int64(_WORD_MASK & ~bit)}}
+
+
+async def record(user_id: str, goal_id: str, day: str, completions: list[dict]) -> None:
+    """
+    Mirror a log's habit_completions for one day into the histories (one bulk write).
+
+    Only existing histories are updated: a habit without one is rebuilt from its
+    daily logs (which already hold this day), so its earlier completions aren't lost.
+    """
+    if not completions or day_index(day) < 0:
+        return
+    db = get_db()
+    result = await db.habit_histories.bulk_write([
+        UpdateOne(
+            {"habit_id": c["habit_id"]},
+            {"$bit": _bit_update(day, bool(c.get("completed"))), "$set": {"updated_at": now()}},
+        )
+        for c in completions
+    ], ordered=False)
+    if result.matched_count == len(completions):
+        return
+
+    ids = [c["habit_id"] for c in completions]
+    existing = set(await db.habit_histories.distinct("habit_id", {"habit_id": {"$in": ids}}))
+    missing = [{"id": habit_id, "goal_id": goal_id} for habit_id in ids if habit_id not in existing]
+    if missing:
+        await rebuild(missing, user_id)
+
+
+def to_int(words: dict) -> int:
+    """Stored words → one int, bit i = day i since EPOCH."""
+    bits = 0
+    for k, word in words.items():
+        bits |= (int(word) & _WORD_MASK) << (int(k) * WORD_BITS)
+    return bits
+
+
+async def load(habits: list[dict], user_id: str | None = None) -> dict[str, int]:
+    """Completion bits per habit id, rebuilding any history that doesn't exist yet."""
+    ids = [h["id"] for h in habits]
+    if not ids:
+        return {}
+    cursor = get_db().habit_histories.find({"habit_id": {"$in": ids}}, {"habit_id": 1, "words": 1})
+    bits = {doc["habit_id"]: to_int(doc.get("words", {})) async for doc in cursor}
+
+    missing = [h for h in habits if h["id"] not in bits]
+    if missing:
+        bits.update(await rebuild(missing, user_id))
+    return bits
+
+
+async def rebuild(habits: list[dict], user_id: str | None = None) -> dict[str, int]:
+    """
+    Recompute histories for these habits from daily_logs and merge them into the stored ones.
+    user_id overrides the habits' own, for habits stored without one.
+    """
+    db = get_db()
+    by_goal: dict[tuple, list[dict]] = {}
+    for h in habits:
+        by_goal.setdefault((user_id or h.get("user_id"), h["goal_id"]), []).append(h)
+
+    bits = {h["id"]: 0 for h in habits}
+    for (owner, goal_id), goal_habits in by_goal.items():
+        wanted = set(h["id"] for h in goal_habits)
+        cursor = db.daily_logs.find(
+            {"user_id": owner, "goal_id": goal_id, "habit_completions.habit_id": {"$in": list(wanted)}},
+            {"date": 1, "habit_completions.habit_id": 1, "habit_completions.completed": 1},
+        )
+        async for log in cursor:
+            index = day_index(log["date"])
+            if index < 0:
+                continue
+            for c in log.get("habit_completions", ()):
+                if c["habit_id"] in wanted and c.get("completed"):
+                    bits[c["habit_id"]] |= 1 << index
+
+    # OR the rebuilt bits in rather than $set the words, so a concurrent record()
+    # $bit landing between the log scan and this write isn't overwritten
+    operations = []
+    for h in habits:
+        value = bits[h["id"]]
+        update = {
+            "$set": {"updated_at": now()},
+            "$setOnInsert": {"habit_id": h["id"], "user_id": user_id or h.get("user_id"), "goal_id": h["goal_id"]},
+        }
+        words = {
+            f"words.{k}": {"or": Int64((value >> (k * WORD_BITS)) & _WORD_MASK)}
+            for k in range((value.bit_length() + WORD_BITS - 1) // WORD_BITS)
+            if (value >> (k * WORD_BITS)) & _WORD_MASK
+        }
+        if words:
+            update["$bit"] = words
+        operations.append(UpdateOne({"habit_id": h["id"]}, update, upsert=True))
+    if operations:
+        await db.habit_histories.bulk_write(operations, ordered=False)
+    return bits
+
+
+# ────────────────────────────────────────────────────────────────
+# BIT OPERATIONS
+# ────────────────────────────────────────────────────────────────
+
+def window(bits: int, end: int, days: int) -> int:
+    """The `days` days ending at day index `end`, as an int with bit 0 = the oldest day."""
+    start = end - days + 1
+    if start < 0:
+        return (bits & ((1 << (end + 1)) - 1)) if end >= 0 else 0
+    return (bits >> start) & ((1 << days) - 1)
+
+
+def completions_in(bits: int, end: int, days: int) -> int:
+    return window(bits, end, days).bit_count()
+
+
+def run_ending_at(bits: int, end: int) -> int:
+    """Consecutive completed days ending exactly at day `end` (0 if `end` itself isn't done)."""
+    if end < 0:
+        return 0
+    mask = (1 << (end + 1)) - 1
+    gaps = ~bits & mask
+    if gaps == 0:
+        return end + 1
+    return end - (gaps.bit_length() - 1)
+
+
+def longest_run(bits: int) -> int:
+    """Longest run of consecutive set bits (each step erodes every run by one day)."""
+    longest = 0
+    while bits:
+        bits &= bits >> 1
+        longest += 1
+    return longest
+
+
+def streaks(bits: int, today: str | date | None = None, activated: str | date | None = None) -> dict:
+    """
+    Streak state over the full history, counting only days from activation to today.
+
+    Today is still open: until it's done, streaks run through yesterday and a
+    miss only counts once the day is over.
+      current_streak          — consecutive done days ending today (or yesterday)
+      best_streak             — longest run since activation
+      consecutive_missed      — settled days missed in a row, ending yesterday
+      streak_before_last_miss — the run the most recent miss broke
+    """
+    end = day_index(today or date.today())
+    first = max(0, day_index(activated)) if activated else 0
+    if end < first:
+        return {"current_streak": 0, "best_streak": 0, "consecutive_missed": 0, "streak_before_last_miss": 0}
+
+    span = bits & ((1 << (end + 1)) - 1)
+    span = span >> first << first
+    settled = end if span >> end & 1 else end - 1
+
+    # The most recent settled miss, if any: highest unset bit in [first, settled]
+    window_mask = ((1 << (settled + 1)) - 1) >> first << first if settled >= first else 0
+    gaps = ~span & window_mask
+    last_miss = gaps.bit_length() - 1 if gaps else None
+
+    consecutive_missed = 0
+    streak_before_last_miss = 0
+    if last_miss is not None:
+        # Walk back over the most recent run of misses: highest done day before it
+        done_before = span & ((1 << last_miss) - 1)
+        run_start = done_before.bit_length() if done_before else first
+        if last_miss == settled:
+            consecutive_missed = last_miss - run_start + 1
+        streak_before_last_miss = run_ending_at(span, run_start - 1) if run_start > first else 0
+
+    return {
+        "current_streak": run_ending_at(span, settled) if settled >= first else 0,
+        "best_streak": longest_run(span),
+        "consecutive_missed": consecutive_missed,
+        "streak_before_last_miss": streak_before_last_miss,
+    }
+
+
+def stats(bits: int, today: str | date | None = None, activated: str | date | None = None) -> dict:
+    """Formation count, streaks and recent completion counts for one habit."""
+    end = day_index(today or date.today())
+    past = bits & ((1 << (end + 1)) - 1) if end >= 0 else 0
+    return {
+        "formation_count": past.bit_count(),
+        **streaks(bits, today, activated),
+        "completion_last_7_days": completions_in(past, end, 7),
+        "completion_last_14_days": completions_in(past, end, 14),
+        "completion_last_30_days": completions_in(past, end, 30),
+        "completed_today": bool(past >> end & 1) if end >= 0 else False,
+    }
+
+
+def encode(bits: int, start: str, end: str) -> dict:
+    """Days start..end as base64 (little-endian: bit i of the bytes = start + i days) for clients."""
+    first, last = day_index(start), day_index(end)
+    days = max(0, last - first + 1)
+    shifted = bits >> first if first >= 0 else bits << -first
+    segment = shifted & ((1 << days) - 1)
+    return {
+        "start": start,
+        "end": end,
+        "days": days,
+        "bits": base64.b64encode(segment.to_bytes((days + 7) // 8, "little")).decode(),
+    }
+
+
+def first_day(bits: int) -> str | None:
+    if not bits:
+        return None
+    lowest = (bits & -bits).bit_length() - 1
+    return date.fromordinal(EPOCH.toordinal() + lowest).isoformat()
+
+
+def activated_day(habit: dict) -> str | None:
+    """When the habit's streaks start counting: activation, or creation for habits stored without activated_at."""
+    for field in ("activated_at", "created_at"):
+        value = habit.get(field)
+        if isinstance(value, datetime):
+            return value.date().isoformat()
+        if isinstance(value, str) and value:
+            try:
+                return date.fromisoformat(value[:10]).isoformat()
+            except ValueError:
+                continue
+    return None
@@ -3,6 +3,7 @@ from datetime import datetime, timedelta
 
 from app.database import get_db
 from app.models.habit import HabitCreate, HabitUpdate
+from app.services import goal_service
 from app.utils.object_id import doc_id
 from app.utils.dates import now
 
@@ -37,6 +38,7 @@ async def create_habit(data: HabitCreate, user_id: str) -> dict:
     }
     result = await db.habits.insert_one(doc)
     doc["_id"] = result.inserted_id
+    await goal_service.bump_revision(data.goal_id)
     return doc_id(doc)
 
 
@@ -67,4 +69,19 @@ async def update_habit(habit_id: str, data: HabitUpdate) -> dict | None:
         tomorrow_start = tomorrow.replace(hour=0, minute=0, second=0, microsecond=0)
         updates["activated_at"] = tomorrow_start
     await db.habits.update_one({"_id": ObjectId(habit_id)}, {"$set": updates})
-    return await get_habit(habit_id)
+    habit = await get_habit(habit_id)
+    if habit:
+        await goal_service.bump_revision(habit["goal_id"])
+    return habit
+
+
+async def mark_formation_celebrated(habit_id: str) -> None:
+    """Record that the habit's formation (8 completions) has been celebrated, so it isn't again."""
+    db = get_db()
+    result = await db.habits.find_one_and_update(
+        {"_id": ObjectId(habit_id)},
+        {"$set": {"formation_celebrated": True, "updated_at": now()}},
+        projection={"goal_id": 1},
+    )
+    if result:
+        await goal_service.bump_revision(result["goal_id"])
@@ -0,0 +1,387 @@
+"""
+Provider model catalogs, cached per (provider, base_url, API key).
+
+A user on their own OpenAI key and a user on the global OpenRouter key see
+different lists, so each combination has its own catalog. The key only enters
+the cache key as a short hash.
+
+Catalogs are served stale-while-revalidate: younger than FRESH_TTL they're
+returned as-is; up to STALE_TTL they're still returned at once while one
+background task refetches; older than that (or never fetched) the caller
+waits for the fetch, and concurrent callers share it. The raw list goes
+through shared_state, so one worker's fetch serves the others.
+
+Each Catalog carries what lookups need prebuilt: an id set for validation,
+an id → model map for pricing, and an n-gram index for search. Listing
+pages (filtered, sorted, paginated, trimmed to the requested fields) are
+rendered to JSON once per catalog version and served from memory after that.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta
+
+import httpx
+
+from app.services import shared_state
+from app.utils import tracing
+
+logger = logging.getLogger(__name__)
+
+FRESH_TTL = timedelta(minutes=30)
+STALE_TTL = timedelta(hours=24)
+# Catalogs held per process (one per distinct provider/base_url/key in use)
+MAX_CATALOGS = 64
+# Search index covers substrings up to this length; longer queries intersect them
+NGRAM = 3
+# Rendered listing pages kept per process, across catalog versions
+MAX_PAGES = 256
+
+# Fields a listing can return, and the ones it returns by default
+FIELDS = ("id", "name", "context_length", "pricing", "input_modalities", "output_modalities", "description")
+DEFAULT_FIELDS = ("id", "name", "context_length", "pricing")
+# sort name -> (summary key, descending); unknown values (None) always sort last
+SORTS = {
+    "price": ("prompt_price", False),
+    "-price": ("prompt_price", True),
+    "context_length": ("context_length", False),
+    "-context_length": ("context_length", True),
+    "name": ("name", False),
+}
+
+# Claude models (Anthropic doesn't have a public models API).
+# Pricing is USD per token, the same unit OpenRouter's /models uses.
+CLAUDE_MODELS = [
+    {
+        "id": "claude-3-5-sonnet-20241022",
+        "name": "Claude 3.5 Sonnet",
+        "context_length": 200000,
+        "pricing": {"prompt": "0.000003", "completion": "0.000015",
+                    "input_cache_read": "0.0000003", "input_cache_write": "0.00000375"},
+    },
+    {
+        "id": "claude-3-5-haiku-20241022",
+        "name": "Claude 3.5 Haiku",
+        "context_length": 200000,
+        "pricing": {"prompt": "0.0000008", "completion": "0.000004",
+                    "input_cache_read": "0.00000008", "input_cache_write": "0.000001"},
+    },
+    {
+        "id": "claude-3-opus-20240229",
+        "name": "Claude 3 Opus",
+        "context_length": 200000,
+        "pricing": {"prompt": "0.000015", "completion": "0.000075",
+                    "input_cache_read": "0.0000015", "input_cache_write": "0.00001875"},
+    },
+    {
+        "id": "claude-3-sonnet-20240229",
+        "name": "Claude 3 Sonnet",
+        "context_length": 200000,
+        "pricing": {"prompt": "0.000003", "completion": "0.000015",
+                    "input_cache_read": "0.0000003", "input_cache_write": "0.00000375"},
+    },
+    {
+        "id": "claude-3-haiku-20240307",
+        "name": "Claude 3 Haiku",
+        "context_length": 200000,
+        "pricing": {"prompt": "0.00000025", "completion": "0.00000125",
+                    "input_cache_read": "0.00000003", "input_cache_write": "0.0000003"},
+    },
+]
+
+
+class Catalog:
+    """One provider's model list plus the lookup structures built from it."""
+
+    def __init__(self, provider: str, models: list[dict], fetched_at: datetime):
+        self.provider = provider
+        self.models = models
+        self.fetched_at = fetched_at
+        self.by_id = {m.get("id", ""): m for m in models}
+        self.ids = frozenset(self.by_id)
+        # OpenAI direct uses "gpt-4o" where the OpenRouter list has "openai/gpt-4o"
+        self.by_bare_id = {model_id.split("/", 1)[-1]: m for model_id, m in reversed(self.by_id.items())}
+        # Listing entries (FIELDS plus numeric prices for filtering and sorting)
+        self.summaries = [_summary(m) for m in models]
+        # Hashes everything the listing shows, so a refetch of the same list keeps cached pages
+        # and ETags valid and any visible change (name, context, modality, price) invalidates them
+        self.version = hashlib.blake2b(
+            json.dumps(self.summaries, sort_keys=True, default=str).encode(), digest_size=8,
+        ).hexdigest()
+        self._ngrams: dict[str, list[int]] = defaultdict(list)
+        self._haystacks = []
+        for i, m in enumerate(models):
+            haystack = f"{m.get('id', '')}\n{m.get('name', '')}".lower()
+            self._haystacks.append(haystack)
+            grams = {haystack[j:j + n] for n in range(1, NGRAM + 1) for j in range(len(haystack) - n + 1)}
+            for gram in grams:
+                self._ngrams[gram].append(i)
+
+    def __len__(self) -> int:
+        return len(self.models)
+
+    def age(self) -> timedelta:
+        return datetime.utcnow() - self.fetched_at
+
+    def search(self, query: str) -> list[dict]:
+        """Models whose id or name contains query (case-insensitive), in catalog order."""
+        return [self.models[i] for i in self._search_indices(query)]
+
+    def _search_indices(self, query: str) -> list[int]:
+        query = query.strip().lower()
+        if not query:
+            return list(range(len(self.models)))
+        if len(query) <= NGRAM:
+            return list(self._ngrams.get(query, ()))
+
+        # Candidates contain every n-gram of the query; confirm the full substring on those only
+        postings = sorted(
+            (self._ngrams.get(query[j:j + NGRAM], ()) for j in range(len(query) - NGRAM + 1)),
+            key=len,
+        )
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                return []
+        return [i for i in sorted(candidates) if query in self._haystacks[i]]
+
+
+def _price(value) -> float | None:
+    # Per-token USD string; OpenRouter uses "-1" for routers with variable pricing
+    try:
+        price = float(value)
+    except (TypeError, ValueError):
+        return None
+    return price if price >= 0 else None
+
+
+def _summary(m: dict) -> dict:
+    architecture = m.get("architecture") or {}
+    inputs = architecture.get("input_modalities")
+    outputs = architecture.get("output_modalities")
+    if inputs is None and architecture.get("modality"):
+        # Older shape: "text+image->text"
+        source, _, target = architecture["modality"].partition("->")
+        inputs, outputs = source.split("+"), target.split("+")
+    pricing = m.get("pricing") or {}
+    return {
+        "id": m.get("id", ""),
+        "name": m.get("name", ""),
+        "context_length": m.get("context_length"),
+        "pricing": pricing,
+        "input_modalities": inputs or ["text"],
+        "output_modalities": outputs or ["text"],
+        "description": m.get("description", ""),
+        "prompt_price": _price(pricing.get("prompt")),
+    }
+
+
+# cache key -> Catalog
+_catalogs: dict[str, Catalog] = {}
+# cache key -> in-flight fetch
+_fetches: dict[str, asyncio.Task] = {}
+
+_static: dict[str, Catalog] = {}
+
+
+def _cache_key(provider: str, base_url: str, api_key: str | None) -> str:
+    fingerprint = hashlib.blake2b(f"{base_url}|{api_key or ''}".encode(), digest_size=6).hexdigest()
+    return f"models:{provider}:{fingerprint}"
+
+
+def static_catalog(provider: str, models: list[dict]) -> Catalog:
+    """Catalog for a provider without a models API (built once)."""
+    if provider not in _static:
+        _static[provider] = Catalog(provider, models, datetime.utcnow())
+    return _static[provider]
+
+
+async def get_catalog(provider: str, base_url: str, api_key: str | None, force: bool = False) -> Catalog:
+    """
+    The provider's catalog for this key, fetching only when there's nothing usable.
+
+    Raises httpx.HTTPError when a fetch is needed and fails.
+    """
+    key = _cache_key(provider, base_url, api_key)
+
+    if not force:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            entry = await shared_state.get_cached_entry(key, STALE_TTL)
+            if entry is not None:
+                catalog = _store(key, Catalog(provider, entry[0], entry[1]))
+
+        if catalog is not None and catalog.age() < STALE_TTL:
+            if catalog.age() >= FRESH_TTL:
+                _start_fetch(key, provider, base_url, api_key)
+            return catalog
+
+    # Shielded: a cancelled caller (client disconnect) mustn't cancel the fetch other callers share
+    return await asyncio.shield(_start_fetch(key, provider, base_url, api_key))
+
+
+def find(model_id: str) -> dict | None:
+    """A model by id from any catalog this process holds (OpenAI's bare "gpt-4o" matches "openai/gpt-4o")."""
+    catalogs = (static_catalog("anthropic", CLAUDE_MODELS), *_catalogs.values())
+    for catalog in catalogs:
+        if model_id in catalog.by_id:
+            return catalog.by_id[model_id]
+    for catalog in catalogs:
+        if model_id in catalog.by_bare_id:
+            return catalog.by_bare_id[model_id]
+    return None
+
+
+def _store(key: str, catalog: Catalog) -> Catalog:
+    _catalogs.pop(key, None)
+    _catalogs[key] = catalog
+    while len(_catalogs) > MAX_CATALOGS:
+        del _catalogs[next(iter(_catalogs))]
+    return catalog
+
+
+def _start_fetch(key: str, provider: str, base_url: str, api_key: str | None) -> asyncio.Task:
+    """One fetch per key at a time; callers that need the result await the returned task."""
+    task = _fetches.get(key)
+    if task is None:
+        task = asyncio.create_task(_fetch(key, provider, base_url, api_key))
+        task.add_done_callback(lambda t: _fetch_done(key, t))
+        _fetches[key] = task
+    return task
+
+
+def _fetch_done(key: str, task: asyncio.Task) -> None:
+    _fetches.pop(key, None)
+    if not task.cancelled() and task.exception() is not None:
+        # Background refreshes have no awaiter; the stale catalog keeps being served
+        logger.warning(f"Model catalog fetch for {key} failed: {task.exception()}")
+
+
+async def _fetch(key: str, provider: str, base_url: str, api_key: str | None) -> Catalog:
+    headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+    async with httpx.AsyncClient(timeout=30.0, event_hooks=tracing.httpx_event_hooks()) as client:
+        response = await client.get(f"{base_url}/models", headers=headers)
+        logger.info(f"{provider} /models response: {response.status_code}")
+        response.raise_for_status()
+        models = response.json().get("data", [])
+
+    catalog = _store(key, Catalog(provider, models, datetime.utcnow()))
+    await shared_state.put_cached(key, models)
+    return catalog
+
+
+# ────────────────────────────────────────────────────────────────
+# LISTING
+# ────────────────────────────────────────────────────────────────
+
+# (version, query...) -> rendered JSON
+_pages: OrderedDict[tuple, bytes] = OrderedDict()
+# (version, filters, sort) -> (summaries, id -> position)
+_results: OrderedDict[tuple, tuple] = OrderedDict()
+
+
+def _encode_cursor(model_id: str) -> str:
+    return base64.urlsafe_b64encode(model_id.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> str:
+    try:
+        return base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    except ValueError:
+        raise ValueError("Invalid cursor")
+
+
+def _filtered(
+    catalog: Catalog, search: str, min_context: int | None, max_price: float | None,
+    modality: str | None, sort: str | None,
+) -> tuple[list[dict], dict]:
+    key = (catalog.version, search.strip().lower(), min_context, max_price, modality, sort)
+    if key in _results:
+        _results.move_to_end(key)
+        return _results[key]
+
+    summaries = catalog.summaries
+    rows = [summaries[i] for i in catalog._search_indices(search)]
+    if min_context is not None:
+        rows = [r for r in rows if (r["context_length"] or 0) >= min_context]
+    if max_price is not None:
+        # max_price is USD per million prompt tokens; models with unknown pricing are left out
+        rows = [r for r in rows if r["prompt_price"] is not None and r["prompt_price"] * 1_000_000 <= max_price]
+    if modality:
+        rows = [r for r in rows if modality in r["input_modalities"]]
+    if sort:
+        field, descending = SORTS[sort]
+        known = [r for r in rows if r[field] is not None]
+        known.sort(key=lambda r: r[field], reverse=descending)
+        rows = known + [r for r in rows if r[field] is None]
+
+    result = (rows, {r["id"]: i for i, r in enumerate(rows)})
+    _results[key] = result
+    while len(_results) > MAX_PAGES:
+        _results.popitem(last=False)
+    return result
+
+
+def render_page(
+    catalog: Catalog,
+    search: str = "",
+    min_context: int | None = None,
+    max_price: float | None = None,
+    modality: str | None = None,
+    sort: str | None = None,
+    fields: list[str] | None = None,
+    cursor: str | None = None,
+    limit: int | None = None,
+) -> bytes:
+    """
+    A listing as JSON bytes, rendered once per catalog version and query.
+
+    Without limit: a bare list of every match (the original GET /models shape).
+    With limit: {"items", "next_cursor", "total", "version"}; pass next_cursor
+    back as cursor for the following page. Cursors name the last model seen,
+    so they survive a catalog refresh unless that model disappears.
+
+    Raises ValueError for an unknown sort or field, or a stale/invalid cursor.
+    """
+    if sort and sort not in SORTS:
+        raise ValueError(f"Invalid sort. Must be one of: {', '.join(SORTS)}")
+    fields = tuple(fields) if fields else DEFAULT_FIELDS
+    unknown = [f for f in fields if f not in FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Must be among: {', '.join(FIELDS)}")
+
+    key = (catalog.version, search.strip().lower(), min_context, max_price, modality, sort, fields, cursor, limit)
+    if key in _pages:
+        _pages.move_to_end(key)
+        return _pages[key]
+
+    rows, positions = _filtered(catalog, search, min_context, max_price, modality, sort)
+    start = 0
+    if cursor:
+        last_id = _decode_cursor(cursor)
+        if last_id not in positions:
+            raise ValueError("Cursor no longer matches the model list; start again without it")
+        start = positions[last_id] + 1
+
+    page = rows[start:start + limit] if limit else rows[start:]
+    items = [{f: r[f] for f in fields} for r in page]
+    if limit:
+        more = start + limit < len(rows)
+        body = {
+            "items": items,
+            "next_cursor": _encode_cursor(page[-1]["id"]) if more and page else None,
+            "total": len(rows),
+            "version": catalog.version,
+        }
+    else:
+        body = items
+
+    rendered = json.dumps(body, separators=(",", ":")).encode()
+    _pages[key] = rendered
+    while len(_pages) > MAX_PAGES:
+        _pages.popitem(last=False)
+    return rendered
@@ -0,0 +1,169 @@
+"""
+Per-task LLM routing: which model, how many output tokens, what timeout.
+
+Every provider call names its task (chat, summary, proactive, ...). ROUTES
+gives each task its output budget, temperature, HTTP timeout and p95 latency
+SLO. Light tasks — short structured outputs — run on the provider's light
+model (LIGHT_MODELS) when one is configured. Any other task whose p95 over the
+last SLO_WINDOW minutes is above its SLO is downgraded to the light model
+until that window has aged out, then tries the primary model again.
+
+A model the user picked explicitly for a task type (POST /models/select with
+a task) is never rerouted.
+
+MODEL_ROUTES overrides table entries as JSON, e.g.
+    {"summary": {"max_tokens": 600}, "chat": {"slo_p95_s": 12}}
+"""
+import json
+import logging
+import time
+from collections import defaultdict, deque
+
+from app.config import settings
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROUTE = {"max_tokens": 4096, "temperature": 0.7, "timeout_s": 60.0, "slo_p95_s": 30.0, "light": False}
+
+ROUTES = {
+    "chat":                {"max_tokens": 4096, "temperature": 0.7, "timeout_s": 60.0, "slo_p95_s": 20.0, "light": False},
+    "initial_session":     {"max_tokens": 4096, "temperature": 0.7, "timeout_s": 60.0, "slo_p95_s": 20.0, "light": False},
+    "review":              {"max_tokens": 4096, "temperature": 0.7, "timeout_s": 60.0, "slo_p95_s": 25.0, "light": False},
+    "reask":               {"max_tokens": 2048, "temperature": 0.2, "timeout_s": 30.0, "slo_p95_s": 10.0, "light": False},
+    "summary":             {"max_tokens": 1024, "temperature": 0.3, "timeout_s": 30.0, "slo_p95_s": 8.0,  "light": True},
+    "proactive":           {"max_tokens": 512,  "temperature": 0.7, "timeout_s": 20.0, "slo_p95_s": 6.0,  "light": True},
+    "goal_analysis":       {"max_tokens": 1024, "temperature": 0.3, "timeout_s": 30.0, "slo_p95_s": 10.0, "light": True},
+    "progress_evaluation": {"max_tokens": 1024, "temperature": 0.3, "timeout_s": 30.0, "slo_p95_s": 10.0, "light": True},
+}
+
+# Latency samples older than this don't count toward a task's p95
+SLO_WINDOW_S = 600
+# Fewer samples than this and we don't judge the SLO
+SLO_MIN_SAMPLES = 20
+
+# (task, model) -> deque of (monotonic time, seconds)
+_latencies: dict[tuple, deque] = defaultdict(lambda: deque(maxlen=200))
+
+
+def _parse_overrides(raw: str) -> dict:
+    """
+    MODEL_ROUTES as {task: {field: value}}, keeping only known fields with
+    values of the right type; anything else is logged and dropped.
+    """
+    if not raw:
+        return {}
+    try:
+        parsed = json.loads(raw)
+    except ValueError:
+        logger.warning("MODEL_ROUTES is not valid JSON — ignoring it")
+        return {}
+    if not isinstance(parsed, dict):
+        logger.warning("MODEL_ROUTES must be a JSON object of {task: {field: value}} — ignoring it")
+        return {}
+
+    overrides = {}
+    for task, entry in parsed.items():
+        if not isinstance(entry, dict):
+            logger.warning(f"MODEL_ROUTES[{task!r}] is not an object — ignoring it")
+            continue
+        valid = {}
+        for field, value in entry.items():
+            default = DEFAULT_ROUTE.get(field)
+            if default is None:
+                logger.warning(f"MODEL_ROUTES[{task!r}]: unknown field {field!r} — ignoring it")
+            elif isinstance(default, bool):
+                if isinstance(value, bool):
+                    valid[field] = value
+                else:
+                    logger.warning(f"MODEL_ROUTES[{task!r}][{field!r}] must be true or false — ignoring it")
+            elif _is_number(value) and (value > 0 or (field == "temperature" and value == 0)):
+                valid[field] = type(default)(value)
+            else:
+                logger.warning(f"MODEL_ROUTES[{task!r}][{field!r}] must be a positive number — ignoring it")
+        overrides[task] = valid
+    return overrides
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+# Parsed once: route_for runs on every LLM call
+_OVERRIDES = _parse_overrides(settings.model_routes)
+
+
+def route_for(task: str | None) -> dict:
+    """Routing entry for a task, with MODEL_ROUTES overrides applied."""
+    return {**DEFAULT_ROUTE, **ROUTES.get(task, {}), **_OVERRIDES.get(task, {})}
+
+
+def light_model(provider: str) -> str | None:
+    """LIGHT_MODELS entry for a provider ("openrouter=openai/gpt-4o-mini,anthropic=claude-3-5-haiku-...")."""
+    for part in settings.light_models.split(","):
+        name, _, model = part.partition("=")
+        if name.strip() == provider and model.strip():
+            return model.strip()
+    return None
+
+
+def record_latency(task: str | None, model: str, seconds: float) -> None:
+    _latencies[(task, model)].append((time.monotonic(), seconds))
+
+
+def p95(task: str | None, model: str) -> float | None:
+    """p95 latency of the task on this model over the SLO window, or None with too few samples."""
+    cutoff = time.monotonic() - SLO_WINDOW_S
+    samples = sorted(s for at, s in _latencies.get((task, model), ()) if at >= cutoff)
+    if len(samples) < SLO_MIN_SAMPLES:
+        return None
+    return samples[min(len(samples) - 1, int(0.95 * len(samples)))]
+
+
+def resolve(task: str | None, model: str, provider: str, pinned: bool = False) -> dict:
+    """
+    The call plan for a task: model, max_tokens, temperature, timeout_s and
+    why the model was chosen (route: "selected" | "light" | "downgraded" | "pinned").
+    """
+    route = route_for(task)
+    plan = {
+        "model": model,
+        "max_tokens": route["max_tokens"],
+        "temperature": route["temperature"],
+        "timeout_s": route["timeout_s"],
+        "route": "pinned" if pinned else "selected",
+    }
+    if pinned:
+        return plan
+
+    light = light_model(provider)
+    if not light or light == model:
+        return plan
+
+    if route["light"]:
+        plan.update(model=light, route="light")
+        return plan
+
+    observed = p95(task, model)
+    if observed is not None and observed > route["slo_p95_s"]:
+        logger.info(f"{task} p95 {observed:.1f}s > SLO {route['slo_p95_s']}s on {model} — using {light}")
+        metrics.LLM_DOWNGRADES.labels(task or "other").inc()
+        plan.update(model=light, route="downgraded")
+    return plan
+
+
+def slo_report() -> list[dict]:
+    """Current p95 per task and model against each task's SLO."""
+    rows = []
+    for (task, model) in list(_latencies):
+        route = route_for(task)
+        observed = p95(task, model)
+        rows.append({
+            "task": task,
+            "model": model,
+            "samples": len(_latencies[(task, model)]),
+            "p95_s": round(observed, 2) if observed is not None else None,
+            "slo_p95_s": route["slo_p95_s"],
+            "over_slo": observed is not None and observed > route["slo_p95_s"],
+        })
+    return sorted(rows, key=lambda r: (str(r["task"]), r["model"]))
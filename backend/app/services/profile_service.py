@@ -0,0 +1,79 @@
+"""
+Stored request profiles.
+
+Each profiled request (see app/utils/profiling.py) is one document in
+`request_profiles`, keyed by request_id. The speedscope JSON opens directly in
+https://www.speedscope.app; the text tree is for a quick look from the API.
+Profiles expire after `profile_retention_days`.
+"""
+import logging
+
+from bson import ObjectId
+
+from app.database import get_db
+from app.utils.dates import now
+
+logger = logging.getLogger(__name__)
+
+# Stay well under Mongo's 16 MB document limit — a longer profile keeps only its text tree
+MAX_SPEEDSCOPE_BYTES = 8 * 1024 * 1024
+
+
+async def save_profile(
+    request_id: str,
+    name: str,
+    user_id: str,
+    method: str,
+    path: str,
+    duration_ms: float,
+    speedscope: str,
+    text: str,
+) -> None:
+    """Store one profile. Never fails the profiled request."""
+    db = get_db()
+    truncated = len(speedscope) > MAX_SPEEDSCOPE_BYTES
+    try:
+        await db.request_profiles.insert_one({
+            "request_id": request_id,
+            "name": name,
+            "user_id": user_id,
+            "method": method,
+            "path": path,
+            "duration_ms": round(duration_ms, 1),
+            "speedscope": None if truncated else speedscope,
+            "speedscope_dropped": truncated,
+            "text": text,
+            "created_at": now(),
+        })
+    except Exception as e:
+        logger.warning(f"Failed to save request profile {request_id}: {e}")
+
+
+async def list_profiles(user_id: str | None = None, name: str | None = None, limit: int = 50) -> list[dict]:
+    """Most recent profiles first, without the (large) artifacts."""
+    db = get_db()
+    query = {}
+    if user_id:
+        query["user_id"] = user_id
+    if name:
+        query["name"] = name
+
+    cursor = db.request_profiles.find(query, {"_id": 0, "speedscope": 0, "text": 0})
+    return await cursor.sort("created_at", -1).limit(limit).to_list(limit)
+
+
+async def get_profile(request_id: str) -> dict | None:
+    db = get_db()
+    return await db.request_profiles.find_one({"request_id": request_id}, {"_id": 0})
+
+
+async def set_user_profiling(user_id: str, enabled: bool) -> bool:
+    """Profile every covered request this user makes, until switched off. False if there is no such user."""
+    if not ObjectId.is_valid(user_id):
+        raise ValueError("Invalid user_id")
+    db = get_db()
+    result = await db.users.update_one(
+        {"_id": ObjectId(user_id)},
+        {"$set": {"profile_requests": enabled, "updated_at": now()}},
+    )
+    return bool(result.matched_count)
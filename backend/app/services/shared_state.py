@@ -0,0 +1,145 @@
+"""
+Settings and caches shared by every worker and replica, backed by Mongo.
+
+Two kinds of state:
+  settings — small runtime values an admin or user changes (selected model,
+             session lock). Source of truth is `settings` {key, value}.
+  caches   — expensive fetched data (provider model lists) stored in
+             `shared_cache` {key, value, fetched_at}, so one worker's fetch
+             serves all of them and they all expire it at the same moment.
+
+Each process keeps a local copy of what it has read. Settings are re-read
+after SHARED_STATE_TTL_SECONDS, so a change made on one worker shows up
+everywhere within that window. With SHARED_STATE_CHANGE_STREAM=true (needs a
+replica set) every process also drops its copies as soon as Mongo reports a
+write, and the TTL only backs that up.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+
+from app.config import settings
+from app.database import get_db
+from app.utils import metrics
+from app.utils.dates import now
+
+logger = logging.getLogger(__name__)
+
+# key -> (value, monotonic time read)
+_local_settings: dict[str, tuple] = {}
+# key -> (value, fetched_at as stored in Mongo)
+_local_caches: dict[str, tuple] = {}
+
+_MISSING = object()
+
+
+def _label(key: str) -> str:
+    # "models:openrouter" → "models", keeping metric labels bounded
+    return key.split(":", 1)[0]
+
+
+# ────────────────────────────────────────────────────────────────
+# SETTINGS
+# ────────────────────────────────────────────────────────────────
+
+async def get_setting(key: str, default=None):
+    """Current value of a shared setting, or default when it was never set."""
+    local = _local_settings.get(key)
+    if local is not None and time.monotonic() - local[1] < settings.shared_state_ttl_seconds:
+        metrics.cache_lookup(_label(key), hit=True)
+        return default if local[0] is _MISSING else local[0]
+    metrics.cache_lookup(_label(key), hit=False)
+
+    db = get_db()
+    if db is None:
+        return default
+    doc = await db.settings.find_one({"key": key})
+    value = doc["value"] if doc else _MISSING
+    _local_settings[key] = (value, time.monotonic())
+    return default if value is _MISSING else value
+
+
+async def set_setting(key: str, value) -> None:
+    """Store a shared setting. Other processes see it within the TTL (or at once, with the change stream)."""
+    db = get_db()
+    await db.settings.update_one(
+        {"key": key},
+        {"$set": {"key": key, "value": value, "updated_at": now()}},
+        upsert=True,
+    )
+    _local_settings[key] = (value, time.monotonic())
+
+
+# ────────────────────────────────────────────────────────────────
+# CACHES
+# ────────────────────────────────────────────────────────────────
+
+async def get_cached(key: str, ttl: timedelta):
+    """A cached value younger than ttl (by its original fetch time), or None."""
+    entry = await get_cached_entry(key, ttl)
+    return entry[0] if entry is not None else None
+
+
+async def get_cached_entry(key: str, ttl: timedelta) -> tuple | None:
+    """(value, fetched_at) for a cached value younger than ttl, or None — for callers that judge staleness."""
+    local = _local_caches.get(key)
+    if local is not None and datetime.utcnow() - local[1] < ttl:
+        metrics.cache_lookup(_label(key), hit=True)
+        return local
+
+    db = get_db()
+    doc = await db.shared_cache.find_one({"key": key}) if db is not None else None
+    if doc and datetime.utcnow() - doc["fetched_at"] < ttl:
+        # Another worker fetched it — a local miss, but no upstream call
+        _local_caches[key] = (doc["value"], doc["fetched_at"])
+        metrics.cache_lookup(_label(key), hit=True)
+        return _local_caches[key]
+
+    metrics.cache_lookup(_label(key), hit=False)
+    return None
+
+
+async def put_cached(key: str, value) -> None:
+    fetched_at = datetime.utcnow()
+    _local_caches[key] = (value, fetched_at)
+
+    db = get_db()
+    if db is None:
+        return
+    try:
+        await db.shared_cache.update_one(
+            {"key": key},
+            {"$set": {"key": key, "value": value, "fetched_at": fetched_at}},
+            upsert=True,
+        )
+    except Exception as e:
+        # Still cached locally; other workers will fetch for themselves
+        logger.warning(f"Failed to share cache entry {key}: {e}")
+
+
+def invalidate(key: str | None = None) -> None:
+    """Drop local copies of one key (or everything) so the next read goes to Mongo."""
+    if key is None:
+        _local_settings.clear()
+        _local_caches.clear()
+    else:
+        _local_settings.pop(key, None)
+        _local_caches.pop(key, None)
+
+
+async def run_change_stream() -> None:
+    """Background task (SHARED_STATE_CHANGE_STREAM): drop local copies when any process writes."""
+    pipeline = [{"$match": {"ns.coll": {"$in": ["settings", "shared_cache"]}}}]
+    while True:
+        try:
+            async with get_db().watch(pipeline, full_document="updateLookup") as stream:
+                async for change in stream:
+                    doc = change.get("fullDocument")
+                    invalidate(doc.get("key") if doc else None)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Shared state change stream stopped: {e}; retrying in 5s")
+            invalidate()
+            await asyncio.sleep(5)
@@ -5,7 +5,7 @@ import logging
 from typing import Tuple, List
 from datetime import datetime
 
-from app.services import user_service
+from app.services import event_bus, user_service
 from app.utils.dates import today_str, now
 
 
@@ -91,6 +91,9 @@ async def parse_and_execute_tags(
                 "success": True,
                 "result": result
             })
+            await event_bus.publish(user_id, "action.executed", {
+                "goal_id": goal_id, "type": tag_name, "result": result,
+            })
 
             # Remove tag from message
             clean_msg = clean_msg.replace(match.group(0), '')
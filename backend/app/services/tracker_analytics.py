@@ -0,0 +1,349 @@
+"""
+Trend analytics over tracker time series.
+
+analyze() turns one tracker's recent values into the numbers the triggers and
+the review prompt need:
+  current_value / last_logged            — the latest logged value
+  period_average / prior_period_average  — mean of the last 7 days and the 7 before
+  slope_7 / slope_14 / slope_7_prior     — least-squares change per day over the
+                                           last 7 and 14 days, and over the 7
+                                           days before that
+  change_7 / days_7                      — first-to-last change within the last 7 days
+  plateau                                — {since, days, mean} when the latest
+                                           values have stayed within a narrow band
+  change_point                           — {date, before, after} when the series
+                                           is explained by two flat levels much
+                                           better than by a straight line
+  projected_date / target_status         — when the 14-day pace reaches the target,
+                                           and reached | on_pace | behind | stalled
+
+Every window statistic is read off one set of prefix sums over the series
+(Σx, Σy, Σx², Σxy, Σy²), so each slope, mean and split costs O(1) after a
+single pass.
+
+Results are cached in `tracker_analytics`, one document per tracker per day,
+and dropped when the tracker is logged (invalidate()) or the goal's target
+changes. trigger_engine's batch run computes them from logs it already holds
+and stores them with store().
+"""
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+
+from pymongo import UpdateOne
+
+from app.database import get_db
+from app.utils.dates import now
+
+# Days of tracker values analyzed
+LOOKBACK_DAYS = 30
+PERIOD_DAYS = 7
+PACE_DAYS = 14
+# Points needed in the pace window before projecting
+PACE_MIN_POINTS = 5
+# Projections further out than this count as stalled
+PROJECTION_HORIZON_DAYS = 3650
+
+PLATEAU_DAYS = 10
+# A plateau is a spread within this fraction of the mean
+PLATEAU_TOLERANCE = 0.005
+# A plateau has to reach a value logged this recently
+PLATEAU_RECENT_DAYS = 1
+
+# Each side of a change point needs this many values
+CHANGE_POINT_MIN_SEGMENT = 3
+# ...and the split has to remove this share of the straight-line fit's error
+CHANGE_POINT_MIN_GAIN = 0.6
+
+STORE_BATCH = 500
+
+
+def _day(value) -> date | None:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str) and value:
+        try:
+            return date.fromisoformat(value[:10])
+        except ValueError:
+            return None
+    return None
+
+
+# ────────────────────────────────────────────────────────────────
+# SERIES STATISTICS
+# ────────────────────────────────────────────────────────────────
+
+class _Sums:
+    """Prefix sums over (day offset, value) points; window [i, j) stats in O(1)."""
+
+    def __init__(self, points: list[tuple[date, float]]):
+        self.days = [d for d, _ in points]
+        origin = self.days[0] if points else date.min
+        self.x = x = [0.0]
+        self.y = y = [0.0]
+        self.xx = xx = [0.0]
+        self.xy = xy = [0.0]
+        self.yy = yy = [0.0]
+        for d, v in points:
+            offset = (d - origin).days
+            x.append(x[-1] + offset)
+            y.append(y[-1] + v)
+            xx.append(xx[-1] + offset * offset)
+            xy.append(xy[-1] + offset * v)
+            yy.append(yy[-1] + v * v)
+
+    def index(self, day: date) -> int:
+        """First point on or after `day`."""
+        return bisect_left(self.days, day)
+
+    def mean(self, i: int, j: int) -> float | None:
+        return (self.y[j] - self.y[i]) / (j - i) if j > i else None
+
+    def sse(self, i: int, j: int) -> float:
+        """Squared error of points [i, j) around their mean."""
+        n = j - i
+        if n <= 0:
+            return 0.0
+        total = self.y[j] - self.y[i]
+        return max(0.0, (self.yy[j] - self.yy[i]) - total * total / n)
+
+    def line_sse(self, i: int, j: int) -> float:
+        """Squared error of points [i, j) around their least-squares line."""
+        n = j - i
+        if n <= 0:
+            return 0.0
+        sx, sy = self.x[j] - self.x[i], self.y[j] - self.y[i]
+        sxx = (self.xx[j] - self.xx[i]) - sx * sx / n
+        sxy = (self.xy[j] - self.xy[i]) - sx * sy / n
+        if sxx <= 0:
+            return self.sse(i, j)
+        return max(0.0, self.sse(i, j) - sxy * sxy / sxx)
+
+    def slope(self, i: int, j: int) -> float | None:
+        """Least-squares change per day over points [i, j); None with fewer than two distinct days."""
+        n = j - i
+        if n < 2:
+            return None
+        sx, sy = self.x[j] - self.x[i], self.y[j] - self.y[i]
+        var = n * (self.xx[j] - self.xx[i]) - sx * sx
+        if var <= 0:
+            return None
+        return (n * (self.xy[j] - self.xy[i]) - sx * sy) / var
+
+
+def _plateau(points: list[tuple[date, float]], today: date) -> dict | None:
+    """The longest run of latest values within PLATEAU_TOLERANCE of their mean."""
+    if len(points) < 3 or (today - points[-1][0]).days > PLATEAU_RECENT_DAYS:
+        return None
+    low = high = total = points[-1][1]
+    start = len(points) - 1
+    for k in range(len(points) - 2, -1, -1):
+        value = points[k][1]
+        lo, hi, sum_ = min(low, value), max(high, value), total + value
+        if hi - lo > abs(sum_ / (len(points) - k)) * PLATEAU_TOLERANCE:
+            break
+        low, high, total, start = lo, hi, sum_, k
+    count = len(points) - start
+    if count < 3:
+        return None
+    return {
+        "since": points[start][0].isoformat(),
+        "days": (points[-1][0] - points[start][0]).days,
+        "mean": round(total / count, 4),
+    }
+
+
+def _change_point(sums: _Sums, i: int, j: int) -> dict | None:
+    """
+    The best single split of points [i, j) into two levels, if it fits better
+    than a straight line does. (Any steady trend splits well into two means, so
+    beating the single mean alone would report a "shift" in every trend.)
+    """
+    baseline = sums.line_sse(i, j)
+    if j - i < 2 * CHANGE_POINT_MIN_SEGMENT or baseline <= 0:
+        return None
+    best, split = baseline, None
+    for k in range(i + CHANGE_POINT_MIN_SEGMENT, j - CHANGE_POINT_MIN_SEGMENT + 1):
+        error = sums.sse(i, k) + sums.sse(k, j)
+        if error < best:
+            best, split = error, k
+    if split is None or (baseline - best) / baseline < CHANGE_POINT_MIN_GAIN:
+        return None
+    before, after = sums.mean(i, split), sums.mean(split, j)
+    if abs(after - before) <= abs(sums.mean(i, j)) * PLATEAU_TOLERANCE:
+        return None
+    return {"date": sums.days[split].isoformat(), "before": round(before, 4), "after": round(after, 4)}
+
+
+def _target_reached(current: float, target: float, direction: str) -> bool:
+    if direction == "decrease":
+        return current <= target
+    return current >= target
+
+
+def analyze(
+    tracker: dict, points: list[tuple[date, float]], today: date,
+    target_value: float | None = None, target_date: str | date | None = None,
+) -> dict:
+    """Trend analytics for one tracker's (day, value) points, oldest first."""
+    since = today - timedelta(days=LOOKBACK_DAYS - 1)
+    points = [p for p in points[bisect_left(points, (since,)):] if p[0] <= today]
+    sums = _Sums(points)
+    n = len(points)
+    period_start = sums.index(today - timedelta(days=PERIOD_DAYS - 1))
+    prior_start = sums.index(today - timedelta(days=2 * PERIOD_DAYS - 1))
+    pace_start = sums.index(today - timedelta(days=PACE_DAYS - 1))
+    direction = tracker.get("direction", "increase")
+
+    result = {
+        "tracker_id": tracker.get("id"),
+        "day": today.isoformat(),
+        "points": n,
+        "current_value": points[-1][1] if points else None,
+        "last_logged": points[-1][0].isoformat() if points else None,
+        "period_average": sums.mean(period_start, n),
+        "prior_period_average": sums.mean(prior_start, period_start),
+        "slope_7": sums.slope(period_start, n),
+        "slope_14": sums.slope(pace_start, n),
+        "slope_7_prior": sums.slope(prior_start, period_start),
+        "period_points": n - period_start,
+        "change_7": points[-1][1] - points[period_start][1] if n - period_start >= 2 else None,
+        "days_7": (points[-1][0] - points[period_start][0]).days if n - period_start >= 2 else None,
+        "plateau": _plateau(points, today),
+        "change_point": _change_point(sums, 0, n),
+        "direction": direction,
+        "target_value": target_value,
+        "target_date": None,
+        "projected_date": None,
+        "target_status": None,
+    }
+
+    deadline = _day(target_date)
+    if target_value is None or deadline is None:
+        return result
+    result["target_date"] = deadline.isoformat()
+    if deadline <= today or n - pace_start < PACE_MIN_POINTS:
+        return result
+
+    current = points[-1][1]
+    remaining = target_value - current
+    if remaining == 0 or _target_reached(current, target_value, direction):
+        result["target_status"] = "reached"
+        return result
+    slope = result["slope_14"]
+    # A pace that needs more than the horizon (or float noise around a zero slope) isn't progress
+    if not slope or (remaining > 0) != (slope > 0) or abs(remaining / slope) > PROJECTION_HORIZON_DAYS:
+        result["target_status"] = "stalled"
+        return result
+    try:
+        projected = today + timedelta(days=remaining / slope)
+    except (OverflowError, ValueError):
+        result["target_status"] = "stalled"
+        return result
+    result["projected_date"] = projected.isoformat()
+    result["target_status"] = "behind" if projected > deadline else "on_pace"
+    return result
+
+
+def series_from_logs(logs: list[dict]) -> dict[str, list[tuple[date, float]]]:
+    """Tracker values by tracker id, oldest first, from daily logs."""
+    series: dict[str, list[tuple[date, float]]] = {}
+    for log in sorted(logs, key=lambda log: log["date"]):
+        day = date.fromisoformat(log["date"])
+        for entry in log.get("tracker_entries", ()):
+            if entry.get("value") is not None:
+                series.setdefault(entry["tracker_id"], []).append((day, entry["value"]))
+    return series
+
+
+def _targets(goal: dict, tracker: dict, primary: bool) -> tuple:
+    """The tracker's own target, or the goal's for its primary tracker."""
+    target = tracker.get("target_value")
+    if target is None and primary:
+        target = goal.get("target_value")
+    return target, goal.get("target_date")
+
+
+def primary_tracker(trackers: list[dict]) -> dict | None:
+    return next((t for t in trackers if t.get("is_primary")), trackers[0] if trackers else None)
+
+
+def analyze_goal(
+    goal: dict, trackers: list[dict], series: dict[str, list[tuple[date, float]]], today: date,
+    primary: dict | None = None,
+) -> dict[str, dict]:
+    """analyze() for every tracker of a goal (or a subset — pass the goal's primary tracker), by tracker id."""
+    primary = primary or primary_tracker(trackers)
+    results = {}
+    for tracker in trackers:
+        target, target_date = _targets(goal, tracker, tracker is primary)
+        results[tracker["id"]] = analyze(tracker, series.get(tracker["id"], []), today, target, target_date)
+    return results
+
+
+# ────────────────────────────────────────────────────────────────
+# CACHE
+# ────────────────────────────────────────────────────────────────
+
+def _is_current(cached: dict, goal: dict, tracker: dict, primary: bool) -> bool:
+    target, target_date = _targets(goal, tracker, primary)
+    return (
+        cached.get("target_value") == target
+        and cached.get("target_date") == (_day(target_date).isoformat() if _day(target_date) else None)
+        and cached.get("direction") == tracker.get("direction", "increase")
+    )
+
+
+async def for_goal(user_id: str, goal: dict, trackers: list[dict], today: date | None = None) -> dict[str, dict]:
+    """Today's analytics for a goal's trackers, by tracker id — cached, computing any that are missing."""
+    today = today or date.today()
+    if not trackers:
+        return {}
+    db = get_db()
+    primary = primary_tracker(trackers)
+    by_id = {t["id"]: t for t in trackers}
+
+    cursor = db.tracker_analytics.find(
+        {"tracker_id": {"$in": list(by_id)}, "day": today.isoformat()}, {"_id": 0, "user_id": 0, "computed_at": 0}
+    )
+    results = {
+        doc["tracker_id"]: doc async for doc in cursor
+        if doc["tracker_id"] in by_id and _is_current(doc, goal, by_id[doc["tracker_id"]], by_id[doc["tracker_id"]] is primary)
+    }
+
+    missing = [t for t in trackers if t["id"] not in results]
+    if missing:
+        since = (today - timedelta(days=LOOKBACK_DAYS - 1)).isoformat()
+        logs = await db.daily_logs.find(
+            {
+                "user_id": user_id, "goal_id": goal["id"], "date": {"$gte": since, "$lte": today.isoformat()},
+                "tracker_entries.tracker_id": {"$in": [t["id"] for t in missing]},
+            },
+            {"_id": 0, "date": 1, "tracker_entries.tracker_id": 1, "tracker_entries.value": 1},
+        ).to_list(None)
+        computed = analyze_goal(goal, missing, series_from_logs(logs), today, primary)
+        await store([(user_id, r) for r in computed.values()])
+        results.update(computed)
+    return results
+
+
+async def store(entries: list[tuple[str, dict]]) -> None:
+    """Cache computed analytics, given as (user_id, result) pairs (one document per tracker per day)."""
+    operations = [
+        UpdateOne(
+            {"tracker_id": r["tracker_id"], "day": r["day"]},
+            {"$set": {**r, "user_id": user_id, "computed_at": now()}},
+            upsert=True,
+        )
+        for user_id, r in entries
+    ]
+    for k in range(0, len(operations), STORE_BATCH):
+        await get_db().tracker_analytics.bulk_write(operations[k:k + STORE_BATCH], ordered=False)
+
+
+async def invalidate(tracker_ids) -> None:
+    """Drop cached analytics for trackers whose values just changed."""
+    tracker_ids = list(tracker_ids)
+    if tracker_ids:
+        await get_db().tracker_analytics.delete_many({"tracker_id": {"$in": tracker_ids}})
@@ -2,6 +2,7 @@ from bson import ObjectId
 
 from app.database import get_db
 from app.models.tracker import TrackerCreate, TrackerUpdate
+from app.services import goal_service
 from app.utils.object_id import doc_id
 from app.utils.dates import now
 
@@ -25,6 +26,7 @@ async def create_tracker(data: TrackerCreate, user_id: str) -> dict:
     }
     result = await db.trackers.insert_one(doc)
     doc["_id"] = result.inserted_id
+    await goal_service.bump_revision(data.goal_id)
     return doc_id(doc)
 
 
@@ -47,4 +49,7 @@ async def update_tracker(tracker_id: str, data: TrackerUpdate) -> dict | None:
         return await get_tracker(tracker_id)
     updates["updated_at"] = now()
     await db.trackers.update_one({"_id": ObjectId(tracker_id)}, {"$set": updates})
-    return await get_tracker(tracker_id)
+    tracker = await get_tracker(tracker_id)
+    if tracker:
+        await goal_service.bump_revision(tracker["goal_id"])
+    return tracker
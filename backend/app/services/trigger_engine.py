@@ -0,0 +1,384 @@
+"""
+Review and proactive check-in triggers, for one goal or every active goal at once.
+
+The rules are pure functions over a goal, its enriched habits (habit_history
+stats) and its primary tracker's trend analytics (tracker_analytics).
+coaching_service uses them for one goal at a time, with cached analytics.
+evaluate_all() streams every active goal (with its habits, trackers,
+histories, recent logs, active session and undelivered check-ins) through one
+aggregation, runs the same rules in memory, caches the analytics it computed
+and returns a work list. generate() turns that list into review sessions and pending
+proactive messages with bounded concurrency; start_job() runs both in the
+background and records the outcome in `trigger_jobs`.
+
+Review rules, first match wins: scheduled, streak_broken, consistently_missing,
+breakthrough, target_at_risk, plateau. Proactive rules: missed_3_plus_days,
+habit_formed, metric_wrong_direction. Goals with an active session get no
+review, and goals with an undelivered check-in get no new one.
+"""
+import asyncio
+import logging
+from datetime import date, datetime, timedelta
+
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from app.database import get_db
+from app.services import habit_history, tracker_analytics
+from app.utils.dates import now
+from app.utils.object_id import doc_id
+
+logger = logging.getLogger(__name__)
+
+# Days of tracker values the tracker rules look at
+LOOKBACK_DAYS = tracker_analytics.LOOKBACK_DAYS
+# Review/check-in generations run at once (each is an LLM call)
+GENERATE_CONCURRENCY = 4
+
+
+# ────────────────────────────────────────────────────────────────
+# RULES
+# ────────────────────────────────────────────────────────────────
+
+def _day(value) -> date | None:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str) and value:
+        try:
+            return date.fromisoformat(value[:10])
+        except ValueError:
+            return None
+    return None
+
+
+def _plateau(tracker: dict, analytics: dict) -> str | None:
+    plateau = analytics.get("plateau")
+    if not plateau or plateau["days"] < tracker_analytics.PLATEAU_DAYS:
+        return None
+    return (
+        f"{tracker.get('name', 'Your metric')} has stayed around {plateau['mean']:g}{tracker.get('unit', '')} "
+        f"for {plateau['days']} days"
+    )
+
+
+def _target_at_risk(tracker: dict, analytics: dict) -> str | None:
+    status = analytics.get("target_status")
+    target, target_date = analytics.get("target_value"), analytics.get("target_date")
+    if status == "stalled":
+        return f"{tracker.get('name', 'Your metric')} isn't moving toward {target:g} — target date {target_date}"
+    if status == "behind":
+        return (
+            f"At the current pace {tracker.get('name', 'your metric')} reaches {target:g} around "
+            f"{analytics['projected_date']}, after the {target_date} target"
+        )
+    return None
+
+
+def _wrong_direction(tracker: dict, analytics: dict) -> dict | None:
+    slope, change = analytics.get("slope_7"), analytics.get("change_7")
+    if slope is None or change is None or analytics.get("period_points", 0) < 3:
+        return None
+    wants_decrease = tracker.get("direction") == "decrease"
+    if (slope > 0) != wants_decrease or slope == 0:
+        return None
+    if abs(change) <= abs(analytics["period_average"]) * tracker_analytics.PLATEAU_TOLERANCE:
+        return None
+    return {
+        "tracker_id": tracker.get("id"),
+        "tracker_name": tracker.get("name"),
+        "change": round(change, 2),
+        "days": analytics["days_7"],
+        "desired_direction": tracker.get("direction", "increase"),
+    }
+
+
+def review_trigger(
+    goal: dict, habits: list[dict], trackers: list[dict], analytics: dict[str, dict], today: date,
+) -> tuple[str, str] | None:
+    """
+    (trigger_type, reason) for the first review rule that fires, or None.
+    habits must be enriched; analytics are tracker_analytics results by tracker id.
+    """
+    last_review = _day((goal.get("ai_context") or {}).get("last_review_date"))
+    if last_review:
+        if (today - last_review).days >= 7:
+            return ("scheduled", "Regular weekly check-in")
+    else:
+        created = _day(goal.get("created_at"))
+        if created and (today - created).days >= 7:
+            return ("scheduled", "First weekly check-in")
+
+    for habit in habits:
+        streak_before = habit.get("streak_before_last_miss", 0)
+        if habit.get("consecutive_missed", 0) >= 1 and streak_before >= 5:
+            return ("streak_broken", f"You had a {streak_before}-day streak on '{habit['title']}' that just broke")
+
+    for habit in habits:
+        consecutive_missed = habit.get("consecutive_missed", 0)
+        if consecutive_missed >= 3:
+            return ("consistently_missing", f"Missed '{habit['title']}' for {consecutive_missed} days in a row")
+
+    for habit in habits:
+        if habit.get("formation_count", 0) == 8 and not habit.get("formation_celebrated", False):
+            return ("breakthrough", f"You just formed '{habit['title']}' - 8 completions reached!")
+
+    tracker = tracker_analytics.primary_tracker(trackers)
+    if tracker and tracker["id"] in analytics:
+        reason = _target_at_risk(tracker, analytics[tracker["id"]])
+        if reason:
+            return ("target_at_risk", reason)
+        reason = _plateau(tracker, analytics[tracker["id"]])
+        if reason:
+            return ("plateau", reason)
+
+    return None
+
+
+def proactive_trigger(
+    goal: dict, habits: list[dict], trackers: list[dict], analytics: dict[str, dict], today: date,
+) -> dict | None:
+    """
+    {type, details} for the first proactive rule that fires, or None.
+    habits must be enriched; analytics are tracker_analytics results by tracker id.
+    """
+    for habit in habits:
+        consecutive_missed = habit.get("consecutive_missed", 0)
+        if consecutive_missed >= 3:
+            return {
+                "type": "missed_3_plus_days",
+                "details": {"habit_id": habit["id"], "habit_title": habit["title"], "days_missed": consecutive_missed},
+            }
+
+    for habit in habits:
+        formation_count = habit.get("formation_count", 0)
+        if habit.get("is_formed", False) and formation_count >= 8 and not habit.get("formation_celebrated", False):
+            return {
+                "type": "habit_formed",
+                "details": {"habit_id": habit["id"], "habit_title": habit["title"], "formation_count": formation_count},
+            }
+
+    tracker = tracker_analytics.primary_tracker(trackers)
+    if tracker and tracker["id"] in analytics:
+        details = _wrong_direction(tracker, analytics[tracker["id"]])
+        if details:
+            return {"type": "metric_wrong_direction", "details": details}
+
+    return None
+
+
+# ────────────────────────────────────────────────────────────────
+# BATCH
+# ────────────────────────────────────────────────────────────────
+
+def _pipeline(since: str) -> list[dict]:
+    # Child collections store goal_id as a string
+    return [
+        {"$match": {"status": "active"}},
+        {"$addFields": {"_goal_id": {"$toString": "$_id"}}},
+        {"$lookup": {
+            "from": "habits",
+            "localField": "_goal_id",
+            "foreignField": "goal_id",
+            "pipeline": [{"$match": {"status": "active"}}, {"$sort": {"order": 1}}],
+            "as": "habits",
+        }},
+        {"$lookup": {
+            "from": "trackers",
+            "localField": "_goal_id",
+            "foreignField": "goal_id",
+            "as": "trackers",
+        }},
+        {"$lookup": {
+            "from": "habit_histories",
+            "localField": "_goal_id",
+            "foreignField": "goal_id",
+            "pipeline": [{"$project": {"_id": 0, "habit_id": 1, "words": 1}}],
+            "as": "histories",
+        }},
+        {"$lookup": {
+            "from": "daily_logs",
+            "localField": "_goal_id",
+            "foreignField": "goal_id",
+            "let": {"user_id": "$user_id"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$user_id", "$$user_id"]}, "date": {"$gte": since}}},
+                {"$project": {"_id": 0, "date": 1, "tracker_entries.tracker_id": 1, "tracker_entries.value": 1}},
+            ],
+            "as": "logs",
+        }},
+        {"$lookup": {
+            "from": "coaching_sessions",
+            "localField": "_goal_id",
+            "foreignField": "goal_id",
+            "pipeline": [{"$match": {"status": "active"}}, {"$project": {"_id": 1}}, {"$limit": 1}],
+            "as": "active_sessions",
+        }},
+        {"$lookup": {
+            "from": "pending_proactive_messages",
+            "localField": "_goal_id",
+            "foreignField": "goal_id",
+            "pipeline": [{"$match": {"delivered": False}}, {"$project": {"_id": 1}}, {"$limit": 1}],
+            "as": "pending_checkins",
+        }},
+        {"$project": {"_goal_id": 0, "questionnaire_responses": 0}},
+    ]
+
+
+async def _enriched_habits(goal: dict, histories: list[dict], today: date) -> list[dict]:
+    bits = {h["habit_id"]: habit_history.to_int(h.get("words", {})) for h in histories}
+    habits = goal["habits"]
+    missing = [h for h in habits if h["id"] not in bits]
+    if missing:
+        bits.update(await habit_history.rebuild(missing, goal["user_id"]))
+
+    enriched = []
+    for habit in habits:
+        stats = habit_history.stats(bits.get(habit["id"], 0), today, habit_history.activated_day(habit))
+        enriched.append({**habit, **stats, "is_formed": stats["formation_count"] >= 8})
+    return enriched
+
+
+async def evaluate_all(today: date | None = None, kinds: tuple = ("review", "proactive")) -> list[dict]:
+    """
+    Every trigger that fires across all active goals, as a work list of
+    {kind: review|proactive, user_id, goal_id, trigger_type, reason | details}.
+    """
+    today = today or date.today()
+    since = (today - timedelta(days=LOOKBACK_DAYS - 1)).isoformat()
+    work = []
+    computed = []
+    goals = errors = 0
+
+    async for doc in get_db().goals.aggregate(_pipeline(since), batchSize=100):
+        goals += 1
+        try:
+            items, analytics = await _evaluate_goal(doc, today, kinds)
+        except Exception as e:
+            # One bad goal shouldn't cost everyone else their triggers
+            errors += 1
+            logger.exception(f"Trigger evaluation failed for goal {doc.get('_id')}: {e}")
+            continue
+        work.extend(items)
+        computed.extend(analytics)
+
+    # Cache today's tracker analytics for the review prompts that follow
+    await tracker_analytics.store(computed)
+    logger.info(f"Trigger evaluation: {goals} active goals, {len(work)} triggers, {errors} errors")
+    return work
+
+
+async def _evaluate_goal(doc: dict, today: date, kinds: tuple) -> tuple[list[dict], list[tuple[str, dict]]]:
+    """Work items for one aggregated goal, and its tracker analytics as (user_id, result) pairs."""
+    goal = doc_id(doc)
+    goal["habits"] = [doc_id(h) for h in goal["habits"]]
+    goal["trackers"] = [doc_id(t) for t in goal["trackers"]]
+    habits = await _enriched_habits(goal, goal.pop("histories"), today)
+    analytics = tracker_analytics.analyze_goal(
+        goal, goal["trackers"], tracker_analytics.series_from_logs(goal.pop("logs")), today,
+    )
+    base = {"user_id": goal["user_id"], "goal_id": goal["id"]}
+    work = []
+
+    if "review" in kinds and not goal.pop("active_sessions"):
+        fired = review_trigger(goal, habits, goal["trackers"], analytics, today)
+        if fired:
+            work.append({**base, "kind": "review", "trigger_type": fired[0], "reason": fired[1]})
+
+    if "proactive" in kinds and not goal.pop("pending_checkins"):
+        fired = proactive_trigger(goal, habits, goal["trackers"], analytics, today)
+        if fired:
+            work.append({**base, "kind": "proactive", "trigger_type": fired["type"], "details": fired["details"]})
+
+    return work, [(goal["user_id"], result) for result in analytics.values()]
+
+
+async def generate(work: list[dict], concurrency: int = GENERATE_CONCURRENCY) -> list[dict]:
+    """Start review sessions and queue proactive check-ins for a work list; one result per item."""
+    from app.services import coaching_service
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(item: dict) -> dict:
+        async with semaphore:
+            try:
+                if item["kind"] == "review":
+                    trigger = "scheduled_review" if item["trigger_type"] == "scheduled" else item["trigger_type"]
+                    session = await coaching_service.start_coaching_session(
+                        item["goal_id"], trigger=trigger, user_id=item["user_id"], trigger_reason=item["reason"],
+                    )
+                    return {**item, "status": "created", "session_id": session["id"]}
+                pending = await coaching_service.generate_proactive_message(
+                    item["user_id"], item["goal_id"],
+                    trigger={"type": item["trigger_type"], "details": item["details"]},
+                )
+                return {**item, "status": "created", "message_id": pending["id"] if pending else None}
+            except Exception as e:
+                logger.warning(f"Trigger generation failed for goal {item['goal_id']} ({item['trigger_type']}): {e}")
+                return {**item, "status": "failed", "error": str(e)}
+
+    return await asyncio.gather(*(run(item) for item in work))
+
+
+# ────────────────────────────────────────────────────────────────
+# JOBS — evaluate + generate in the background, status in `trigger_jobs`
+# ────────────────────────────────────────────────────────────────
+
+# A running job older than this is taken to be abandoned (its process died)
+JOB_STALE_AFTER_S = 2 * 3600
+
+
+class JobRunningError(Exception):
+    """A trigger job is already running; args[0] is its id."""
+
+
+# Strong references, so running jobs aren't garbage collected
+_running: set[asyncio.Task] = set()
+
+
+async def start_job(kinds: tuple = ("review", "proactive")) -> str:
+    """
+    Evaluate and generate in a background task; returns the job id to poll with get_job().
+    Only one job runs at a time (a unique index on running jobs), so two overlapping
+    runs can't generate the same work list. Raises JobRunningError otherwise.
+    """
+    db = get_db()
+    # A job whose process died never finishes; don't let it block every later run
+    await db.trigger_jobs.update_many(
+        {"status": "running", "created_at": {"$lt": now() - timedelta(seconds=JOB_STALE_AFTER_S)}},
+        {"$set": {"status": "failed", "error": "abandoned", "finished_at": now()}},
+    )
+    try:
+        result = await db.trigger_jobs.insert_one({
+            "status": "running", "kinds": list(kinds), "created_at": now(), "finished_at": None,
+        })
+    except DuplicateKeyError:
+        running = await db.trigger_jobs.find_one({"status": "running"}, {"_id": 1})
+        raise JobRunningError(str(running["_id"]) if running else "")
+    job_id = str(result.inserted_id)
+    task = asyncio.create_task(_run_job(job_id, kinds))
+    _running.add(task)
+    task.add_done_callback(_running.discard)
+    return job_id
+
+
+async def _run_job(job_id: str, kinds: tuple) -> None:
+    db = get_db()
+    try:
+        results = await generate(await evaluate_all(kinds=kinds))
+        update = {
+            "status": "done",
+            "count": len(results),
+            "created": sum(1 for r in results if r["status"] == "created"),
+            "failed": [r for r in results if r["status"] == "failed"],
+        }
+    except Exception as e:
+        logger.exception(f"Trigger job {job_id} failed: {e}")
+        update = {"status": "failed", "error": str(e)}
+    await db.trigger_jobs.update_one({"_id": ObjectId(job_id)}, {"$set": {**update, "finished_at": now()}})
+
+
+async def get_job(job_id: str) -> dict | None:
+    if not ObjectId.is_valid(job_id):
+        return None
+    doc = await get_db().trigger_jobs.find_one({"_id": ObjectId(job_id)})
+    return doc_id(doc) if doc else None
@@ -0,0 +1,131 @@
+"""
+LLM token and cost accounting.
+
+Every provider call adds to one rollup document per
+(day, user, session, task, provider, model) in `llm_usage`, so reports are a
+$group over a few documents per user-day rather than a scan of every call.
+"""
+import logging
+
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from app.database import get_db
+from app.utils.dates import now, today_str, days_ago
+
+logger = logging.getLogger(__name__)
+
+GROUP_BY_FIELDS = {
+    "user": "user_id",
+    "session": "session_id",
+    "model": "model",
+    "task": "task",
+    "provider": "provider",
+    "day": "day",
+}
+
+
+async def record_llm_usage(attribution: dict, model: str | None, tokens: dict, cost: float | None) -> None:
+    """Add one provider call to its rollup. Runs in the background (ai_service._record_usage), never fails the call."""
+    db = get_db()
+    if db is None:
+        return
+
+    key = {
+        "day": today_str(),
+        "user_id": attribution.get("user_id"),
+        "session_id": attribution.get("session_id"),
+        "task": attribution.get("task", "other"),
+        "provider": attribution.get("provider"),
+        "model": model,
+    }
+    increments = {
+        "calls": 1,
+        "prompt_tokens": tokens["prompt_tokens"],
+        "completion_tokens": tokens["completion_tokens"],
+        "cached_tokens": tokens["cached_tokens"],
+        "cache_write_tokens": tokens["cache_write_tokens"],
+        "cost_usd": cost or 0.0,
+        # Calls we couldn't price (model missing from the pricing lists) — cost_usd undercounts these
+        "unpriced_calls": 0 if cost is not None else 1,
+    }
+
+    update = {
+        "$inc": increments,
+        "$set": {"updated_at": now()},
+        "$setOnInsert": {"created_at": now()},
+    }
+    try:
+        try:
+            await db.llm_usage.update_one(key, update, upsert=True)
+        except DuplicateKeyError:
+            # Lost the insert race to a concurrent call — the document exists now
+            await db.llm_usage.update_one(key, update)
+    except Exception as e:
+        logger.warning(f"Failed to record LLM usage: {e}")
+
+
+async def usage_report(group_by: str = "user", days: int = 7, limit: int = 50) -> dict:
+    """
+    Token and cost totals over the last N days: the top `limit` groups, most
+    expensive first, and the period's total cost across every group.
+    """
+    if group_by not in GROUP_BY_FIELDS:
+        raise ValueError(f"Invalid group_by. Must be one of: {', '.join(GROUP_BY_FIELDS)}")
+
+    db = get_db()
+    field = GROUP_BY_FIELDS[group_by]
+    since = days_ago(days - 1).isoformat()
+
+    pipeline = [
+        {"$match": {"day": {"$gte": since}}},
+        {"$facet": {
+            "rows": [
+                {"$group": {
+                    "_id": f"${field}",
+                    "calls": {"$sum": "$calls"},
+                    "prompt_tokens": {"$sum": "$prompt_tokens"},
+                    "completion_tokens": {"$sum": "$completion_tokens"},
+                    "cached_tokens": {"$sum": "$cached_tokens"},
+                    "cache_write_tokens": {"$sum": "$cache_write_tokens"},
+                    "cost_usd": {"$sum": "$cost_usd"},
+                    "unpriced_calls": {"$sum": "$unpriced_calls"},
+                    "users": {"$addToSet": "$user_id"},
+                    "tasks": {"$addToSet": "$task"},
+                    "models": {"$addToSet": "$model"},
+                }},
+                {"$sort": {"cost_usd": -1, "prompt_tokens": -1}},
+                {"$limit": limit},
+            ],
+            "total": [{"$group": {"_id": None, "cost_usd": {"$sum": "$cost_usd"}}}],
+        }},
+    ]
+
+    result = (await db.llm_usage.aggregate(pipeline).to_list(1))[0]
+    rows = []
+    for row in result["rows"]:
+        calls = row["calls"] or 1
+        rows.append({
+            group_by: row.pop("_id"),
+            **row,
+            "users": len(row["users"]),
+            "cost_usd": round(row["cost_usd"], 6),
+            "avg_prompt_tokens": round(row["prompt_tokens"] / calls, 1),
+            "avg_completion_tokens": round(row["completion_tokens"] / calls, 1),
+        })
+
+    if group_by == "user":
+        await _attach_emails(rows)
+    total = result["total"][0]["cost_usd"] if result["total"] else 0.0
+    return {"rows": rows, "total_cost_usd": round(total, 6)}
+
+
+async def _attach_emails(rows: list[dict]) -> None:
+    db = get_db()
+    ids = [ObjectId(r["user"]) for r in rows if r["user"] and ObjectId.is_valid(r["user"])]
+    emails = {
+        str(u["_id"]): u.get("email")
+        async for u in db.users.find({"_id": {"$in": ids}}, {"email": 1})
+    }
+    for row in rows:
+        row["email"] = emails.get(row["user"])
@@ -3,10 +3,12 @@ from bson import ObjectId
 from datetime import datetime
 import httpx
 
+from app.config import settings
 from app.database import get_db
 from app.utils.object_id import doc_id
 from app.utils.dates import now
 from app.utils.encryption import encrypt_api_key, decrypt_api_key, mask_api_key
+from app.utils import tracing
 
 
 async def get_user(user_id: str) -> dict | None:
@@ -90,7 +92,7 @@ async def add_memory(user_id: str, text: str, memory_type: str = "general") -> d
     if len(current_memories) >= 100:
         await db.users.update_one(
             {"_id": ObjectId(user_id)},
-            {"$pop": {"memories": -1}}  # Remove first element
+            {"$pop": {"memories": -1}, "$set": {"updated_at": now()}}  # Remove first element
         )
 
     return await get_user(user_id)
@@ -282,14 +284,14 @@ async def test_ai_config(provider: str, api_key: str, base_url: str | None = Non
     """
     if not base_url:
         urls = {
-            "openrouter": "https://openrouter.ai/api/v1",
+            "openrouter": settings.openrouter_base_url,
             "openai": "https://api.openai.com/v1",
             "anthropic": "https://api.anthropic.com/v1",
         }
-        base_url = urls.get(provider, "https://openrouter.ai/api/v1")
+        base_url = urls.get(provider, settings.openrouter_base_url)
 
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with httpx.AsyncClient(timeout=10.0, event_hooks=tracing.httpx_event_hooks()) as client:
             # Anthropic uses different API format
             if provider == "anthropic":
                 # Test with a minimal messages request
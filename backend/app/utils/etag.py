@@ -0,0 +1,54 @@
+"""
+Weak ETags for polled GET endpoints.
+
+An endpoint reads a cheap version of its response first (a revision counter or
+updated_at, from a small indexed read), turns it into an ETag and answers 304
+when the client already holds that version — skipping the full queries and
+serialization:
+
+    tag = etag.weak_etag("goal", *version)
+    if (cached := etag.not_modified(request, response, tag)) is not None:
+        return cached
+    ...build the full response...
+
+Responses are marked `Cache-Control: private, no-cache`, so browsers keep the
+body and revalidate with If-None-Match on every poll.
+"""
+import hashlib
+
+from fastapi import Request, Response
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def weak_etag(*parts) -> str:
+    """W/"…" over the given version parts (ids, counters, timestamps)."""
+    digest = hashlib.blake2b("|".join(str(p) for p in parts).encode(), digest_size=8).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _opaque(tag: str) -> str:
+    # Weak comparison (RFC 9110 §8.8.3.2): W/"x" and "x" match
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def matches(request: Request, tag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return _opaque(tag) in {_opaque(candidate) for candidate in header.split(",")}
+
+
+def not_modified(request: Request, response: Response, tag: str) -> Response | None:
+    """
+    A 304 to return instead of the body when the client's copy is current;
+    otherwise None, with the ETag set on the response the endpoint will send.
+    """
+    if matches(request, tag):
+        return Response(status_code=304, headers={"ETag": tag, "Cache-Control": CACHE_CONTROL})
+    response.headers["ETag"] = tag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return None
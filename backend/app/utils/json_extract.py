@@ -0,0 +1,151 @@
+"""Tolerant JSON extraction for model outputs.
+
+Models don't always return bare JSON. They wrap it in ``` fences, prefix it
+with "Sure, here you go:", append a sign-off, or get cut off mid-object when
+they hit max_tokens. These helpers pull the first JSON value out of whatever
+came back and, if it was truncated, close it off so the fields that did
+arrive can still be used.
+"""
+import json
+import re
+
+_FENCE_RE = re.compile(r"```(?:json|JSON)?\s*([\s\S]*?)(?:```|$)")
+
+# strict=False lets raw newlines/tabs inside strings through, which models emit a lot
+_decoder = json.JSONDecoder(strict=False)
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+class JSONExtractionError(ValueError):
+    """Raised when no JSON value can be recovered from a model response."""
+
+
+def extract_json(raw: str) -> dict | list:
+    """
+    Extract the first JSON object or array from a model response.
+
+    Handles, in order of cost:
+    - bare JSON
+    - JSON inside ```json fences (closed or not)
+    - JSON with leading or trailing prose
+    - JSON truncated mid-string / mid-object
+
+    Raises:
+        JSONExtractionError: If nothing JSON-like can be recovered
+    """
+    if not raw or not raw.strip():
+        raise JSONExtractionError("Empty response")
+
+    text = raw.strip()
+
+    # Fast path — the model did what it was told
+    try:
+        return _decoder.decode(text)
+    except json.JSONDecodeError:
+        pass
+
+    candidates = [m.group(1) for m in _FENCE_RE.finditer(text) if m.group(1).strip()]
+    candidates.append(text)
+
+    for candidate in candidates:
+        value = _decode_embedded(candidate)
+        if value is not None:
+            return value
+
+    raise JSONExtractionError("No JSON object found in response")
+
+
+def _decode_embedded(text: str) -> dict | list | None:
+    """
+    Decode the JSON value in text, ignoring surrounding prose.
+
+    Every top-level bracketed value is tried, so a stray "[1]" in the prose
+    doesn't hide the real reply: the first object wins, and without one the
+    longest value that decodes.
+    """
+    best, best_span = None, -1
+    start = 0
+    while start < len(text):
+        if text[start] not in _CLOSERS:
+            start += 1
+            continue
+
+        try:
+            value, end = _decoder.raw_decode(text, start)
+        except json.JSONDecodeError:
+            value, end = _repair_truncated(text[start:]), len(text)
+            if value is None:
+                # Prose brackets ("[sic]") — keep looking after this one
+                start += 1
+                continue
+
+        if isinstance(value, dict):
+            return value
+        if end - start > best_span:
+            best, best_span = value, end - start
+        # Skip past the value: anything inside it is nested, not a candidate
+        start = end
+
+    return best
+
+
+def _repair_truncated(fragment: str) -> dict | list | None:
+    """
+    Close a JSON value that was cut off before its end.
+
+    Tries the fragment as-is (closing any open string and brackets) first,
+    then falls back to cutting at the last comma so a half-written key or
+    value is dropped rather than guessed.
+    """
+    stack = []
+    in_string = False
+    escaped = False
+    cut_points = []  # (index, stack snapshot) at each structural comma
+
+    for i, char in enumerate(fragment):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+
+        if char == '"':
+            in_string = True
+        elif char in _CLOSERS:
+            stack.append(_CLOSERS[char])
+        elif char in "}]":
+            if not stack or stack[-1] != char:
+                return None
+            stack.pop()
+            if not stack:
+                # Complete value followed by junk raw_decode rejected — not truncation
+                return None
+        elif char == ",":
+            cut_points.append((i, list(stack)))
+
+    attempts = []
+
+    body = fragment
+    if in_string:
+        if escaped:
+            body = body[:-1]
+        body += '"'
+    body = body.rstrip().rstrip(",")
+    if body.endswith(":"):
+        body += " null"
+    attempts.append(body + "".join(reversed(stack)))
+
+    for index, snapshot in reversed(cut_points):
+        attempts.append(fragment[:index] + "".join(reversed(snapshot)))
+
+    for attempt in attempts:
+        try:
+            return _decoder.decode(attempt)
+        except json.JSONDecodeError:
+            continue
+
+    return None
@@ -0,0 +1,196 @@
+"""
+Prometheus metrics for the API, Mongo and LLM hot paths, served at /metrics (behind METRICS_TOKEN).
+
+Metrics are per process — with several uvicorn workers, scrape each one
+(or run a single worker behind the scrape target).
+"""
+import asyncio
+import json
+import logging
+import time
+
+import httpx
+from prometheus_client import Counter, Gauge, Histogram
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+# ── API ──────────────────────────────────────────────────────────
+HTTP_REQUEST_SECONDS = Histogram(
+    "kairos_http_request_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"],
+)
+
+# ── Mongo ────────────────────────────────────────────────────────
+MONGO_COMMAND_SECONDS = Histogram(
+    "kairos_mongo_command_seconds",
+    "Mongo command latency by collection",
+    ["collection", "command"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+MONGO_COMMAND_FAILURES = Counter(
+    "kairos_mongo_command_failures_total",
+    "Failed Mongo commands by collection",
+    ["collection", "command"],
+)
+
+# ── LLM ──────────────────────────────────────────────────────────
+LLM_REQUEST_SECONDS = Histogram(
+    "kairos_llm_request_seconds",
+    "Provider call latency",
+    ["provider", "model"],
+    buckets=(0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0),
+)
+LLM_TOKENS = Counter(
+    "kairos_llm_tokens_total",
+    "Tokens used by provider, model and kind (prompt | completion)",
+    ["provider", "model", "kind"],
+)
+LLM_ERRORS = Counter(
+    "kairos_llm_errors_total",
+    "Failed provider calls by reason (HTTP status or exception type)",
+    ["provider", "model", "reason"],
+)
+LLM_DOWNGRADES = Counter(
+    "kairos_llm_downgrades_total",
+    "Calls moved to the light model because the task's p95 was over its SLO",
+    ["task"],
+)
+TOOL_CALLS = Counter(
+    "kairos_tool_calls_total",
+    "Tool calls executed for the model",
+    ["tool"],
+)
+
+# ── Caches ───────────────────────────────────────────────────────
+CACHE_REQUESTS = Counter(
+    "kairos_cache_requests_total",
+    "In-process cache lookups by result (hit | miss)",
+    ["cache", "result"],
+)
+
+# ── Event loop ───────────────────────────────────────────────────
+EVENT_LOOP_LAG_SECONDS = Gauge(
+    "kairos_event_loop_lag_seconds",
+    "How late the last event loop probe woke up",
+)
+EVENT_LOOP_LAG = Histogram(
+    "kairos_event_loop_lag_observed_seconds",
+    "Event loop lag distribution",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+
+def cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+async def track_requests(request, call_next):
+    """HTTP middleware: latency per route template (not raw path, to keep labels bounded)."""
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.labels(
+            request.method,
+            route.path if route is not None else "unmatched",
+            str(status),
+        ).observe(time.perf_counter() - started)
+
+
+class MongoMetricsListener(monitoring.CommandListener):
+    """Command counts and latency per collection."""
+
+    def __init__(self):
+        self._collections: dict[tuple, str] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        collection = event.command.get(event.command_name)
+        self._collections[(event.connection_id, event.request_id)] = (
+            collection if isinstance(collection, str) else "-"
+        )
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        collection = self._collections.pop((event.connection_id, event.request_id), "-")
+        MONGO_COMMAND_SECONDS.labels(collection, event.command_name).observe(event.duration_micros / 1e6)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        collection = self._collections.pop((event.connection_id, event.request_id), "-")
+        MONGO_COMMAND_SECONDS.labels(collection, event.command_name).observe(event.duration_micros / 1e6)
+        MONGO_COMMAND_FAILURES.labels(collection, event.command_name).inc()
+
+
+_PROVIDER_HOSTS = {
+    "openrouter.ai": "openrouter",
+    "api.openai.com": "openai",
+    "api.anthropic.com": "anthropic",
+}
+
+
+class LLMMetricsTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport wrapper for provider clients: latency, errors (including
+    timeouts, which never reach a response hook) and token usage per model.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport = None):
+        self._transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        provider = _PROVIDER_HOSTS.get(request.url.host, request.url.host)
+        model = _request_model(request)
+        started = time.perf_counter()
+
+        try:
+            response = await self._transport.handle_async_request(request)
+        except Exception as e:
+            LLM_ERRORS.labels(provider, model, type(e).__name__).inc()
+            raise
+        finally:
+            LLM_REQUEST_SECONDS.labels(provider, model).observe(time.perf_counter() - started)
+
+        if response.status_code >= 400:
+            LLM_ERRORS.labels(provider, model, str(response.status_code)).inc()
+            return response
+
+        # Provider replies are small JSON bodies; read once here, httpx reuses the bytes
+        body = await response.aread()
+        try:
+            usage = json.loads(body).get("usage") or {}
+        except (ValueError, AttributeError):
+            usage = {}
+        # OpenAI-compatible: prompt/completion_tokens — Anthropic: input/output_tokens
+        prompt = usage.get("prompt_tokens", usage.get("input_tokens")) or 0
+        completion = usage.get("completion_tokens", usage.get("output_tokens")) or 0
+        if prompt:
+            LLM_TOKENS.labels(provider, model, "prompt").inc(prompt)
+        if completion:
+            LLM_TOKENS.labels(provider, model, "completion").inc(completion)
+
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def _request_model(request: httpx.Request) -> str:
+    try:
+        return json.loads(request.content).get("model") or "unknown"
+    except (ValueError, AttributeError):
+        return "unknown"
+
+
+async def monitor_event_loop(interval: float = 0.5) -> None:
+    """Background task: sleep `interval` and record how late the loop woke us."""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - expected)
+        EVENT_LOOP_LAG_SECONDS.set(lag)
+        EVENT_LOOP_LAG.observe(lag)
@@ -0,0 +1,92 @@
+"""
+On-demand sampling profiles of single requests.
+
+A covered endpoint wraps its work in `profile_request(...)`. The request is
+profiled when an admin sends `X-Kairos-Profile: 1`, or when the user has
+`profile_requests: true` on their document (set via
+PUT /admin/users/{user_id}/profiling). Everything else passes straight through.
+
+Uses pyinstrument in async mode, so time spent awaiting Mongo or the LLM
+provider is attributed to the awaiting coroutine rather than lost in the
+event loop. pyinstrument is optional — without it, profiling requests are
+served unprofiled and a warning is logged once.
+
+The profile id comes back in the `X-Kairos-Profile-Id` response header; fetch
+it from GET /admin/profiles/{request_id}.
+"""
+import logging
+import time
+import uuid
+from contextlib import asynccontextmanager
+
+from fastapi import Request, Response
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Kairos-Profile"
+PROFILE_ID_HEADER = "X-Kairos-Profile-Id"
+
+_missing_warned = False
+
+
+def wants_profile(request: Request, user: dict) -> bool:
+    if user.get("profile_requests"):
+        return True
+    header = request.headers.get(PROFILE_HEADER, "").lower()
+    return header in ("1", "true", "yes") and user.get("is_admin", False)
+
+
+def _load_profiler():
+    global _missing_warned
+    try:
+        from pyinstrument import Profiler
+        from pyinstrument.renderers import SpeedscopeRenderer
+    except ImportError:
+        if not _missing_warned:
+            logger.warning("Request profiling asked for but pyinstrument is not installed (pip install pyinstrument)")
+            _missing_warned = True
+        return None
+    return Profiler, SpeedscopeRenderer
+
+
+@asynccontextmanager
+async def profile_request(request: Request, response: Response, user: dict, name: str):
+    """
+    Profile the wrapped block when this request asks for it.
+
+    Usage:
+        async with profiling.profile_request(request, response, current_user, "send_message"):
+            return await coaching_service.send_message(...)
+    """
+    loaded = _load_profiler() if wants_profile(request, user) else None
+    if loaded is None:
+        yield
+        return
+
+    from app.services import profile_service
+
+    Profiler, SpeedscopeRenderer = loaded
+    request_id = uuid.uuid4().hex
+    response.headers[PROFILE_ID_HEADER] = request_id
+
+    profiler = Profiler(interval=settings.profile_interval_ms / 1000, async_mode="enabled")
+    started = time.perf_counter()
+    profiler.start()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        duration_ms = (time.perf_counter() - started) * 1000
+        await profile_service.save_profile(
+            request_id=request_id,
+            name=name,
+            user_id=user["id"],
+            method=request.method,
+            path=request.url.path,
+            duration_ms=duration_ms,
+            speedscope=profiler.output(SpeedscopeRenderer()),
+            text=profiler.output_text(unicode=True, show_all=False),
+        )
+        logger.info(f"Profiled {name} for user {user['id']} in {duration_ms:.0f}ms → {request_id}")
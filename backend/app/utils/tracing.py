@@ -0,0 +1,296 @@
+"""
+Lightweight request tracing.
+
+Spans live in a ContextVar, so nested `with span(...)` blocks, Motor's executor
+threads (which run in a copy of the caller's context) and httpx hooks all
+attach to whatever span is current. When the root span of a request ends, the
+whole trace is exported as OTLP/JSON (an ExportTraceServiceRequest):
+
+  TRACE_EXPORT_FILE    — appended as one JSON document per line
+  TRACE_OTLP_ENDPOINT  — POSTed to a collector, e.g. http://localhost:4318/v1/traces
+
+With neither set, tracing is off and span() is a no-op.
+"""
+import asyncio
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import httpx
+from pymongo import monitoring
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "kairos-backend"
+
+# OTLP span kinds
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+
+_current_span: ContextVar["Span | None"] = ContextVar("current_span", default=None)
+
+# trace_id -> finished spans, for traces whose root is still open
+_open_traces: dict[str, list["Span"]] = {}
+_lock = threading.Lock()
+_export_tasks: set[asyncio.Task] = set()
+_loop: asyncio.AbstractEventLoop | None = None  # Server loop, for exports from Mongo worker threads
+
+
+def enabled() -> bool:
+    return bool(settings.trace_export_file or settings.trace_otlp_endpoint)
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind",
+                 "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, parent: "Span | None", kind: int = KIND_INTERNAL, attributes: dict = None):
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = dict(attributes or {})
+        self.error = None
+
+        if parent is None:
+            with _lock:
+                _open_traces[self.trace_id] = []
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def finish(self, end_ns: int = None) -> None:
+        self.end_ns = end_ns or time.time_ns()
+
+        with _lock:
+            if self.parent_id is None:
+                trace = _open_traces.pop(self.trace_id, [])
+                trace.append(self)
+            elif self.trace_id in _open_traces:
+                _open_traces[self.trace_id].append(self)
+                return
+            else:
+                # Outlived its request (e.g. a background task) — export on its own
+                trace = [self]
+
+        _export(trace)
+
+
+class _NoopSpan:
+    def set_attribute(self, key: str, value) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+def current_span() -> Span | None:
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, kind: int = KIND_INTERNAL, **attributes):
+    """
+    Time a block as a child of the current span (or as a new trace root).
+
+        with tracing.span("coaching.build_prompt", strategy=strategy) as s:
+            ...
+            s.set_attribute("prompt_chars", len(prompt))
+    """
+    if not enabled():
+        yield _NOOP
+        return
+
+    current = Span(name, _current_span.get(), kind, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        current.finish()
+
+
+# ────────────────────────────────────────────────────────────────
+# INTEGRATIONS
+# ────────────────────────────────────────────────────────────────
+
+async def trace_requests(request, call_next):
+    """HTTP middleware: one root span per request."""
+    global _loop
+    if not enabled():
+        return await call_next(request)
+
+    _loop = asyncio.get_running_loop()
+    with span(f"{request.method} {request.url.path}", kind=KIND_SERVER, **{
+        "http.request.method": request.method,
+        "url.path": request.url.path,
+    }) as root:
+        response = await call_next(request)
+        route = request.scope.get("route")
+        if route is not None:
+            root.name = f"{request.method} {route.path}"
+            root.set_attribute("http.route", route.path)
+        root.set_attribute("http.response.status_code", response.status_code)
+        if response.status_code >= 500:
+            root.error = f"HTTP {response.status_code}"
+        return response
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """One client span per Mongo command issued inside a traced request."""
+
+    def __init__(self):
+        self._inflight: dict[tuple, Span] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        parent = _current_span.get()
+        if parent is None:
+            return
+
+        collection = event.command.get(event.command_name)
+        attributes = {
+            "db.system": "mongodb",
+            "db.operation.name": event.command_name,
+            "db.namespace": event.database_name,
+        }
+        if isinstance(collection, str):
+            attributes["db.collection.name"] = collection
+
+        name = f"mongo {event.command_name} {collection}" if isinstance(collection, str) else f"mongo {event.command_name}"
+        self._inflight[(event.connection_id, event.request_id)] = Span(name, parent, KIND_CLIENT, attributes)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        current = self._inflight.pop((event.connection_id, event.request_id), None)
+        if current:
+            current.finish(current.start_ns + event.duration_micros * 1000)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        current = self._inflight.pop((event.connection_id, event.request_id), None)
+        if current:
+            current.error = str(event.failure.get("errmsg", "command failed"))
+            current.finish(current.start_ns + event.duration_micros * 1000)
+
+
+async def _on_http_request(request: httpx.Request) -> None:
+    parent = _current_span.get()
+    if parent is None:
+        return
+    request.extensions["trace_span"] = Span(
+        f"{request.method} {request.url.host}", parent, KIND_CLIENT, {
+            "http.request.method": request.method,
+            "server.address": request.url.host,
+            "url.path": request.url.path,
+        },
+    )
+
+
+async def _on_http_response(response: httpx.Response) -> None:
+    current = response.request.extensions.pop("trace_span", None)
+    if current is None:
+        return
+    current.set_attribute("http.response.status_code", response.status_code)
+    if response.status_code >= 400:
+        current.error = f"HTTP {response.status_code}"
+    current.finish()
+
+
+def httpx_event_hooks() -> dict:
+    """Event hooks for httpx.AsyncClient — a client span per outgoing request."""
+    if not enabled():
+        return {}
+    return {"request": [_on_http_request], "response": [_on_http_response]}
+
+
+# ────────────────────────────────────────────────────────────────
+# OTLP/JSON EXPORT
+# ────────────────────────────────────────────────────────────────
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_span(s: Span) -> dict:
+    doc = {
+        "traceId": s.trace_id,
+        "spanId": s.span_id,
+        "name": s.name,
+        "kind": s.kind,
+        "startTimeUnixNano": str(s.start_ns),
+        "endTimeUnixNano": str(s.end_ns),
+        "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+        "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+    }
+    if s.parent_id:
+        doc["parentSpanId"] = s.parent_id
+    return doc
+
+
+def to_otlp(spans: list[Span]) -> dict:
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [
+                {"key": "service.name", "value": {"stringValue": SERVICE_NAME}},
+                {"key": "process.pid", "value": {"intValue": str(os.getpid())}},
+            ]},
+            "scopeSpans": [{
+                "scope": {"name": __name__},
+                "spans": [_otlp_span(s) for s in spans],
+            }],
+        }]
+    }
+
+
+def _export(spans: list[Span]) -> None:
+    payload = to_otlp(spans)
+
+    if settings.trace_export_file:
+        try:
+            with _lock, open(settings.trace_export_file, "a") as f:
+                f.write(json.dumps(payload) + "\n")
+        except OSError as e:
+            logger.warning(f"Failed to write trace: {e}")
+
+    if settings.trace_otlp_endpoint:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # Finished in a Mongo worker thread — hand the POST to the server loop
+            if _loop is not None and not _loop.is_closed():
+                _loop.call_soon_threadsafe(_schedule_post, payload)
+            return
+        _schedule_post(payload)
+
+
+def _schedule_post(payload: dict) -> None:
+    task = asyncio.get_running_loop().create_task(_post(payload))
+    _export_tasks.add(task)
+    task.add_done_callback(_export_tasks.discard)
+
+
+async def _post(payload: dict) -> None:
+    try:
+        async with httpx.AsyncClient(timeout=5.0) as client:
+            response = await client.post(settings.trace_otlp_endpoint, json=payload)
+            response.raise_for_status()
+    except httpx.HTTPError as e:
+        logger.warning(f"Failed to export trace to {settings.trace_otlp_endpoint}: {e}")
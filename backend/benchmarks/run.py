@@ -0,0 +1,331 @@
+"""
+Micro-benchmarks for the pure-CPU functions that run on every coaching turn.
+
+Each benchmark runs against synthetic fixtures at two sizes:
+  realistic — what a typical active user has (5 habits, 3 trackers, 30 memories, 30 days)
+  extreme   — the ceiling we want to stay fast at (50 habits, 20 trackers, 500 memories, 365 days)
+
+Timings are per call: the best and median of --repeat rounds, each round sized
+by timeit's autorange (at least 0.2s). Each round also times a fixed reference
+workload. Save a run as a baseline, then compare later runs against it;
+--compare exits 1 when any benchmark's best ratio to the reference regresses
+by more than --threshold percent, so load that slows the whole machine alike
+doesn't read as a regression. Baselines are only comparable on the machine
+they were saved on, so none is committed — save one from the parent commit
+first (see the README).
+
+Usage:
+    cd backend
+    python benchmarks/run.py
+    python benchmarks/run.py --filter prompt_builder --size extreme
+    python benchmarks/run.py --save /tmp/bench-base.json        # on the parent commit
+    python benchmarks/run.py --compare /tmp/bench-base.json --threshold 25
+"""
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import random
+import statistics
+import sys
+import timeit
+from datetime import date, timedelta
+from pathlib import Path
+
+# Add parent directory to path so we can import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models.goal_template import GOAL_TEMPLATES
+from app.prompts import prompt_builder
+from app.prompts.review_session import build_habits_summary_for_review
+from app.services import habit_history, tracker_analytics
+from app.services.ai_service import _format_questionnaire_responses
+from app.services.tag_parser import parse_and_execute_tags
+from app.utils.dates import date_range
+
+SIZES = {
+    "realistic": {"habits": 5, "trackers": 3, "memories": 30, "days": 30, "tags": 3, "paragraphs": 4},
+    "extreme": {"habits": 50, "trackers": 20, "memories": 500, "days": 365, "tags": 40, "paragraphs": 60},
+}
+
+MEMORY_TYPES = ["challenge", "motivation", "schedule", "preference", "general"]
+
+
+# ────────────────────────────────────────────────────────────────
+# FIXTURES — seeded, so every run builds identical inputs
+# ────────────────────────────────────────────────────────────────
+
+def make_habits(count: int, rng: random.Random) -> list[dict]:
+    """Active habits shaped like enrich_habits_with_stats output."""
+    habits = []
+    for i in range(count):
+        completion = rng.randint(0, 7)
+        streak = rng.randint(0, 30)
+        habits.append({
+            "id": f"{i:024x}",
+            "title": f"Habit {i} — walk after dinner",
+            "status": "active",
+            "completion_last_7_days": completion,
+            "completion_last_n_days": completion,
+            "days_since_activation": rng.randint(1, 120),
+            "current_streak": streak,
+            "best_streak": streak + rng.randint(0, 10),
+            "formation_count": rng.randint(0, 8),
+            "is_formed": rng.random() < 0.3,
+            "completed_today": rng.random() < 0.5,
+            "activation_date": (date(2025, 1, 1) + timedelta(days=i)).isoformat(),
+            "linked_tracker_id": f"{i:024x}" if rng.random() < 0.2 else None,
+            "tracker_threshold": 8000,
+        })
+    return habits
+
+
+def make_tracker_rows(count: int, rng: random.Random) -> list[dict]:
+    """Tracker rows as _build_data_picture assembles them before rendering."""
+    rows = []
+    for i in range(count):
+        direction = rng.choice(["increase", "decrease"])
+        avg_14 = rng.uniform(50, 100)
+        avg_7 = avg_14 * rng.uniform(0.8, 1.2)
+        target = rng.uniform(50, 100)
+        rows.append({
+            "tracker": {
+                "id": f"{i:024x}",
+                "name": f"Tracker {i}",
+                "unit": "kg",
+                "target_value": round(target, 1),
+                "direction": direction,
+            },
+            "today": round(avg_7, 1) if rng.random() < 0.6 else None,
+            "avg_7": avg_7,
+            "avg_14": avg_14,
+            "trend": prompt_builder._interpret_trend(avg_7, avg_14, target, direction),
+        })
+    return rows
+
+
+def make_trend_inputs(count: int, rng: random.Random) -> list[tuple]:
+    inputs = []
+    for _ in range(count):
+        avg_14 = rng.uniform(0, 100)
+        inputs.append((
+            avg_14 * rng.uniform(0.7, 1.3),
+            avg_14,
+            rng.choice([None, rng.uniform(50, 100)]),
+            rng.choice(["increase", "decrease"]),
+        ))
+    return inputs
+
+
+def make_memories(count: int, rng: random.Random) -> list[dict]:
+    return [
+        {"text": f"Memory {i}: works late on Tuesdays and skips the gym", "type": rng.choice(MEMORY_TYPES)}
+        for i in range(count)
+    ]
+
+
+def make_tagged_message(tags: int, paragraphs: int, rng: random.Random) -> str:
+    """
+    A coach reply with tags spread through the text. The tag bodies are
+    malformed JSON so parsing stops before any executor (and database) runs —
+    what's measured is the regex scan, JSON attempt and message cleanup.
+    """
+    paragraph = (
+        "Nice work this week — you hit your walks on most days and your weight "
+        "is trending the right way. Let's keep the evening routine steady.\n\n"
+    )
+    parts = [paragraph] * paragraphs
+    for i in range(tags):
+        tag = rng.choice(["HABIT", "LOG", "MEMORY", "UPDATE_HABIT"])
+        parts.insert(rng.randint(0, len(parts)), f"[{tag}]{{'title': 'Item {i}', }}[/{tag}]\n\n\n")
+    return "".join(parts)
+
+
+def questionnaire_fixture() -> tuple[dict, str]:
+    """Answers to every question of the longest template questionnaire."""
+    template = max(GOAL_TEMPLATES, key=lambda t: len(t.questionnaire))
+    answers = {q.id: q.options[-1].value for q in template.questionnaire}
+    return answers, template.id
+
+
+# ────────────────────────────────────────────────────────────────
+# BENCHMARKS
+# ────────────────────────────────────────────────────────────────
+
+def build_benchmarks(size: str) -> dict[str, callable]:
+    """name → zero-argument callable, for one fixture size."""
+    spec = SIZES[size]
+    rng = random.Random(42)
+
+    habits = make_habits(spec["habits"], rng)
+    tracker_rows = make_tracker_rows(spec["trackers"], rng)
+    trackers = [row["tracker"] for row in tracker_rows]
+    trend_inputs = make_trend_inputs(spec["trackers"], rng)
+    memories = make_memories(spec["memories"], rng)
+    message = make_tagged_message(spec["tags"], spec["paragraphs"], rng)
+    answers, template_id = questionnaire_fixture()
+    start = date(2025, 1, 1)
+    end = start + timedelta(days=spec["days"] - 1)
+    goal = {
+        "title": "Lose 10kg",
+        "description": "Get back to my pre-pandemic weight",
+        "target_date": (date.today() + timedelta(days=90)).isoformat(),
+        "primary_tracker": {"name": "Weight", "current_value": 88, "target_value": 80, "unit": "kg"},
+        "ai_context": {"current_phase": "building_foundation", "plan_philosophy": "Small wins first"},
+    }
+
+    history_end = habit_history.day_index(end)
+    history = [
+        sum(1 << (history_end - d) for d in range(spec["days"]) if rng.random() < 0.7)
+        for _ in habits
+    ]
+
+    tracker_series = {
+        t["id"]: [(start + timedelta(days=d), 80 + rng.gauss(0, 1) - d * 0.02) for d in range(spec["days"])]
+        for t in trackers
+    }
+
+    loop = asyncio.new_event_loop()
+
+    def interpret_trends():
+        for args in trend_inputs:
+            prompt_builder._interpret_trend(*args)
+
+    def parse_tags():
+        loop.run_until_complete(parse_and_execute_tags(message, "goal", "user"))
+
+    return {
+        "prompt_builder._build_memories_section": lambda: prompt_builder._build_memories_section(memories),
+        "prompt_builder._build_goal_section": lambda: prompt_builder._build_goal_section(goal),
+        "prompt_builder._render_data_blocks": lambda: prompt_builder._render_data_blocks(tracker_rows, habits),
+        "prompt_builder._render_data_compact": lambda: prompt_builder._render_data_compact(tracker_rows, habits),
+        "prompt_builder._interpret_trend (per tracker)": interpret_trends,
+        "prompt_builder._build_coaches_eye": lambda: prompt_builder._build_coaches_eye(habits, trackers),
+        "review_session.build_habits_summary_for_review": lambda: build_habits_summary_for_review(habits),
+        "tag_parser.parse_and_execute_tags": parse_tags,
+        "ai_service._format_questionnaire_responses": lambda: _format_questionnaire_responses(answers, template_id),
+        "dates.date_range": lambda: date_range(start, end),
+        "habit_history.stats (all habits)": lambda: [habit_history.stats(bits, end) for bits in history],
+        "tracker_analytics.analyze_goal (all trackers)": lambda: tracker_analytics.analyze_goal(
+            goal, trackers, tracker_series, end,
+        ),
+    }
+
+
+def _reference() -> int:
+    """Fixed pure-Python work timed alongside every benchmark, to factor out machine load."""
+    values = [(i * 7919) % 1009 for i in range(300)]
+    counts: dict[int, int] = {}
+    for v in sorted(values):
+        counts[v % 31] = counts.get(v % 31, 0) + 1
+    return sum(f"{k}:{v}".count("1") for k, v in counts.items())
+
+
+_reference_timer = timeit.Timer(_reference)
+_reference_number = max(_reference_timer.autorange()[0], 1)
+
+
+def time_call(fn, repeat: int) -> dict:
+    """
+    Per-call best and median (µs) across `repeat` autoranged rounds, plus the
+    best time relative to the best of the reference workload, timed right before
+    each round. Load on the machine slows both alike, so the ratio is what
+    --compare checks.
+    """
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    number = max(number, 1)
+    rounds, references = [], []
+    for _ in range(repeat):
+        references.append(_reference_timer.timeit(_reference_number) / _reference_number * 1e6)
+        rounds.append(timer.timeit(number) / number * 1e6)
+    return {
+        "best_us": round(min(rounds), 3),
+        "median_us": round(statistics.median(rounds), 3),
+        "relative": round(min(rounds) / min(references), 4),
+        "calls_per_round": number,
+    }
+
+
+def run(sizes: list[str], name_filter: str | None, repeat: int) -> dict[str, dict]:
+    results = {}
+    for size in sizes:
+        for name, fn in build_benchmarks(size).items():
+            if name_filter and name_filter not in name:
+                continue
+            key = f"{name} [{size}]"
+            results[key] = time_call(fn, repeat)
+            print(f"  {key:<66} {results[key]['best_us']:>12.2f} µs  (median {results[key]['median_us']:.2f})")
+    return results
+
+
+def compare(results: dict[str, dict], baseline_path: str, threshold: float) -> bool:
+    """Print the change against a saved baseline. True if nothing regressed past the threshold."""
+    baseline = json.loads(Path(baseline_path).read_text())
+    saved = baseline["results"]
+
+    print(f"\nCompared with {baseline_path} ({baseline.get('python', '?')}, {baseline.get('machine', '?')})\n")
+    if (baseline.get("python"), baseline.get("machine"), baseline.get("node")) != (
+        platform.python_version(), platform.machine(), platform.node(),
+    ):
+        print("  ! baseline was saved on a different machine or Python — changes below aren't meaningful\n")
+    print(f"  {'benchmark':<66} {'baseline':>12} {'now':>12} {'change':>9}  (change: vs the reference workload)")
+
+    regressions = []
+    for key, result in results.items():
+        if key not in saved:
+            print(f"  {key:<66} {'-':>12} {result['best_us']:>12.2f} {'new':>9}")
+            continue
+        before = saved[key]["best_us"]
+        # Judge on the ratio to the in-run reference when both runs have it
+        if "relative" in saved[key] and "relative" in result and saved[key]["relative"]:
+            change = (result["relative"] - saved[key]["relative"]) / saved[key]["relative"] * 100
+        else:
+            change = (result["best_us"] - before) / before * 100 if before else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  ✗ slower"
+            regressions.append(key)
+        elif change < -threshold:
+            flag = "  ✓ faster"
+        print(f"  {key:<66} {before:>12.2f} {result['best_us']:>12.2f} {change:>+8.1f}%{flag}")
+
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed by more than {threshold:.0f}%")
+    return not regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", choices=[*SIZES, "all"], default="all")
+    parser.add_argument("--filter", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed rounds per benchmark")
+    parser.add_argument("--save", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    # Wide by default: µs-scale timings swing ±30% run to run even after normalizing
+    parser.add_argument("--threshold", type=float, default=40.0, help="Regression threshold in percent")
+    args = parser.parse_args()
+
+    # The tag benchmark deliberately feeds malformed tags; don't log each one
+    logging.disable(logging.ERROR)
+
+    sizes = list(SIZES) if args.size == "all" else [args.size]
+    print(f"Per-call time, best of {args.repeat} rounds\n")
+    results = run(sizes, args.filter, args.repeat)
+
+    if args.save:
+        Path(args.save).write_text(json.dumps({
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "node": platform.node(),
+            "results": results,
+        }, indent=2))
+        print(f"\nSaved {len(results)} results to {args.save}")
+
+    if args.compare and not compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
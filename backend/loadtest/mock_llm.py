@@ -0,0 +1,342 @@
+"""
+Mock LLM provider for load testing — OpenAI- and Anthropic-compatible.
+
+Serves the endpoints Kairos calls, with no cost and predictable latency:
+  GET  /v1/models            model list with per-token pricing
+  POST /v1/chat/completions  OpenAI / OpenRouter format (tools, response_format, stream)
+  POST /v1/messages          Anthropic format (tools, tool_choice, stream)
+  GET/PATCH /mock/config     read or change the knobs below while a test runs
+
+Replies follow the request's JSON schema (response_format or the forced reply
+tool), so Kairos parses them exactly as it would a real model's. Initial
+sessions answer phase "complete", so the next message takes the regular
+coaching path (data picture + tool loop).
+
+Usage:
+    cd backend
+    python loadtest/mock_llm.py --port 9100 --latency-ms 800 --jitter-ms 300 \\
+        --tool-call-rate 0.5 --rate-limit-rate 0.02
+
+Point Kairos at it with OPENROUTER_BASE_URL=http://localhost:9100/v1 (any
+OPENROUTER_API_KEY), or per user with ai_base_url.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+CONFIG = {
+    "latency_ms": 800,          # Mean time to first byte
+    "jitter_ms": 300,           # Uniform +/- around the mean
+    "tokens_per_second": 80,    # Generation speed (stream pacing, added to non-stream latency)
+    "tool_call_rate": 0.5,      # Chance of calling a data tool when tools are offered
+    "rate_limit_rate": 0.0,     # Chance of answering 429
+    "completion_tokens": 60,    # Length of free-text replies
+}
+
+MODELS = [
+    {
+        "id": "mock-model",
+        "name": "Mock Model",
+        "context_length": 128000,
+        "pricing": {"prompt": "0.000001", "completion": "0.000002"},
+    },
+    {
+        "id": "mock-model-light",
+        "name": "Mock Model Light",
+        "context_length": 128000,
+        "pricing": {"prompt": "0.0000001", "completion": "0.0000004"},
+    },
+]
+
+# Values that move Kairos conversations along; everything else is generic filler
+FIELD_VALUES = {
+    "phase": "complete",
+    "review_type": "scheduled",
+    "metric_case": "n/a",
+    "delivery": "message_waiting",
+}
+
+app = FastAPI(title="Kairos mock LLM")
+
+
+# ────────────────────────────────────────────────────────────────
+# HELPERS
+# ────────────────────────────────────────────────────────────────
+
+def _words(n: int) -> list[str]:
+    vocab = ["keep", "going", "small", "steps", "today", "habit", "progress", "nice", "work",
+             "try", "again", "tomorrow", "you", "are", "on", "track", "with", "your", "goal"]
+    return [random.choice(vocab) for _ in range(n)]
+
+
+def _estimate_tokens(payload) -> int:
+    return max(1, len(json.dumps(payload)) // 4)
+
+
+def _from_schema(schema: dict, name: str = "") -> object:
+    """Smallest value that satisfies a JSON schema (enough for Kairos's reply models and tools)."""
+    if name in FIELD_VALUES:
+        return FIELD_VALUES[name]
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "anyOf" in schema:
+        return _from_schema(schema["anyOf"][0], name)
+
+    kind = schema.get("type", "string")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), "string")
+
+    if kind == "object":
+        properties = schema.get("properties", {})
+        required = schema.get("required", list(properties))
+        return {k: _from_schema(properties[k], k) for k in required if k in properties}
+    if kind == "array":
+        return [_from_schema(schema.get("items", {}), name)]
+    if kind == "integer":
+        return 7
+    if kind == "number":
+        return 1.0
+    if kind == "boolean":
+        return False
+    if name.endswith("_id"):
+        return ""  # Kairos fills empty user_id / goal_id tool arguments itself
+    if name == "message" or name.endswith("message"):
+        return " ".join(_words(CONFIG["completion_tokens"])).capitalize() + "."
+    return "mock"
+
+
+async def _wait(completion_tokens: int, streaming: bool) -> None:
+    latency = CONFIG["latency_ms"] + random.uniform(-CONFIG["jitter_ms"], CONFIG["jitter_ms"])
+    if not streaming and CONFIG["tokens_per_second"]:
+        latency += completion_tokens / CONFIG["tokens_per_second"] * 1000
+    await asyncio.sleep(max(0.0, latency) / 1000)
+
+
+def _rate_limited(anthropic: bool) -> JSONResponse | None:
+    if random.random() >= CONFIG["rate_limit_rate"]:
+        return None
+    if anthropic:
+        body = {"type": "error", "error": {"type": "rate_limit_error", "message": "Mock rate limit"}}
+    else:
+        body = {"error": {"message": "Mock rate limit", "type": "rate_limit_exceeded", "code": 429}}
+    return JSONResponse(body, status_code=429, headers={"retry-after": "1"})
+
+
+async def _sse(events: list[str]):
+    delay = 1 / CONFIG["tokens_per_second"] if CONFIG["tokens_per_second"] else 0
+    for event in events:
+        yield event
+        await asyncio.sleep(delay)
+
+
+# ────────────────────────────────────────────────────────────────
+# OPENAI / OPENROUTER
+# ────────────────────────────────────────────────────────────────
+
+@app.get("/v1/models")
+async def list_models():
+    return {"data": MODELS}
+
+
+def _openai_message(body: dict) -> tuple[dict, str]:
+    """(assistant message, finish_reason) for a chat completion request."""
+    messages = body.get("messages", [])
+    tools = body.get("tools") or []
+    answered_tool = bool(messages) and messages[-1].get("role") == "tool"
+
+    if tools and not answered_tool and random.random() < CONFIG["tool_call_rate"]:
+        function = random.choice(tools)["function"]
+        arguments = _from_schema(function.get("parameters", {"type": "object"}))
+        return {
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [{
+                "id": f"call_{uuid.uuid4().hex[:12]}",
+                "type": "function",
+                "function": {"name": function["name"], "arguments": json.dumps(arguments)},
+            }],
+        }, "tool_calls"
+
+    response_format = body.get("response_format") or {}
+    schema = (response_format.get("json_schema") or {}).get("schema")
+    content = _from_schema(schema) if schema else {"message": _from_schema({}, "message")}
+    return {"role": "assistant", "content": json.dumps(content)}, "stop"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    limited = _rate_limited(anthropic=False)
+    if limited:
+        await _wait(0, streaming=True)
+        return limited
+
+    message, finish_reason = _openai_message(body)
+    usage = {
+        "prompt_tokens": _estimate_tokens(body.get("messages", [])),
+        "completion_tokens": _estimate_tokens(message),
+    }
+    usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:16]}"
+    created = int(time.time())
+    model = body.get("model", "mock-model")
+
+    streaming = bool(body.get("stream"))
+    await _wait(usage["completion_tokens"], streaming)
+
+    if not streaming:
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+            "usage": usage,
+        }
+
+    def chunk(delta: dict, finish: str | None = None, **extra) -> str:
+        data = {
+            "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish}], **extra,
+        }
+        return f"data: {json.dumps(data)}\n\n"
+
+    events = [chunk({"role": "assistant", "content": ""})]
+    if message.get("tool_calls"):
+        events.append(chunk({"tool_calls": [{"index": 0, **message["tool_calls"][0]}]}))
+    else:
+        text = message["content"]
+        events += [chunk({"content": text[i:i + 16]}) for i in range(0, len(text), 16)]
+    events.append(chunk({}, finish_reason, usage=usage))
+    events.append("data: [DONE]\n\n")
+    return StreamingResponse(_sse(events), media_type="text/event-stream")
+
+
+# ────────────────────────────────────────────────────────────────
+# ANTHROPIC
+# ────────────────────────────────────────────────────────────────
+
+def _anthropic_content(body: dict) -> tuple[list[dict], str]:
+    """(content blocks, stop_reason) for a messages request."""
+    tools = body.get("tools") or []
+    choice = body.get("tool_choice") or {"type": "auto"}
+    messages = body.get("messages", [])
+    last = messages[-1]["content"] if messages else ""
+    answered_tool = isinstance(last, list) and any(b.get("type") == "tool_result" for b in last)
+
+    # Kairos's reply tool is the one with a "message" field; the rest fetch data
+    reply_tools = [t for t in tools if "message" in t.get("input_schema", {}).get("properties", {})]
+    data_tools = [t for t in tools if t not in reply_tools]
+
+    if choice.get("type") == "tool":
+        tool = next(t for t in tools if t["name"] == choice["name"])
+    elif data_tools and not answered_tool and random.random() < CONFIG["tool_call_rate"]:
+        tool = random.choice(data_tools)
+    elif reply_tools and choice.get("type") == "any":
+        tool = reply_tools[0]
+    else:
+        text = json.dumps({"message": _from_schema({}, "message")})
+        return [{"type": "text", "text": text}], "end_turn"
+
+    return [{
+        "type": "tool_use",
+        "id": f"toolu_{uuid.uuid4().hex[:16]}",
+        "name": tool["name"],
+        "input": _from_schema(tool.get("input_schema", {"type": "object"})),
+    }], "tool_use"
+
+
+@app.post("/v1/messages")
+async def messages(request: Request):
+    body = await request.json()
+    limited = _rate_limited(anthropic=True)
+    if limited:
+        await _wait(0, streaming=True)
+        return limited
+
+    content, stop_reason = _anthropic_content(body)
+    usage = {
+        "input_tokens": _estimate_tokens([body.get("system", ""), body.get("messages", [])]),
+        "output_tokens": _estimate_tokens(content),
+    }
+    message_id = f"msg_{uuid.uuid4().hex[:16]}"
+    model = body.get("model", "mock-model")
+
+    streaming = bool(body.get("stream"))
+    await _wait(usage["output_tokens"], streaming)
+
+    if not streaming:
+        return {
+            "id": message_id,
+            "type": "message",
+            "role": "assistant",
+            "model": model,
+            "content": content,
+            "stop_reason": stop_reason,
+            "usage": usage,
+        }
+
+    def event(name: str, data: dict) -> str:
+        return f"event: {name}\ndata: {json.dumps({'type': name, **data})}\n\n"
+
+    events = [event("message_start", {"message": {
+        "id": message_id, "type": "message", "role": "assistant", "model": model, "content": [],
+        "stop_reason": None, "usage": {"input_tokens": usage["input_tokens"], "output_tokens": 0},
+    }})]
+    for index, block in enumerate(content):
+        if block["type"] == "text":
+            events.append(event("content_block_start", {"index": index, "content_block": {"type": "text", "text": ""}}))
+            text = block["text"]
+            events += [
+                event("content_block_delta", {"index": index, "delta": {"type": "text_delta", "text": text[i:i + 16]}})
+                for i in range(0, len(text), 16)
+            ]
+        else:
+            events.append(event("content_block_start", {"index": index, "content_block": {**block, "input": {}}}))
+            events.append(event("content_block_delta", {"index": index, "delta": {
+                "type": "input_json_delta", "partial_json": json.dumps(block["input"]),
+            }}))
+        events.append(event("content_block_stop", {"index": index}))
+    events.append(event("message_delta", {
+        "delta": {"stop_reason": stop_reason}, "usage": {"output_tokens": usage["output_tokens"]},
+    }))
+    events.append(event("message_stop", {}))
+    return StreamingResponse(_sse(events), media_type="text/event-stream")
+
+
+# ────────────────────────────────────────────────────────────────
+# RUNTIME CONFIG
+# ────────────────────────────────────────────────────────────────
+
+@app.get("/mock/config")
+async def get_config():
+    return CONFIG
+
+
+@app.patch("/mock/config")
+async def update_config(request: Request):
+    updates = await request.json()
+    unknown = set(updates) - set(CONFIG)
+    if unknown:
+        return JSONResponse({"error": f"Unknown settings: {', '.join(sorted(unknown))}"}, status_code=400)
+    CONFIG.update({k: type(CONFIG[k])(v) for k, v in updates.items()})
+    return CONFIG
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    for key, default in CONFIG.items():
+        parser.add_argument(f"--{key.replace('_', '-')}", type=type(default), default=default)
+    args = parser.parse_args()
+
+    CONFIG.update({key: getattr(args, key) for key in CONFIG})
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,320 @@
+"""
+Load test: goal creation, daily habit toggles and coaching chats against a running Kairos API.
+
+Seeds load-test users straight into the configured Mongo (same .env as the
+server), mints their JWTs, then runs N virtual users for a fixed duration. Each
+virtual user creates a goal, gets a few habits, and loops over a weighted mix of:
+
+  toggle   POST /daily/{date}/goals/{goal_id}/habits/{habit_id}/toggle
+  log      POST /daily/{date}/goals/{goal_id}/trackers/{tracker_id}/log
+  daily    GET  /daily/{date}
+  goals    GET  /goals
+  chat     POST /coaching/{session_id}/message
+
+and recreates its goal every --actions-per-goal actions. Reports throughput and
+p50/p95/p99 latency per endpoint.
+
+Usage (with loadtest/mock_llm.py running and the API started with
+OPENROUTER_BASE_URL=http://localhost:9100/v1):
+    cd backend
+    python loadtest/run.py --users 20 --duration 60
+    python loadtest/run.py --users 50 --duration 120 --mix toggle=5,chat=1 --json results.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path so we can import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import httpx
+
+from app.auth.jwt import create_access_token
+from app.database import connect_db, close_db, get_db
+from app.models.habit import HabitCreate
+from app.services import habit_service
+from app.utils.dates import now, today_str
+
+DEFAULT_MIX = "toggle=6,log=2,daily=3,goals=1,chat=2"
+
+HABIT_TITLES = ["Walk 8k steps", "Drink 2L water", "No snacks after 8pm", "Stretch 10 minutes"]
+
+CHAT_MESSAGES = [
+    "How am I doing this week?",
+    "I missed my walk yesterday, any tips?",
+    "What should I focus on today?",
+    "I feel like I'm plateauing.",
+    "Logged my weight, thoughts?",
+]
+
+
+class Recorder:
+    """Latency samples and error counts per endpoint."""
+
+    def __init__(self):
+        self.samples: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    async def call(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs) -> httpx.Response | None:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            self.samples[name].append(time.perf_counter() - started)
+            self.errors[name][type(e).__name__] += 1
+            return None
+
+        self.samples[name].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors[name][str(response.status_code)] += 1
+            return None
+        return response
+
+    def report(self, elapsed: float) -> list[dict]:
+        rows = []
+        for name in sorted(self.samples):
+            latencies = sorted(self.samples[name])
+            rows.append({
+                "endpoint": name,
+                "requests": len(latencies),
+                "errors": dict(self.errors[name]),
+                "rps": round(len(latencies) / elapsed, 2),
+                "p50_ms": _percentile(latencies, 50),
+                "p95_ms": _percentile(latencies, 95),
+                "p99_ms": _percentile(latencies, 99),
+                "max_ms": round(latencies[-1] * 1000, 1),
+            })
+        return rows
+
+
+def _percentile(ordered: list[float], pct: float) -> float:
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return round(ordered[index] * 1000, 1)
+
+
+def _parse_mix(mix: str) -> tuple[list[str], list[int]]:
+    actions, weights = [], []
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ("toggle", "log", "daily", "goals", "chat"):
+            raise SystemExit(f"Unknown action in --mix: {name}")
+        actions.append(name.strip())
+        weights.append(int(weight or 1))
+    return actions, weights
+
+
+# ────────────────────────────────────────────────────────────────
+# SETUP
+# ────────────────────────────────────────────────────────────────
+
+async def seed_users(count: int) -> list[dict]:
+    """Create (or reuse) load-test users and mint a token for each."""
+    db = get_db()
+    users = []
+    for i in range(count):
+        google_id = f"loadtest-{i}"
+        await db.users.update_one(
+            {"google_id": google_id},
+            {
+                "$setOnInsert": {
+                    "google_id": google_id,
+                    "email": f"loadtest-{i}@kairos.local",
+                    "name": f"Load Test {i}",
+                    "picture": "",
+                    "coaching_style": "balanced",
+                    "memories": [],
+                    "created_at": now(),
+                },
+                "$set": {"updated_at": now()},
+            },
+            upsert=True,
+        )
+        doc = await db.users.find_one({"google_id": google_id})
+        user_id = str(doc["_id"])
+        users.append({"id": user_id, "token": create_access_token({"sub": user_id})})
+    return users
+
+
+async def seed_habits(goal_id: str, user_id: str, count: int) -> list[str]:
+    """Habits have no create endpoint (the coach adds them) — insert directly, activated a month ago."""
+    db = get_db()
+    habit_ids = []
+    for title in HABIT_TITLES[:count]:
+        habit = await habit_service.create_habit(HabitCreate(goal_id=goal_id, title=title), user_id)
+        habit_ids.append(habit["id"])
+    activated = datetime.utcnow() - timedelta(days=30)
+    await db.habits.update_many({"goal_id": goal_id}, {"$set": {"activated_at": activated}})
+    return habit_ids
+
+
+async def select_model(client: httpx.AsyncClient, token: str, model: str) -> None:
+    response = await client.post(
+        "/models/select", json={"model_id": model}, headers={"Authorization": f"Bearer {token}"}
+    )
+    if response.status_code != 200:
+        raise SystemExit(f"Could not select model '{model}': {response.status_code} {response.text[:200]}")
+
+
+# ────────────────────────────────────────────────────────────────
+# VIRTUAL USER
+# ────────────────────────────────────────────────────────────────
+
+class VirtualUser:
+    def __init__(self, user: dict, client: httpx.AsyncClient, recorder: Recorder, args):
+        self.user = user
+        self.client = client
+        self.recorder = recorder
+        self.args = args
+        self.headers = {"Authorization": f"Bearer {user['token']}"}
+        self.goal = None
+        self.habit_ids: list[str] = []
+        self.session_id = None
+
+    async def request(self, name: str, method: str, url: str, **kwargs) -> httpx.Response | None:
+        return await self.recorder.call(self.client, name, method, url, headers=self.headers, **kwargs)
+
+    async def new_goal(self) -> bool:
+        # One active goal per user — clear it before creating the next
+        existing = await self.request("GET /goals", "GET", "/goals")
+        active = existing.json() if existing else None
+        if active:
+            await self.request("DELETE /goals/{goal_id}", "DELETE", f"/goals/{active['id']}")
+
+        response = await self.request("POST /goals", "POST", "/goals", json={
+            "template_id": "weight-loss",
+            "description": "Load test goal",
+            "initial_value": 90,
+            "target_value": 80,
+        })
+        if response is None:
+            return False
+
+        self.goal = response.json()
+        self.habit_ids = await seed_habits(self.goal["id"], self.user["id"], self.args.habits)
+        self.session_id = None
+        return True
+
+    async def chat(self) -> None:
+        if self.session_id is None:
+            # Goal-setup sessions open with the initial-session prompt; the mock
+            # completes that phase, so later messages take the regular coaching path
+            response = await self.request(
+                "POST /goals/{goal_id}/coaching/start", "POST",
+                f"/goals/{self.goal['id']}/coaching/start", params={"trigger": "goal_setup"},
+            )
+            if response is None:
+                return
+            self.session_id = response.json()["id"]
+
+        await self.request(
+            "POST /coaching/{session_id}/message", "POST",
+            f"/coaching/{self.session_id}/message", json={"message": random.choice(CHAT_MESSAGES)},
+        )
+
+    async def act(self, action: str) -> None:
+        date = today_str()
+        goal_id = self.goal["id"]
+        if action == "toggle" and self.habit_ids:
+            await self.request(
+                "POST /daily/{date}/goals/{goal_id}/habits/{habit_id}/toggle", "POST",
+                f"/daily/{date}/goals/{goal_id}/habits/{random.choice(self.habit_ids)}/toggle",
+            )
+        elif action == "log":
+            trackers = await get_db().trackers.find_one({"goal_id": goal_id, "is_primary": True})
+            if trackers:
+                await self.request(
+                    "POST /daily/{date}/goals/{goal_id}/trackers/{tracker_id}/log", "POST",
+                    f"/daily/{date}/goals/{goal_id}/trackers/{trackers['_id']}/log",
+                    json={"value": round(random.uniform(80, 90), 1)},
+                )
+        elif action == "daily":
+            await self.request("GET /daily/{date}", "GET", f"/daily/{date}")
+        elif action == "goals":
+            await self.request("GET /goals", "GET", "/goals")
+        elif action == "chat":
+            await self.chat()
+
+    async def run(self, deadline: float, actions: list[str], weights: list[int]) -> None:
+        done = 0
+        while time.monotonic() < deadline:
+            if self.goal is None or done % self.args.actions_per_goal == 0:
+                if not await self.new_goal():
+                    await asyncio.sleep(1)
+                    continue
+            await self.act(random.choices(actions, weights)[0])
+            done += 1
+            if self.args.think_ms:
+                await asyncio.sleep(random.uniform(0, 2 * self.args.think_ms) / 1000)
+
+
+# ────────────────────────────────────────────────────────────────
+# MAIN
+# ────────────────────────────────────────────────────────────────
+
+async def main(args) -> None:
+    actions, weights = _parse_mix(args.mix)
+
+    await connect_db()
+    try:
+        users = await seed_users(args.users)
+        limits = httpx.Limits(max_connections=args.users * 2, max_keepalive_connections=args.users * 2)
+        async with httpx.AsyncClient(base_url=args.api, timeout=args.timeout, limits=limits) as client:
+            if args.model:
+                # Model selection is per user
+                await asyncio.gather(*(select_model(client, user["token"], args.model) for user in users))
+
+            recorder = Recorder()
+            started = time.monotonic()
+            deadline = started + args.duration
+            await asyncio.gather(*(
+                VirtualUser(user, client, recorder, args).run(deadline, actions, weights)
+                for user in users
+            ))
+            elapsed = time.monotonic() - started
+    finally:
+        await close_db()
+
+    rows = recorder.report(elapsed)
+    total = sum(r["requests"] for r in rows)
+    errors = sum(sum(r["errors"].values()) for r in rows)
+
+    print(f"\n{args.users} users, {elapsed:.0f}s — {total} requests, {total / elapsed:.1f} req/s, {errors} errors\n")
+    print(f"{'endpoint':<62} {'reqs':>6} {'rps':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}  errors")
+    for r in rows:
+        errs = ", ".join(f"{k}×{v}" for k, v in r["errors"].items()) or "-"
+        print(
+            f"{r['endpoint']:<62} {r['requests']:>6} {r['rps']:>7} "
+            f"{r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8} {r['max_ms']:>8}  {errs}"
+        )
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({
+            "users": args.users,
+            "duration_s": round(elapsed, 1),
+            "requests": total,
+            "rps": round(total / elapsed, 2),
+            "errors": errors,
+            "endpoints": rows,
+        }, indent=2))
+        print(f"\nWrote {args.json}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--api", default="http://localhost:8000", help="Kairos API base URL")
+    parser.add_argument("--users", type=int, default=10, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=int, default=60, help="Seconds to run")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Action weights (default {DEFAULT_MIX})")
+    parser.add_argument("--actions-per-goal", type=int, default=50, help="Recreate the goal after this many actions")
+    parser.add_argument("--habits", type=int, default=3, help="Habits per goal (max 4)")
+    parser.add_argument("--think-ms", type=int, default=0, help="Mean pause between a user's actions")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout (s)")
+    parser.add_argument("--model", default="mock-model", help="Model each user selects before the run ('' to keep current)")
+    parser.add_argument("--json", help="Also write results to this file")
+    asyncio.run(main(parser.parse_args()))
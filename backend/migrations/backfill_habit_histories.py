@@ -0,0 +1,61 @@
+"""
+Database migration script to build the compact habit completion histories.
+
+This script:
+- rebuilds `habit_histories` (one completion bitset per habit) from daily_logs
+  for every habit, one goal at a time
+
+Histories are also rebuilt lazily the first time a habit's stats are read, so
+this is optional — it just moves that cost out of the first coaching turns.
+Safe to re-run: each history is recomputed from the logs and merged in.
+
+Run:
+    cd backend
+    python migrations/backfill_habit_histories.py
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to path so we can import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.database import connect_db, close_db, get_db
+from app.services import habit_history
+from app.utils.object_id import doc_id
+
+
+async def migrate():
+    """Run database migration."""
+    print("Starting habit history backfill...")
+    print(f"Connecting to: {settings.mongodb_url}")
+    print(f"Database: {settings.database_name}")
+
+    await connect_db()
+    db = get_db()
+
+    goal_ids = await db.habits.distinct("goal_id")
+    print(f"\n1. Rebuilding histories for habits in {len(goal_ids)} goals...")
+    habits_done = completions = 0
+    for goal_id in goal_ids:
+        habits = [doc_id(h) async for h in db.habits.find({"goal_id": goal_id})]
+        bits = await habit_history.rebuild(habits)
+        habits_done += len(habits)
+        completions += sum(b.bit_count() for b in bits.values())
+    print(f"   Rebuilt {habits_done} habit histories ({completions} completed days)")
+
+    print("\n2. Verifying migration...")
+    count = await db.habit_histories.count_documents({})
+    print(f"   ✓ {count} habit_histories documents")
+
+    print("\nMigration complete!")
+    await close_db()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(migrate())
+    except Exception as e:
+        print(f"\n❌ Migration failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,114 @@
+"""
+Compare prompt size of the "blocks" and "compact" data picture encodings.
+
+Builds the full coaching system prompt both ways for real goals in the
+database and prints the token count of each, so COMPACT_PROMPT_MODELS can be
+set from measured savings rather than guesses.
+
+Token counts use tiktoken (cl100k_base) when it is installed, otherwise a
+~4 characters/token estimate.
+
+Usage:
+    cd backend
+    python scripts/compare_prompt_encodings.py              # up to 20 active goals
+    python scripts/compare_prompt_encodings.py --limit 100
+    python scripts/compare_prompt_encodings.py --goal <goal_id>
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to path so we can import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bson import ObjectId
+
+from app.database import connect_db, close_db, get_db
+from app.prompts import prompt_builder
+from app.services import habit_service, tracker_service, user_service
+from app.services.coaching_service import enrich_habits_with_stats
+from app.utils.dates import today_str
+from app.utils.object_id import doc_id
+
+
+def _token_counter():
+    try:
+        import tiktoken
+    except ImportError:
+        return (lambda text: round(len(text) / 4)), "estimated (chars / 4)"
+
+    encoder = tiktoken.get_encoding("cl100k_base")
+    return (lambda text: len(encoder.encode(text))), "tiktoken cl100k_base"
+
+
+async def _prompts_for_goal(goal: dict) -> tuple[int, int, str, str] | None:
+    """(habit count, tracker count, blocks prompt, compact prompt) for one goal."""
+    user = await user_service.get_user(goal["user_id"])
+    if not user:
+        return None
+
+    db = get_db()
+    habits = await habit_service.list_habits(goal["id"], status="active")
+    habits = await enrich_habits_with_stats(habits, goal["id"], goal["user_id"])
+    trackers = await tracker_service.list_trackers(goal["id"])
+    today_logs = await db.daily_logs.find_one(
+        {"user_id": goal["user_id"], "goal_id": goal["id"], "date": today_str()}
+    ) or {}
+
+    prompts = []
+    for encoding in ("blocks", "compact"):
+        prompts.append(await prompt_builder.build_coaching_system_prompt(
+            user=user,
+            goal=goal,
+            habits=habits,
+            trackers=trackers,
+            today_logs=today_logs,
+            upcoming_checkins=[],
+            encoding=encoding,
+        ))
+    return len(habits), len(trackers), prompts[0], prompts[1]
+
+
+async def compare(goal_id: str | None, limit: int):
+    await connect_db()
+    db = get_db()
+    count_tokens, method = _token_counter()
+
+    query = {"_id": ObjectId(goal_id)} if goal_id else {"status": "active"}
+    goals = [doc_id(g) async for g in db.goals.find(query).limit(limit)]
+
+    print(f"Token counting: {method}")
+    print(f"{'goal':<26} {'habits':>6} {'trackers':>8} {'blocks':>8} {'compact':>8} {'saved':>7}")
+
+    total_blocks = total_compact = 0
+    try:
+        for goal in goals:
+            result = await _prompts_for_goal(goal)
+            if result is None:
+                continue
+
+            habit_count, tracker_count, blocks_prompt, compact_prompt = result
+            blocks, compact = count_tokens(blocks_prompt), count_tokens(compact_prompt)
+            total_blocks += blocks
+            total_compact += compact
+
+            saved = (blocks - compact) / blocks * 100 if blocks else 0
+            print(f"{goal['id']:<26} {habit_count:>6} {tracker_count:>8} {blocks:>8} {compact:>8} {saved:>6.1f}%")
+    finally:
+        await close_db()
+
+    if total_blocks:
+        saved = (total_blocks - total_compact) / total_blocks * 100
+        print(f"\nTotal: {total_blocks} → {total_compact} tokens ({saved:.1f}% fewer with compact)")
+    else:
+        print("\nNo goals found.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--goal", help="Compare a single goal by ID")
+    parser.add_argument("--limit", type=int, default=20, help="Max goals to compare")
+    args = parser.parse_args()
+
+    asyncio.run(compare(args.goal, args.limit))